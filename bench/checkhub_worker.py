@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""CheckHub 基准测试进程：在临时目录中复制一份 checkhub/app，写入合成配置，
+调用 CheckScheduler.run_all_checks 签到所有账户，等待通知队列发送完成后输出一行 JSON 结果。
+
+由 run.py 启动，也可以单独运行：
+
+    python bench/checkhub_worker.py --accounts 1000 --upstreams '{"glados": "http://127.0.0.1:18080", ...}'
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import toml
+
+
+CHECKHUB_DIR = Path(__file__).resolve().parent.parent / "checkhub"
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def build_settings(upstreams, concurrency: int, notify: bool):
+    return {
+        "admin": {"username": "admin", "password": "admin123"},
+        "notifications": {
+            "telegram": {
+                "enabled": notify,
+                "bot_token": "bench",
+                "chat_id": "1",
+                "api_base": upstreams["telegram"]
+            },
+            "dingtalk": {
+                "enabled": notify,
+                "webhook": f"{upstreams['dingtalk']}/robot/send?access_token=bench",
+                "secret": "bench"
+            },
+            "dispatch": {
+                "max_attempts": 3,
+                "base_delay": 0.1,
+                "max_delay": 1.0,
+                "rate_per_minute": {"telegram": 100000, "dingtalk": 100000}
+            }
+        },
+        "scheduler": {"enabled": False, "check_time": "08:00"},
+        "concurrency": {"max_concurrency": concurrency, "per_site": concurrency, "per_host": concurrency},
+        "http": {"timeout": 30, "max_connections_per_host": concurrency, "http2": False},
+        "cookies": {"enabled": True, "session_ttl_hours": 24},
+        "circuit_breaker": {"enabled": True, "failure_threshold": 3}
+    }
+
+
+def build_sites(accounts: int):
+    return {
+        "glados": {
+            "name": "GLaDOS",
+            "enabled": True,
+            "checker_class": "GladosChecker",
+            "accounts": [
+                {"username": f"bench{i}", "password": "", "cookies": f"koa:sess=bench{i}", "enabled": True}
+                for i in range(accounts)
+            ]
+        }
+    }
+
+
+def prepare_workspace(workdir: Path, args, upstreams):
+    """复制应用代码到临时目录，配置、日志与数据都写在这里，不影响真实的 checkhub/ 目录"""
+    shutil.copytree(CHECKHUB_DIR / "app", workdir / "app", ignore=shutil.ignore_patterns("__pycache__"))
+    (workdir / "config").mkdir()
+    with open(workdir / "config" / "settings.toml", "w", encoding="utf-8") as f:
+        toml.dump(build_settings(upstreams, args.concurrency, not args.no_notify), f)
+    with open(workdir / "config" / "sites.toml", "w", encoding="utf-8") as f:
+        toml.dump(build_sites(args.accounts), f)
+
+
+async def run(args, upstreams):
+    from app.config import get_settings
+    from app.checkers.glados import GladosChecker
+    from app.notifiers.dispatcher import get_dispatcher
+    from app.utils.scheduler import CheckScheduler
+    from app.utils.http import http_clients
+    from app.utils.cookie_jar import cookie_vault
+    from app.utils.circuit_breaker import circuit_breakers
+    from app.utils.log_pipeline import log_pipeline
+    from app.utils.metrics import checks_total
+    from app.utils.timing import start_recording
+    
+    GladosChecker.BASE_URL = upstreams["glados"]
+    settings = get_settings()
+    http_clients.configure(settings)
+    cookie_vault.configure(settings)
+    circuit_breakers.configure(settings)
+    
+    recorder = start_recording()
+    dispatcher = get_dispatcher()
+    await dispatcher.start()
+    started = time.perf_counter()
+    try:
+        await CheckScheduler().run_all_checks()
+        checked = time.perf_counter()
+        drained = await dispatcher.drain(timeout=args.drain_timeout)
+        finished = time.perf_counter()
+    finally:
+        await dispatcher.stop()
+        await http_clients.aclose()
+        await asyncio.to_thread(log_pipeline.flush)
+        recorder.finish()
+    
+    return {
+        "app": "checkhub",
+        "accounts": args.accounts,
+        "concurrency": args.concurrency,
+        "check_seconds": round(checked - started, 3),
+        "total_seconds": round(finished - started, 3),
+        "notifications_drained": drained,
+        "results": {
+            status: int(checks_total.value(site="glados", status=status))
+            for status in ("success", "failed", "error", "skipped")
+        },
+        "timing": recorder.summary()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CheckHub 基准测试进程")
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20, help="全局 / 站点 / 主机并发上限")
+    parser.add_argument("--upstreams", required=True, help="mock_upstream.py 输出的上游地址 JSON")
+    parser.add_argument("--no-notify", action="store_true", help="不发送汇总通知")
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--workdir", help="工作目录（默认使用临时目录并在结束后删除）")
+    args = parser.parse_args()
+    upstreams = json.loads(args.upstreams)
+    
+    tmp = None if args.workdir else tempfile.TemporaryDirectory(prefix="checkhub-bench-")
+    workdir = Path(args.workdir or tmp.name)
+    try:
+        prepare_workspace(workdir, args, upstreams)
+        sys.path.insert(0, str(workdir))
+        result = asyncio.run(run(args, upstreams))
+    finally:
+        if tmp:
+            tmp.cleanup()
+    print(RESULT_PREFIX + json.dumps(result, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""CheckinHub 基准测试进程：在临时目录中写入合成配置，把 GLaDOS / HostLoc 指向模拟上游，
+以 --report 运行 checkinhub 的 main()，输出一行 JSON 结果。
+
+由 run.py 启动，也可以单独运行：
+
+    python bench/checkinhub_worker.py --accounts 1000 --upstreams '{"glados": "http://127.0.0.1:18080", ...}'
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import toml
+
+
+CHECKINHUB_DIR = Path(__file__).resolve().parent.parent / "checkinhub"
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def build_config(upstreams, args):
+    return {
+        "logging": {"level": "WARNING"},
+        "runner": {"workers": args.workers, "max_concurrency": 0, "site_timeout": 0},
+        "cookies": {"enabled": True, "directory": "data/cookies", "session_ttl_hours": 24},
+        "circuit_breaker": {"enabled": True, "failure_threshold": 3},
+        "notifications": {
+            "telegram": {
+                "enabled": not args.no_notify,
+                "bot_token": "bench",
+                "chat_id": "1",
+                "api_base": upstreams["telegram"]
+            },
+            "dingtalk": {
+                "enabled": not args.no_notify,
+                "webhook": f"{upstreams['dingtalk']}/robot/send?access_token=bench",
+                "secret": "bench"
+            },
+            "dispatch": {
+                "queue_file": "data/notification_queue.json",
+                "max_attempts": 3,
+                "base_delay": 0.1,
+                "max_delay": 1.0,
+                "rate_per_minute": {"telegram": 100000, "dingtalk": 100000}
+            }
+        }
+    }
+
+
+def build_sites(sites, accounts: int, concurrency: int):
+    """账户平均分配到各站点；限速放开，只由 concurrency 控制并发"""
+    per_site, extra = divmod(accounts, len(sites))
+    config = {}
+    for index, site_id in enumerate(sites):
+        count = per_site + (1 if index < extra else 0)
+        site = {
+            "name": site_id,
+            "enabled": True,
+            "notify": True,
+            "rate_limit": 100000.0,
+            "rate_burst": concurrency,
+            "concurrency": concurrency,
+            "accounts": [
+                {"username": f"bench{i}", "cookie": f"koa:sess=bench{i}", "uid": str(i + 1), "enabled": True}
+                for i in range(count)
+            ]
+        }
+        if site_id == "hostloc":
+            site.update({"host_concurrency": concurrency, "uid_range": [1, 100000]})
+        config[site_id] = site
+    return config
+
+
+def point_sites_at(upstreams):
+    """站点地址写在类属性里，运行前改为模拟上游"""
+    from sites.glados_site import GladosSite
+    from sites.hostloc_site import HostLocSite
+    
+    GladosSite.BASE_URL = upstreams["glados"]
+    GladosSite.CHECKIN_URL = f"{GladosSite.BASE_URL}/api/user/checkin"
+    GladosSite.STATUS_URL = f"{GladosSite.BASE_URL}/api/user/status"
+    HostLocSite.BASE_URL = upstreams["hostloc"]
+    HostLocSite.SPACE_URL = f"{HostLocSite.BASE_URL}/space-uid-{{}}.html"
+
+
+def summarize_results(timing):
+    results = {"success": 0, "failed": 0}
+    for kinds in timing["groups"].values():
+        account = kinds.get("account")
+        if account:
+            results["success"] += account["count"] - account["errors"]
+            results["failed"] += account["errors"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CheckinHub 基准测试进程")
+    parser.add_argument("--accounts", type=int, default=100, help="账户总数，平均分配到各站点")
+    parser.add_argument("--concurrency", type=int, default=20, help="单个站点同时签到的账户数")
+    parser.add_argument("--sites", default="glados,hostloc", help="参与测试的站点，逗号分隔")
+    parser.add_argument("--workers", type=int, default=2, help="同时运行的站点数")
+    parser.add_argument("--upstreams", required=True, help="mock_upstream.py 输出的上游地址 JSON")
+    parser.add_argument("--no-notify", action="store_true", help="不发送汇总通知")
+    parser.add_argument("--workdir", help="工作目录（默认使用临时目录并在结束后删除）")
+    args = parser.parse_args()
+    upstreams = json.loads(args.upstreams)
+    sites = [site.strip() for site in args.sites.split(",") if site.strip()]
+    
+    tmp = None if args.workdir else tempfile.TemporaryDirectory(prefix="checkinhub-bench-")
+    workdir = Path(args.workdir or tmp.name)
+    cwd = os.getcwd()
+    try:
+        # checkinhub 的配置、日志与数据路径都相对当前目录
+        os.chdir(workdir)
+        Path("config").mkdir(exist_ok=True)
+        with open("config/config.toml", "w", encoding="utf-8") as f:
+            toml.dump(build_config(upstreams, args), f)
+        with open("config/sites.toml", "w", encoding="utf-8") as f:
+            toml.dump(build_sites(sites, args.accounts, args.concurrency), f)
+        
+        sys.path.insert(0, str(CHECKINHUB_DIR))
+        point_sites_at(upstreams)
+        import main as checkinhub_main
+        
+        sys.argv = ["main.py", *sites, "--report", "report.json"]
+        started = time.perf_counter()
+        asyncio.run(checkinhub_main.main())
+        finished = time.perf_counter()
+        
+        with open("report.json", encoding="utf-8") as f:
+            timing = json.load(f)
+    finally:
+        os.chdir(cwd)
+        if tmp:
+            tmp.cleanup()
+    
+    result = {
+        "app": "checkinhub",
+        "accounts": args.accounts,
+        "concurrency": args.concurrency,
+        "total_seconds": round(finished - started, 3),
+        "results": summarize_results(timing),
+        "timing": timing
+    }
+    print(RESULT_PREFIX + json.dumps(result, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""本地模拟上游：GLaDOS、HostLoc、Telegram、钉钉
+
+每个上游监听独立端口（从 --port 开始依次递增），响应前按 latency ± jitter 毫秒延迟，
+并按 error_rate 的概率返回 HTTP 500。GET /__stats__ 返回各上游的请求数、错误数与峰值并发，
+POST /__reset__ 清零统计。
+
+    python bench/mock_upstream.py --port 18080 --latency 50 --jitter 20 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from typing import Any, Dict
+
+from aiohttp import web
+
+
+UPSTREAMS = ("glados", "hostloc", "telegram", "dingtalk")
+
+
+class UpstreamStats:
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+    
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "peak_in_flight": self.peak_in_flight
+        }
+
+
+class MockUpstream:
+    def __init__(self, latency: float = 50.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.stats = {name: UpstreamStats() for name in UPSTREAMS}
+        self.runners = []
+    
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)) / 1000
+    
+    def _handler(self, name: str, body):
+        """包装上游响应：统计并发、模拟延迟，按概率返回 500"""
+        stats = self.stats[name]
+        
+        async def handle(request: web.Request) -> web.Response:
+            stats.requests += 1
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+            try:
+                await asyncio.sleep(self._delay())
+                if self.random.random() < self.error_rate:
+                    stats.errors += 1
+                    return web.json_response({"ok": False, "message": "mock error"}, status=500)
+                return body(request)
+            finally:
+                stats.in_flight -= 1
+        
+        return handle
+    
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response({name: stats.as_dict() for name, stats in self.stats.items()})
+    
+    async def _reset(self, request: web.Request) -> web.Response:
+        for stats in self.stats.values():
+            stats.reset()
+        return web.json_response({"ok": True})
+    
+    def build_app(self, name: str) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/__stats__", self._stats)
+        app.router.add_post("/__reset__", self._reset)
+        
+        if name == "glados":
+            app.router.add_post("/api/user/checkin", self._handler(name, lambda request: web.json_response(
+                {"code": 0, "message": "Checkin! Got 1 Points"}
+            )))
+            app.router.add_get("/api/user/status", self._handler(name, lambda request: web.json_response(
+                {"code": 0, "data": {"leftDays": "100.0"}}
+            )))
+        elif name == "hostloc":
+            app.router.add_get("/space-uid-{uid}.html", self._handler(name, lambda request: web.Response(
+                text=f"<html><body>space {request.match_info['uid']}</body></html>", content_type="text/html"
+            )))
+        elif name == "telegram":
+            app.router.add_post("/bot{token}/sendMessage", self._handler(name, lambda request: web.json_response(
+                {"ok": True, "result": {"message_id": 1}}
+            )))
+        elif name == "dingtalk":
+            app.router.add_post("/robot/send", self._handler(name, lambda request: web.json_response(
+                {"errcode": 0, "errmsg": "ok"}
+            )))
+        return app
+    
+    async def start(self, host: str = "127.0.0.1", port: int = 18080) -> Dict[str, str]:
+        """启动所有上游，返回 {上游名: 根地址}"""
+        urls = {}
+        for offset, name in enumerate(UPSTREAMS):
+            runner = web.AppRunner(self.build_app(name), access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, host, port + offset).start()
+            self.runners.append(runner)
+            urls[name] = f"http://{host}:{port + offset}"
+        return urls
+    
+    async def stop(self):
+        for runner in self.runners:
+            await runner.cleanup()
+        self.runners = []
+
+
+async def serve(args):
+    upstream = MockUpstream(args.latency, args.jitter, args.error_rate, args.seed)
+    urls = await upstream.start(args.host, args.port)
+    # 第一行输出各上游地址，供 run.py 读取
+    print(json.dumps(urls), flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await upstream.stop()
+
+
+def parse_args(argv=None) -> Any:
+    parser = argparse.ArgumentParser(description="本地模拟上游（GLaDOS / HostLoc / Telegram / 钉钉）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080, help="起始端口，四个上游依次占用 port ~ port+3")
+    parser.add_argument("--latency", type=float, default=50.0, help="平均响应延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟抖动范围（± 毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 HTTP 500 的概率（0 ~ 1）")
+    parser.add_argument("--seed", type=int, help="随机数种子，便于复现")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(0)
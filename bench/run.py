@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""离线基准测试：启动本地模拟上游，对 checkhub / checkinhub 依次运行不同账户规模的签到，
+报告吞吐量、账户与请求耗时百分位数、峰值内存（RSS）以及上游收到的请求数与峰值并发。
+
+每个场景在独立的子进程中运行，峰值 RSS 取自该子进程的 rusage（仅支持 Linux / macOS）。
+
+    python bench/run.py --app checkhub --accounts 10 100 1000 --latency 50 --jitter 20
+    python bench/run.py --app all --accounts 10 1000 10000 --concurrency 50 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+WORKERS = {
+    "checkhub": BENCH_DIR / "checkhub_worker.py",
+    "checkinhub": BENCH_DIR / "checkinhub_worker.py"
+}
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def start_upstream(args) -> Tuple[subprocess.Popen, Dict[str, str]]:
+    command = [
+        sys.executable, str(BENCH_DIR / "mock_upstream.py"),
+        "--port", str(args.port),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate)
+    ]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line:
+        process.kill()
+        raise RuntimeError("模拟上游启动失败")
+    return process, json.loads(line)
+
+
+def upstream_call(upstreams: Dict[str, str], path: str, method: str = "GET") -> Dict[str, Any]:
+    request = urllib.request.Request(f"{upstreams['glados']}{path}", method=method)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def peak_rss_mb(rusage) -> float:
+    # Linux 的 ru_maxrss 单位为 KB，macOS 为字节
+    if sys.platform == "darwin":
+        return rusage.ru_maxrss / 1024 / 1024
+    return rusage.ru_maxrss / 1024
+
+
+def run_scenario(app: str, accounts: int, args, upstreams: Dict[str, str]) -> Dict[str, Any]:
+    command = [
+        sys.executable, str(WORKERS[app]),
+        "--accounts", str(accounts),
+        "--concurrency", str(args.concurrency),
+        "--upstreams", json.dumps(upstreams)
+    ]
+    if args.no_notify:
+        command.append("--no-notify")
+    if app == "checkinhub":
+        command += ["--sites", args.sites]
+    
+    upstream_call(upstreams, "/__reset__", "POST")
+    stderr = open(args.log, "a", encoding="utf-8") if args.log else subprocess.DEVNULL
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        stdout = process.stdout.read()
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    finally:
+        if args.log:
+            stderr.close()
+    
+    lines = [line for line in stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if process.returncode != 0 or not lines:
+        raise RuntimeError(f"{app} {accounts} 个账户运行失败（退出码 {process.returncode}）")
+    
+    result = json.loads(lines[-1][len(RESULT_PREFIX):])
+    result["peak_rss_mb"] = round(peak_rss_mb(rusage), 1)
+    result["throughput"] = round(accounts / result["total_seconds"], 1) if result["total_seconds"] else None
+    result["upstream"] = upstream_call(upstreams, "/__stats__")
+    return result
+
+
+def merged_span(timing: Dict[str, Any], kind: str) -> Dict[str, Any]:
+    """各站点同类耗时的合计：次数相加，百分位数取各站点中的最大值"""
+    stats = [kinds[kind] for kinds in timing["groups"].values() if kind in kinds]
+    if not stats:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    return {
+        "count": sum(item["count"] for item in stats),
+        "p50_ms": max(item["p50_ms"] for item in stats),
+        "p95_ms": max(item["p95_ms"] for item in stats),
+        "max_ms": max(item["max_ms"] for item in stats)
+    }
+
+
+def render(results: List[Dict[str, Any]]) -> str:
+    lines = [
+        f"{'app':<12}{'accounts':>9}{'seconds':>9}{'acct/s':>9}{'ok':>7}"
+        f"{'acct p50':>10}{'acct p95':>10}{'req p50':>9}{'req p95':>9}{'notify':>8}"
+        f"{'rss MB':>8}{'upstream':>10}{'peak':>6}"
+    ]
+    for result in results:
+        account = merged_span(result["timing"], "account")
+        request = merged_span(result["timing"], "request")
+        notify = merged_span(result["timing"], "notify")
+        upstream = result["upstream"]
+        lines.append(
+            f"{result['app']:<12}{result['accounts']:>9}{result['total_seconds']:>9.2f}"
+            f"{result['throughput'] or 0:>9.1f}{result['results']['success']:>7}"
+            f"{account['p50_ms']:>10.1f}{account['p95_ms']:>10.1f}"
+            f"{request['p50_ms']:>9.1f}{request['p95_ms']:>9.1f}{notify['count']:>8}"
+            f"{result['peak_rss_mb']:>8.1f}"
+            f"{sum(item['requests'] for item in upstream.values()):>10}"
+            f"{max(item['peak_in_flight'] for item in upstream.values()):>6}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CheckHub / CheckinHub 离线基准测试")
+    parser.add_argument("--app", choices=("checkhub", "checkinhub", "all"), default="all")
+    parser.add_argument("--accounts", type=int, nargs="+", default=[10, 100, 1000], help="账户规模，可给多个")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发上限（checkhub 为全局 / 站点 / 主机，checkinhub 为每个站点）")
+    parser.add_argument("--sites", default="glados,hostloc", help="checkinhub 参与测试的站点")
+    parser.add_argument("--latency", type=float, default=50.0, help="模拟上游平均延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=20.0, help="模拟上游延迟抖动（± 毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟上游返回 500 的概率")
+    parser.add_argument("--seed", type=int, help="模拟上游随机数种子")
+    parser.add_argument("--port", type=int, default=18080, help="模拟上游起始端口（占用 port ~ port+3）")
+    parser.add_argument("--no-notify", action="store_true", help="不发送汇总通知")
+    parser.add_argument("--log", help="把被测进程的日志（stderr）追加写入该文件")
+    parser.add_argument("--output", help="把完整结果写入 JSON 文件")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    apps = list(WORKERS) if args.app == "all" else [args.app]
+    
+    upstream, upstreams = start_upstream(args)
+    results = []
+    try:
+        for app in apps:
+            for accounts in args.accounts:
+                print(f"▶ {app}: {accounts} 个账户 ...", flush=True)
+                started = time.perf_counter()
+                results.append(run_scenario(app, accounts, args, upstreams))
+                print(f"  完成，用时 {time.perf_counter() - started:.1f} 秒", flush=True)
+    finally:
+        upstream.terminate()
+        upstream.wait()
+    
+    print()
+    print(render(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,9 +11,11 @@ def create_app():
     
     app.ctx.sessions = {}
     
-    from app.views import auth, sites, dashboard
+    from app.views import auth, sites, dashboard, metrics
     app.blueprint(auth.bp)
     app.blueprint(sites.bp)
     app.blueprint(dashboard.bp)
+    app.blueprint(metrics.bp)
+    metrics.install(app)
     
     return app
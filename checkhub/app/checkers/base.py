@@ -1,6 +1,15 @@
+import asyncio
+import time
 import httpx
 from typing import Dict, Any, Optional
 from datetime import datetime
+from app.utils.http import http_clients
+from app.utils.executor import host_of
+from app.utils.cookie_jar import cookie_vault, static_cookies
+from app.utils.logger import get_main_logger
+from app.utils.timing import span
+from app.utils.metrics import checks_total, check_duration, upstream_request_duration, upstream_request_errors
+from app.utils.circuit_breaker import circuit_breakers, CircuitOpenError, FAILURE_EXCEPTIONS
 
 
 class CheckResult:
@@ -16,6 +25,10 @@ class CheckResult:
 
 
 class BaseChecker:
+    # 为 True 时同一站点的账户按配置顺序逐个签到
+    sequential = False
+    BASE_URL: Optional[str] = None
+    
     def __init__(self, site_id: str, site_name: str, account: Dict[str, Any]):
         self.site_id = site_id
         self.site_name = site_name
@@ -24,13 +37,67 @@ class BaseChecker:
         self.password = account.get("password")
         self.cookies = account.get("cookies")
         self.extra_data = account.get("extra_data", {})
-        
+        self.session_cookies = httpx.Cookies()
+        # 本次签到中是否收到过 401/403，收到时重新登录后再签到一次
+        self.auth_rejected = False
+    
     async def check_in(self) -> CheckResult:
+        """载入账户保存的会话 Cookie 后签到，结束时把更新过的 Cookie 加密保存；上游主机熔断时直接跳过
+        
+        没有会话 Cookie 时先尝试 login()；签到请求被 401/403 拒绝时强制重新登录，成功后再签到一次。
+        login() 失败不拦截签到请求，由上游返回具体原因"""
+        host = host_of(self.BASE_URL)
         try:
+            await circuit_breakers.check(host, probe=False)
+        except CircuitOpenError as e:
+            checks_total.inc(site=self.site_id, status="skipped")
+            return CheckResult(False, f"已跳过: {e}")
+        
+        started = time.perf_counter()
+        with span(self.site_id, "account") as timer:
+            try:
+                self.session_cookies = await asyncio.to_thread(
+                    cookie_vault.load, self.site_id, self.username, self.cookies, host or ""
+                )
+            except Exception as e:
+                get_main_logger().warning(f"站点 {self.site_id} 账户 {self.username} 的 Cookie 载入失败，本次只使用配置中的 cookies: {e}")
+                self.session_cookies = static_cookies(self.cookies, host or "")
+            status = "success"
+            try:
+                result = await self._check_in_with_login()
+            except CircuitOpenError as e:
+                result = CheckResult(False, f"已跳过: {e}")
+                status = "skipped"
+            except Exception as e:
+                result = CheckResult(False, f"签到异常: {str(e)}")
+                status = "error"
+            finally:
+                try:
+                    await asyncio.to_thread(
+                        cookie_vault.save, self.site_id, self.username, self.session_cookies, self.cookies
+                    )
+                except Exception as e:
+                    get_main_logger().warning(f"站点 {self.site_id} 账户 {self.username} 的 Cookie 保存失败: {e}")
+            if not result.success:
+                timer.error = "failed"
+                if status == "success":
+                    status = "failed"
+        
+        checks_total.inc(site=self.site_id, status=status)
+        check_duration.observe(time.perf_counter() - started, site=self.site_id)
+        return result
+    
+    async def _check_in_with_login(self) -> CheckResult:
+        tried_login = False
+        if not self.logged_in:
+            tried_login = True
+            await self.ensure_login()
+        self.auth_rejected = False
+        result = await self._do_check_in()
+        if not result.success and self.auth_rejected and not tried_login and await self.ensure_login(force=True):
+            self.auth_rejected = False
             result = await self._do_check_in()
-            return result
-        except Exception as e:
-            return CheckResult(False, f"签到异常: {str(e)}")
+        return result
     
     async def _do_check_in(self) -> CheckResult:
         raise NotImplementedError("子类必须实现 _do_check_in 方法")
@@ -38,6 +105,65 @@ class BaseChecker:
     async def login(self) -> bool:
         return False
     
+    @property
+    def logged_in(self) -> bool:
+        """是否持有未过期的会话 Cookie"""
+        return len(self.session_cookies.jar) > 0
+    
+    async def ensure_login(self, force: bool = False) -> bool:
+        """会话 Cookie 有效时直接复用，否则（或 force 时）清空会话并调用 login()"""
+        if self.logged_in and not force:
+            return True
+        self.session_cookies.clear()
+        return await self.login()
+    
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """带账户 Cookie 的请求：发送会话中的 Cookie，并把响应里的 Set-Cookie 写回会话"""
+        host = host_of(url)
+        probe = await circuit_breakers.check(host)
+        client = self.http.client_for(url)
+        follow_redirects = kwargs.pop("follow_redirects", False)
+        request = client.build_request(method, url, **kwargs)
+        self.session_cookies.set_cookie_header(request)
+        started = time.perf_counter()
+        with span(self.site_id, "request") as timer:
+            try:
+                response = await client.send(request, follow_redirects=follow_redirects)
+            except Exception as e:
+                if isinstance(e, FAILURE_EXCEPTIONS):
+                    circuit_breakers.record_failure(host)
+                elif probe:
+                    # 非连接类异常不能说明主机是否恢复，让出探测名额
+                    circuit_breakers.release(host)
+                upstream_request_errors.inc(host=host, error=type(e).__name__)
+                raise
+            except asyncio.CancelledError:
+                if probe:
+                    circuit_breakers.release(host)
+                raise
+            finally:
+                upstream_request_duration.observe(time.perf_counter() - started, host=host)
+            if response.status_code >= 400:
+                timer.error = f"HTTP {response.status_code}"
+            if response.status_code in (401, 403):
+                self.auth_rejected = True
+            if response.status_code >= 500:
+                upstream_request_errors.inc(host=host, error=f"HTTP {response.status_code}")
+        circuit_breakers.record_success(host)
+        
+        for item in response.history + [response]:
+            # 同名 Cookie 以最新收到的为准，避免与配置中的静态 Cookie 因域不同而重复发送
+            names = {cookie.name for cookie in item.cookies.jar}
+            for cookie in list(self.session_cookies.jar):
+                if cookie.name in names:
+                    self.session_cookies.jar.clear(cookie.domain, cookie.path, cookie.name)
+            self.session_cookies.extract_cookies(item)
+        return response
+    
+    @property
+    def http(self):
+        return http_clients
+    
     def get_headers(self) -> Dict[str, str]:
         return {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
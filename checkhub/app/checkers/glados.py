@@ -1,5 +1,5 @@
-import httpx
 from .base import BaseChecker, CheckResult
+from app.utils.circuit_breaker import CircuitOpenError
 
 
 class GladosChecker(BaseChecker):
@@ -9,39 +9,36 @@ class GladosChecker(BaseChecker):
     
     async def _do_check_in(self) -> CheckResult:
         try:
-            headers = self.get_headers()
-            
-            if self.cookies:
-                headers["Cookie"] = self.cookies
+            response = await self.request(
+                "POST",
+                f"{self.BASE_URL}/api/user/checkin",
+                headers=self.get_headers(),
+                json={"token": "glados.one"}
+            )
             
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/api/user/checkin",
-                    headers=headers,
-                    json={"token": "glados.one"}
-                )
+            if response.status_code == 200:
+                data = response.json()
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    if data.get("code") == 0:
-                        message = data.get("message", "签到成功")
-                        return CheckResult(
-                            success=True,
-                            message=f"用户 {self.username}: {message}",
-                            data=data
-                        )
-                    else:
-                        return CheckResult(
-                            success=False,
-                            message=f"签到失败: {data.get('message', '未知错误')}"
-                        )
+                if data.get("code") == 0:
+                    message = data.get("message", "签到成功")
+                    return CheckResult(
+                        success=True,
+                        message=f"用户 {self.username}: {message}",
+                        data=data
+                    )
                 else:
                     return CheckResult(
                         success=False,
-                        message=f"请求失败: HTTP {response.status_code}"
+                        message=f"签到失败: {data.get('message', '未知错误')}"
                     )
-                    
+            else:
+                return CheckResult(
+                    success=False,
+                    message=f"请求失败: HTTP {response.status_code}"
+                )
+        
+        except CircuitOpenError:
+            raise
         except Exception as e:
             return CheckResult(
                 success=False,
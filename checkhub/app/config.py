@@ -1,6 +1,10 @@
 import os
+import tempfile
+import threading
 import toml
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Optional, Tuple
 
 BASE_DIR = Path(__file__).parent.parent
 CONFIG_DIR = BASE_DIR / "config"
@@ -15,67 +19,176 @@ SITES_CONFIG_PATH = CONFIG_DIR / "sites.toml"
 SETTINGS_CONFIG_PATH = CONFIG_DIR / "settings.toml"
 
 
-def load_sites_config():
-    if not SITES_CONFIG_PATH.exists():
-        default_config = {
-            "example": {
-                "name": "示例站点",
-                "enabled": True,
-                "checker_class": "ExampleChecker",
-                "accounts": [
-                    {
-                        "username": "user1",
-                        "password": "pass1",
-                        "enabled": True
-                    }
-                ]
-            }
-        }
-        with open(SITES_CONFIG_PATH, "w", encoding="utf-8") as f:
-            toml.dump(default_config, f)
-        return default_config
-    
-    with open(SITES_CONFIG_PATH, "r", encoding="utf-8") as f:
-        return toml.load(f)
+def freeze(value: Any) -> Any:
+    """把配置转换为只读结构：dict -> MappingProxyType，list -> tuple"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
 
 
-def save_sites_config(config):
-    with open(SITES_CONFIG_PATH, "w", encoding="utf-8") as f:
-        toml.dump(config, f)
+def thaw(value: Any) -> Any:
+    """把只读配置还原为可修改的 dict / list 副本"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
 
 
-def load_settings():
-    if not SETTINGS_CONFIG_PATH.exists():
-        default_settings = {
-            "admin": {
-                "username": "admin",
-                "password": "admin123"
-            },
-            "notifications": {
-                "telegram": {
-                    "enabled": False,
-                    "bot_token": "",
-                    "chat_id": ""
-                },
-                "dingtalk": {
-                    "enabled": False,
-                    "webhook": "",
-                    "secret": ""
+class ConfigStore:
+    """TOML 配置缓存
+    
+    首次访问时解析文件并缓存只读快照，之后仅在文件 mtime 或大小变化时重新解析。
+    """
+    
+    def __init__(self, path: Path, default_factory: Callable[[], Dict[str, Any]]):
+        self.path = path
+        self.default_factory = default_factory
+        self.version = 0
+        self._lock = threading.Lock()
+        self._state: Tuple[Optional[Tuple[int, int]], Any] = (None, None)
+    
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def get(self):
+        signature, snapshot = self._state
+        if signature is not None and signature == self._signature():
+            return snapshot
+        
+        with self._lock:
+            signature, snapshot = self._state
+            current = self._signature()
+            if current is not None and current == signature:
+                return snapshot
+            
+            if current is None:
+                data = self.default_factory()
+                self._write(data)
+            else:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = toml.load(f)
+            
+            snapshot = freeze(data)
+            self._state = (self._signature(), snapshot)
+            self.version += 1
+            return snapshot
+    
+    def _write(self, data: Dict[str, Any]):
+        """先写临时文件并 fsync，再原子替换目标文件"""
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f".{self.path.name}.",
+            suffix=".tmp",
+            dir=str(self.path.parent)
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                toml.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            mode = self.path.stat().st_mode & 0o777 if self.path.exists() else 0o644
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    
+    def save(self, data: Dict[str, Any]):
+        data = thaw(data)
+        with self._lock:
+            self._write(data)
+            self._state = (self._signature(), freeze(data))
+            self.version += 1
+    
+    def invalidate(self):
+        self._state = (None, None)
+
+
+def default_sites_config() -> Dict[str, Any]:
+    return {
+        "example": {
+            "name": "示例站点",
+            "enabled": True,
+            "checker_class": "ExampleChecker",
+            "accounts": [
+                {
+                    "username": "user1",
+                    "password": "pass1",
+                    "enabled": True
                 }
+            ]
+        }
+    }
+
+
+def default_settings() -> Dict[str, Any]:
+    return {
+        "admin": {
+            "username": "admin",
+            "password": "admin123"
+        },
+        "notifications": {
+            "telegram": {
+                "enabled": False,
+                "bot_token": "",
+                "chat_id": ""
             },
-            "scheduler": {
-                "enabled": True,
-                "check_time": "08:00"
+            "dingtalk": {
+                "enabled": False,
+                "webhook": "",
+                "secret": ""
             }
+        },
+        "scheduler": {
+            "enabled": True,
+            "check_time": "08:00"
+        },
+        "concurrency": {
+            "max_concurrency": 10,
+            "per_site": 5,
+            "per_host": 5
         }
-        with open(SETTINGS_CONFIG_PATH, "w", encoding="utf-8") as f:
-            toml.dump(default_settings, f)
-        return default_settings
-    
-    with open(SETTINGS_CONFIG_PATH, "r", encoding="utf-8") as f:
-        return toml.load(f)
+    }
+
+
+sites_store = ConfigStore(SITES_CONFIG_PATH, default_sites_config)
+settings_store = ConfigStore(SETTINGS_CONFIG_PATH, default_settings)
+
+
+def get_sites_config():
+    """返回站点配置的只读快照"""
+    return sites_store.get()
+
+
+def get_settings():
+    """返回系统设置的只读快照"""
+    return settings_store.get()
+
+
+def load_sites_config():
+    return thaw(sites_store.get())
+
+
+def save_sites_config(config):
+    sites_store.save(config)
+
+
+def load_settings():
+    return thaw(settings_store.get())
 
 
 def save_settings(settings):
-    with open(SETTINGS_CONFIG_PATH, "w", encoding="utf-8") as f:
-        toml.dump(settings, f)
+    settings_store.save(settings)
+
+
+def get_storage_path() -> Path:
+    """SQLite 数据库路径，由 [storage] path 指定（相对 data/ 目录）"""
+    path = get_settings().get("storage", {}).get("path")
+    return DATA_DIR / (path or "checkhub.db")
@@ -0,0 +1,130 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    checker_class TEXT NOT NULL DEFAULT 'BaseChecker',
+    config TEXT,
+    position INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site_id TEXT NOT NULL REFERENCES sites(id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    password TEXT NOT NULL DEFAULT '',
+    enabled INTEGER NOT NULL DEFAULT 1,
+    cookies TEXT,
+    extra_data TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_accounts_site ON accounts (site_id, id);
+CREATE INDEX IF NOT EXISTS idx_accounts_username ON accounts (site_id, username);
+
+CREATE TABLE IF NOT EXISTS check_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site_id TEXT NOT NULL,
+    username TEXT NOT NULL DEFAULT '',
+    success INTEGER NOT NULL,
+    message TEXT,
+    data TEXT,
+    duration_ms REAL,
+    created_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_results_time ON check_results (created_at);
+CREATE INDEX IF NOT EXISTS idx_results_site_time ON check_results (site_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_account_time ON check_results (site_id, username, created_at);
+
+CREATE TABLE IF NOT EXISTS notification_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_notification_jobs_due ON notification_jobs (status, channel, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_notification_jobs_order ON notification_jobs (status, channel, id);
+"""
+
+
+class Database:
+    """SQLite 连接封装（WAL 模式），跨线程共享一个连接并用锁串行化访问"""
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+    
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+    
+    def query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+    
+    def query_one(self, sql: str, params=()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+    
+    def data_version(self) -> int:
+        """其他连接提交后该值会变化，用于判断缓存是否过期"""
+        return self.query_one("PRAGMA data_version")[0]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_databases: Dict[str, Database] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path: Path) -> Database:
+    key = str(Path(path).resolve())
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = Database(Path(path))
+        return _databases[key]
+
+
+def dumps(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def loads(value: Optional[str]) -> Any:
+    if value is None:
+        return None
+    return json.loads(value)
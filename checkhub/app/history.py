@@ -0,0 +1,120 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.config import get_storage_path
+from app.db import Database, get_database, dumps, loads
+
+
+class HistoryStore:
+    """签到结果历史（只追加），按站点、账户、时间建立索引"""
+    
+    def __init__(self, db: Database):
+        self.db = db
+    
+    def append_many(self, site_id: str, records: Iterable[Tuple[str, Any, Optional[float]]]) -> int:
+        """records 为 (用户名, CheckResult, 耗时毫秒) 序列"""
+        rows = [
+            (
+                site_id,
+                username or "",
+                int(result.success),
+                result.message,
+                dumps(result.data) if result.data else None,
+                duration_ms,
+                result.timestamp.timestamp()
+            ) for username, result, duration_ms in records
+        ]
+        if not rows:
+            return 0
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO check_results "
+                "(site_id, username, success, message, data, duration_ms, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+    
+    def append(self, site_id: str, username: str, result, duration_ms: Optional[float] = None):
+        self.append_many(site_id, [(username, result, duration_ms)])
+    
+    @staticmethod
+    def _where(
+        site_id: Optional[str] = None,
+        username: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        success: Optional[bool] = None
+    ) -> Tuple[str, List[Any]]:
+        clauses = []
+        params: List[Any] = []
+        if site_id:
+            clauses.append("site_id = ?")
+            params.append(site_id)
+        if username:
+            clauses.append("username = ?")
+            params.append(username)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if success is not None:
+            clauses.append("success = ?")
+            params.append(int(success))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+    
+    def query(self, offset: int = 0, limit: int = 50, **filters) -> Tuple[List[Dict[str, Any]], int]:
+        where, params = self._where(**filters)
+        total = self.db.query_one(f"SELECT COUNT(*) FROM check_results {where}", params)[0]
+        rows = self.db.query(
+            f"SELECT * FROM check_results {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return [
+            {
+                "id": row["id"],
+                "site_id": row["site_id"],
+                "username": row["username"],
+                "success": bool(row["success"]),
+                "message": row["message"],
+                "data": loads(row["data"]),
+                "duration_ms": row["duration_ms"],
+                "timestamp": datetime.fromtimestamp(row["created_at"]).isoformat()
+            } for row in rows
+        ], total
+    
+    def daily_stats(self, **filters) -> List[Dict[str, Any]]:
+        """按天（本地时间）和站点统计成功率"""
+        where, params = self._where(**filters)
+        rows = self.db.query(
+            "SELECT date(created_at, 'unixepoch', 'localtime') AS day, site_id, "
+            "COUNT(*) AS total, SUM(success) AS success, AVG(duration_ms) AS avg_duration_ms "
+            f"FROM check_results {where} GROUP BY day, site_id ORDER BY day, site_id",
+            params
+        )
+        return [
+            {
+                "date": row["day"],
+                "site_id": row["site_id"],
+                "total": row["total"],
+                "success": row["success"],
+                "success_rate": round(row["success"] / row["total"], 4) if row["total"] else 0,
+                "avg_duration_ms": round(row["avg_duration_ms"], 1) if row["avg_duration_ms"] is not None else None
+            } for row in rows
+        ]
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """解析 Unix 时间戳或 ISO 8601 时间（如 2024-01-15 或 2024-01-15T08:00:00）"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def get_history_store() -> HistoryStore:
+    return HistoryStore(get_database(get_storage_path()))
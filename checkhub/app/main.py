@@ -1,7 +1,14 @@
+import asyncio
 from sanic import Sanic
 from app import create_app
 from app.utils.scheduler import CheckScheduler
-from app.utils.logger import get_main_logger
+from app.utils.logger import get_main_logger, site_loggers
+from app.utils.http import http_clients
+from app.utils.cookie_jar import cookie_vault
+from app.utils.circuit_breaker import circuit_breakers
+from app.notifiers.dispatcher import get_dispatcher
+from app.utils.log_pipeline import log_pipeline
+from app.config import get_settings
 
 app = create_app()
 scheduler = CheckScheduler()
@@ -11,13 +18,21 @@ logger = get_main_logger()
 @app.before_server_start
 async def setup_scheduler(app, loop):
     logger.info("正在启动 CheckHub...")
+    http_clients.configure(get_settings())
+    cookie_vault.configure(get_settings())
+    circuit_breakers.configure(get_settings())
     scheduler.start()
+    await get_dispatcher().start()
 
 
 @app.after_server_stop
 async def shutdown_scheduler(app, loop):
     logger.info("正在关闭 CheckHub...")
     scheduler.stop()
+    await get_dispatcher().stop()
+    await http_clients.aclose()
+    site_loggers.close_all()
+    await asyncio.to_thread(log_pipeline.flush)
 
 
 if __name__ == "__main__":
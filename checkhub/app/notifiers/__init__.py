@@ -1,4 +1,59 @@
+from typing import Any, Dict, List, Tuple
+from app.config import get_settings
+from app.utils.logger import get_main_logger
+from .base import BaseNotifier, DeliveryError
 from .telegram import TelegramNotifier
 from .dingtalk import DingTalkNotifier
+from .digest import CheckDigest
 
-__all__ = ["TelegramNotifier", "DingTalkNotifier"]
+NOTIFIER_REGISTRY = {
+    "telegram": TelegramNotifier,
+    "dingtalk": DingTalkNotifier,
+}
+
+
+def notifier_configs(settings: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """读取 [[notifications.channels]] 列表；没有该列表时兼容旧的 [notifications.telegram] 等配置"""
+    notifications = settings.get("notifications", {})
+    channels = notifications.get("channels")
+    if channels is not None:
+        return [dict(channel) for channel in channels]
+    return [
+        dict(notifications[channel_type], type=channel_type)
+        for channel_type in NOTIFIER_REGISTRY
+        if channel_type in notifications
+    ]
+
+
+def build_notifiers(settings: Dict[str, Any]) -> Dict[str, BaseNotifier]:
+    """按配置构造所有已启用的通知渠道，以渠道名称为键"""
+    notifiers = {}
+    for config in notifier_configs(settings):
+        notifier_class = NOTIFIER_REGISTRY.get(config.get("type", ""))
+        if notifier_class is None:
+            get_main_logger().warning(f"未知的通知渠道类型: {config.get('type')}")
+            continue
+        notifier = notifier_class(config)
+        if notifier.enabled:
+            notifiers[notifier.name] = notifier
+    return notifiers
+
+
+_notifiers: Tuple[Any, Dict[str, BaseNotifier]] = (None, {})
+
+
+def get_notifiers() -> Dict[str, BaseNotifier]:
+    """返回长期复用的通知渠道实例；只有 settings 变化后才重新构造"""
+    global _notifiers
+    settings = get_settings()
+    cached_settings, notifiers = _notifiers
+    if cached_settings is not settings:
+        notifiers = build_notifiers(settings)
+        _notifiers = (settings, notifiers)
+    return notifiers
+
+
+__all__ = [
+    "BaseNotifier", "DeliveryError", "TelegramNotifier", "DingTalkNotifier", "CheckDigest",
+    "NOTIFIER_REGISTRY", "build_notifiers", "get_notifiers"
+]
@@ -0,0 +1,54 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+from app.notifiers.digest import CheckDigest
+
+
+class DeliveryError(Exception):
+    """通知发送失败
+    
+    retry_after: 上游要求的等待秒数（Telegram 429 / 钉钉限流）
+    permanent: 为 True 时重试也不会成功（如配置错误），不再重试
+    """
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None, permanent: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.permanent = permanent
+
+
+def parse_retry_after(value) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class BaseNotifier(ABC):
+    """通知渠道基类：由一段配置构造，enabled 决定是否发送，子类只需实现 deliver() 和 digest_chunks()
+    
+    发送失败通过 DeliveryError 告知 NotificationDispatcher 是否重试、何时重试，
+    与 checkinhub 返回 bool 的 send() 接口不同"""
+    
+    # 渠道类型，与 NOTIFIER_REGISTRY 的键一致，用于按类型查找默认发送速率
+    channel_type: str = ""
+    
+    # 单次发送的超时（秒），可在渠道配置中用 timeout 覆盖
+    timeout: float = 10.0
+    
+    def __init__(self, config: Dict[str, Any], name: Optional[str] = None):
+        self.config = config
+        self.name = name or config.get("name") or config.get("type", self.__class__.__name__)
+        self.enabled = config.get("enabled", False)
+        self.timeout = float(config.get("timeout", self.timeout))
+        # 每分钟最多发送条数，未配置时按渠道类型取默认值
+        self.rate_per_minute: Optional[int] = config.get("rate_per_minute")
+    
+    @abstractmethod
+    async def deliver(self, message: str):
+        """发送一条消息，失败时抛出 DeliveryError"""
+    
+    @abstractmethod
+    def digest_chunks(self, digest: CheckDigest) -> List[str]:
+        """按本渠道的长度上限渲染并切分汇总"""
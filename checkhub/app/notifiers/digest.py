@@ -0,0 +1,88 @@
+from typing import Callable, List, Tuple
+
+
+def split_message(text: str, limit: int, measure: Callable[[str], int] = len) -> List[str]:
+    """按行把消息切分为不超过 limit 的若干段；measure 为长度计算方式（字符数或字节数）"""
+    if measure(text) <= limit:
+        return [text]
+    
+    chunks = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        if measure(current + line) <= limit:
+            current += line
+            continue
+        if current:
+            chunks.append(current)
+            current = ""
+        # 单行超长时按字符硬切
+        while measure(line) > limit:
+            low, high = 1, len(line)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if measure(line[:middle]) <= limit:
+                    low = middle
+                else:
+                    high = middle - 1
+            chunks.append(line[:low])
+            line = line[low:]
+        current = line
+    if current:
+        chunks.append(current)
+    chunks = [chunk.rstrip("\n") for chunk in chunks]
+    # 分段边界上只剩空行的分段不单独发送
+    return [chunk for chunk in chunks if chunk]
+
+
+def utf8_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+class CheckDigest:
+    """一次运行的签到结果汇总，所有站点合成一条通知（超长时按渠道限制分段）"""
+    
+    def __init__(self, title: str = "签到报告"):
+        self.title = title
+        self.sites: List[Tuple[str, list]] = []
+    
+    def add(self, site_name: str, results: list):
+        if results:
+            self.sites.append((site_name, results))
+    
+    def __bool__(self) -> bool:
+        return bool(self.sites)
+    
+    @property
+    def success_count(self) -> int:
+        return sum(1 for _, results in self.sites for r in results if r.success)
+    
+    @property
+    def total_count(self) -> int:
+        return sum(len(results) for _, results in self.sites)
+    
+    def render(self, bold: Callable[[str], str] = str, escape: Callable[[str], str] = str) -> Tuple[str, str]:
+        """返回 (标题, 正文)，标题在分段时会重复出现在每一段开头"""
+        if len(self.sites) == 1:
+            header = f"📋 {self.title} - {escape(self.sites[0][0])}"
+        else:
+            header = f"📋 {self.title}（{len(self.sites)} 个站点）"
+        
+        lines = [f"成功: {self.success_count}/{self.total_count}"]
+        for site_name, results in self.sites:
+            if len(self.sites) > 1:
+                success = sum(1 for r in results if r.success)
+                lines.append("")
+                lines.append(bold(f"【{escape(site_name)}】 {success}/{len(results)}"))
+            for result in results:
+                status = "✅" if result.success else "❌"
+                lines.append(f"{status} {escape(result.message)}")
+        return bold(header), "\n".join(lines)
+    
+    def chunks(self, limit: int, measure: Callable[[str], int] = len, **render_options) -> List[str]:
+        header, body = self.render(**render_options)
+        # 预留分段编号 "(10/10)" 与换行的空间
+        reserved = measure(header) + measure(" (00/00)\n\n")
+        parts = split_message(body, limit - reserved, measure)
+        if len(parts) == 1:
+            return [f"{header}\n\n{parts[0]}"]
+        return [f"{header} ({i}/{len(parts)})\n\n{part}" for i, part in enumerate(parts, 1)]
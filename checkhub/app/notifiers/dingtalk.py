@@ -1,62 +1,78 @@
-import httpx
 import hmac
 import hashlib
 import base64
 import time
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import quote_plus
+from app.notifiers.base import BaseNotifier, DeliveryError
+from app.notifiers.digest import CheckDigest, utf8_len
+from app.utils.http import http_clients
 
 
-class DingTalkNotifier:
-    def __init__(self, webhook: str, secret: str = ""):
-        self.webhook = webhook
-        self.secret = secret
+# 钉钉机器人每分钟最多 20 条，超过后返回 130101
+RATE_LIMITED_ERRCODE = 130101
+
+
+class DingTalkNotifier(BaseNotifier):
+    channel_type = "dingtalk"
+    
+    # text 消息内容上限约 20000 字节
+    MAX_BYTES = 20000
+    
+    def __init__(self, config: Dict[str, Any], name: Optional[str] = None):
+        super().__init__(config, name)
+        self.webhook = config.get("webhook", "")
+        self.secret = config.get("secret", "")
+        # 密钥只编码一次；HMAC 对象预先载入密钥，签名时 copy() 即可
+        self._hmac = hmac.new(self.secret.encode('utf-8'), digestmod=hashlib.sha256) if self.secret else None
+        self._signed: Tuple[int, str] = (0, self.webhook)
     
     def _sign(self, timestamp: str) -> str:
-        if not self.secret:
+        if not self._hmac:
             return ""
         
-        secret_enc = self.secret.encode('utf-8')
-        string_to_sign = f'{timestamp}\n{self.secret}'
-        string_to_sign_enc = string_to_sign.encode('utf-8')
-        hmac_code = hmac.new(secret_enc, string_to_sign_enc, digestmod=hashlib.sha256).digest()
-        sign = quote_plus(base64.b64encode(hmac_code))
-        return sign
+        hmac_code = self._hmac.copy()
+        hmac_code.update(f'{timestamp}\n{self.secret}'.encode('utf-8'))
+        return quote_plus(base64.b64encode(hmac_code.digest()))
     
-    async def send_message(self, message: str) -> bool:
-        if not self.webhook:
-            return False
+    def signed_url(self) -> str:
+        """带签名的 Webhook 地址；同一毫秒内复用上一次的签名"""
+        if not self._hmac:
+            return self.webhook
         
-        try:
-            timestamp = str(round(time.time() * 1000))
-            sign = self._sign(timestamp)
-            
-            url = self.webhook
-            if sign:
-                url = f"{url}&timestamp={timestamp}&sign={sign}"
-            
-            data = {
-                "msgtype": "text",
-                "text": {
-                    "content": message
-                }
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=data, timeout=10)
-                return response.status_code == 200
-        except Exception as e:
-            print(f"钉钉通知发送失败: {e}")
-            return False
+        timestamp = round(time.time() * 1000)
+        cached_timestamp, url = self._signed
+        if cached_timestamp == timestamp:
+            return url
+        url = f"{self.webhook}&timestamp={timestamp}&sign={self._sign(str(timestamp))}"
+        self._signed = (timestamp, url)
+        return url
     
-    async def send_check_result(self, site_name: str, results: list):
-        success_count = sum(1 for r in results if r.success)
-        total_count = len(results)
+    async def deliver(self, message: str):
+        """发送一条消息，失败时抛出 DeliveryError（限流时 retry_after 为 60 秒）"""
+        if not self.webhook:
+            raise DeliveryError("钉钉 Webhook 未配置", permanent=True)
         
-        message = f"📋 签到报告 - {site_name}\n\n"
-        message += f"成功: {success_count}/{total_count}\n\n"
+        data = {
+            "msgtype": "text",
+            "text": {
+                "content": message
+            }
+        }
         
-        for result in results:
-            status = "✅" if result.success else "❌"
-            message += f"{status} {result.message}\n"
+        response = await http_clients.post(self.signed_url(), json=data, timeout=self.timeout)
+        if response.status_code != 200:
+            raise DeliveryError(f"HTTP {response.status_code}", permanent=400 <= response.status_code < 500)
         
-        await self.send_message(message)
+        try:
+            result = response.json()
+        except ValueError:
+            return
+        errcode = result.get("errcode", 0)
+        if errcode == RATE_LIMITED_ERRCODE:
+            raise DeliveryError(result.get("errmsg", "发送过于频繁"), retry_after=60)
+        if errcode:
+            raise DeliveryError(f"{errcode}: {result.get('errmsg', '')}", permanent=True)
+    
+    def digest_chunks(self, digest: CheckDigest) -> List[str]:
+        return digest.chunks(self.MAX_BYTES, utf8_len)
@@ -0,0 +1,294 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.config import get_settings, get_storage_path
+from app.db import Database, get_database
+from app.notifiers import get_notifiers
+from app.notifiers.base import DeliveryError
+from app.utils.logger import get_main_logger
+from app.utils.timing import span
+
+
+# 各渠道类型的默认发送速率：(次数, 秒)；钉钉机器人限制为 20 条/分钟
+DEFAULT_CHANNEL_RATES: Dict[str, Tuple[int, float]] = {
+    "telegram": (20, 60.0),
+    "dingtalk": (20, 60.0)
+}
+# 未知渠道类型的发送速率
+FALLBACK_CHANNEL_RATE = (20, 60.0)
+# 放弃发送（failed）或渠道已停用（dropped）的任务保留 7 天供排查，之后清理
+FINISHED_RETENTION = 7 * 86400
+# 读写任务表出错时，渠道任务等待后重试，等待时间翻倍直到上限
+ERROR_BACKOFF = 1.0
+MAX_ERROR_BACKOFF = 60.0
+
+
+class SlidingWindowLimiter:
+    """滑动窗口限速：任意 period 秒内最多 max_calls 次"""
+    
+    def __init__(self, max_calls: int, period: float):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls: deque = deque()
+    
+    def delay(self) -> float:
+        """距离下一次允许发送还需等待的秒数"""
+        now = time.monotonic()
+        while self._calls and now - self._calls[0] >= self.period:
+            self._calls.popleft()
+        if len(self._calls) < self.max_calls:
+            return 0.0
+        return self.period - (now - self._calls[0])
+    
+    def record(self):
+        self._calls.append(time.monotonic())
+
+
+class NotificationDispatcher:
+    """后台通知队列
+    
+    submit() 在线程中把消息写入 notification_jobs 表后立即返回，不阻塞事件循环；
+    每个渠道一个后台任务严格按提交顺序投递：队首任务重试等待期间，后面的任务不会越过它。
+    各渠道之间并发、互不阻塞，单次投递受渠道 timeout 限制；
+    遵守渠道速率限制，失败后按指数退避（或上游给出的 retry_after）重试。
+    未送达的任务保存在数据库中，重启后继续投递。
+    """
+    
+    def __init__(
+        self,
+        db: Database,
+        notifier_factory: Callable[[], Dict[str, Any]] = get_notifiers,
+        channel_rates: Optional[Dict[str, Tuple[int, float]]] = None,
+        max_attempts: int = 6,
+        base_delay: float = 2.0,
+        max_delay: float = 600.0
+    ):
+        self.db = db
+        self.notifier_factory = notifier_factory
+        # 按渠道名称覆盖的发送速率；未覆盖的渠道取渠道配置的 rate_per_minute，再按类型取默认值
+        self.channel_rates = dict(channel_rates or {})
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.logger = get_main_logger()
+        self._limiters: Dict[str, SlidingWindowLimiter] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._running = False
+    
+    @classmethod
+    def from_settings(cls, db: Database, settings: Dict[str, Any]) -> "NotificationDispatcher":
+        config = settings.get("notifications", {}).get("dispatch", {})
+        rates = {}
+        for channel, per_minute in config.get("rate_per_minute", {}).items():
+            rates[channel] = (int(per_minute), 60.0)
+        return cls(
+            db,
+            channel_rates=rates,
+            max_attempts=config.get("max_attempts", 6),
+            base_delay=config.get("base_delay", 2.0),
+            max_delay=config.get("max_delay", 600.0)
+        )
+    
+    def _channel_rate(self, channel: str) -> Tuple[int, float]:
+        if channel in self.channel_rates:
+            return self.channel_rates[channel]
+        notifier = self.notifier_factory().get(channel)
+        per_minute = getattr(notifier, "rate_per_minute", None)
+        if per_minute:
+            return int(per_minute), 60.0
+        return DEFAULT_CHANNEL_RATES.get(getattr(notifier, "channel_type", ""), FALLBACK_CHANNEL_RATE)
+    
+    def _limiter(self, channel: str) -> SlidingWindowLimiter:
+        if channel not in self._limiters:
+            self._limiters[channel] = SlidingWindowLimiter(*self._channel_rate(channel))
+        return self._limiters[channel]
+    
+    async def submit(self, channel: str, messages: List[str]) -> int:
+        """入队一组消息（同一渠道按提交顺序投递），返回入队条数；须在事件循环中调用"""
+        count = await asyncio.to_thread(self._enqueue, channel, messages)
+        self._wake(channel)
+        return count
+    
+    def _enqueue(self, channel: str, messages: List[str]) -> int:
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO notification_jobs (channel, message, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(channel, message, now, now) for message in messages]
+            )
+        return len(messages)
+    
+    def _wake(self, channel: str):
+        if channel in self._workers:
+            self._wakeups[channel].set()
+        elif self._running:
+            self._spawn(channel)
+    
+    def _spawn(self, channel: str):
+        self._wakeups[channel] = asyncio.Event()
+        self._workers[channel] = asyncio.create_task(self._worker(channel))
+    
+    async def start(self):
+        """启动后台投递，并接管上次未送达的任务"""
+        if self._running:
+            return
+        self._running = True
+        await asyncio.to_thread(self._prune)
+        rows = await asyncio.to_thread(
+            self.db.query,
+            "SELECT DISTINCT channel FROM notification_jobs WHERE status = 'pending'"
+        )
+        for row in rows:
+            if row["channel"] not in self._workers:
+                self._spawn(row["channel"])
+    
+    def _next_job(self, channel: str):
+        """渠道中最早提交的待发送任务；未到重试时间时由调用方等待，而不是先发后面的任务"""
+        return self.db.query_one(
+            "SELECT * FROM notification_jobs WHERE status = 'pending' AND channel = ? "
+            "ORDER BY id LIMIT 1",
+            (channel,)
+        )
+    
+    async def _sleep(self, channel: str, seconds: float):
+        try:
+            await asyncio.wait_for(self._wakeups[channel].wait(), timeout=max(seconds, 0.0))
+        except asyncio.TimeoutError:
+            pass
+    
+    async def _worker(self, channel: str):
+        backoff = ERROR_BACKOFF
+        while True:
+            try:
+                await self._step(channel)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 数据库等出错时不能让渠道任务退出，否则该渠道之后的通知都不会再发送
+                self.logger.error(f"{channel} 通知队列处理出错，{backoff:.0f} 秒后重试: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, MAX_ERROR_BACKOFF)
+            else:
+                backoff = ERROR_BACKOFF
+    
+    async def _step(self, channel: str):
+        # 先清除唤醒信号再查询：查询期间 submit() 发出的信号会保留到 _sleep()，不会丢失
+        self._wakeups[channel].clear()
+        job = await asyncio.to_thread(self._next_job, channel)
+        if job is None:
+            await self._sleep(channel, 3600)
+            return
+        
+        wait = job["next_attempt_at"] - time.time()
+        if wait > 0:
+            await self._sleep(channel, wait)
+            return
+        
+        limiter = self._limiter(channel)
+        wait = limiter.delay()
+        if wait > 0:
+            await asyncio.sleep(wait)
+            return
+        
+        limiter.record()
+        await self._deliver(channel, job)
+    
+    async def _deliver(self, channel: str, job):
+        notifier = self.notifier_factory().get(channel)
+        if notifier is None:
+            await asyncio.to_thread(self._finish, job["id"], "dropped", "渠道未启用")
+            return
+        
+        try:
+            with span(channel, "notify"):
+                await asyncio.wait_for(notifier.deliver(job["message"]), notifier.timeout)
+        except Exception as e:
+            await self._retry(channel, job, e)
+            return
+        await asyncio.to_thread(self.db.execute, "DELETE FROM notification_jobs WHERE id = ?", (job["id"],))
+    
+    async def _retry(self, channel: str, job, error: Exception):
+        attempts = job["attempts"] + 1
+        retry_after = getattr(error, "retry_after", None)
+        permanent = isinstance(error, DeliveryError) and error.permanent
+        
+        if permanent or attempts >= self.max_attempts:
+            self.logger.error(f"{channel} 通知发送失败（已放弃，共 {attempts} 次）: {error}")
+            await asyncio.to_thread(self._finish, job["id"], "failed", str(error), attempts)
+            return
+        
+        delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+        delay = delay * random.uniform(0.8, 1.2)
+        if retry_after:
+            delay = max(delay, retry_after)
+        self.logger.warning(f"{channel} 通知发送失败，{delay:.1f} 秒后第 {attempts + 1} 次重试: {error}")
+        await asyncio.to_thread(
+            self.db.execute,
+            "UPDATE notification_jobs SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (attempts, time.time() + delay, str(error), job["id"])
+        )
+    
+    def _finish(self, job_id: int, status: str, error: str, attempts: Optional[int] = None):
+        self.db.execute(
+            "UPDATE notification_jobs SET status = ?, last_error = ?, attempts = COALESCE(?, attempts) WHERE id = ?",
+            (status, error, attempts, job_id)
+        )
+        self._prune()
+    
+    def _prune(self, retention: float = FINISHED_RETENTION) -> int:
+        """删除超过保留期的 failed / dropped 任务（发送成功的任务在发送后立即删除）"""
+        cursor = self.db.execute(
+            "DELETE FROM notification_jobs WHERE status IN ('failed', 'dropped') AND created_at < ?",
+            (time.time() - retention,)
+        )
+        return cursor.rowcount
+    
+    def pending_count(self) -> int:
+        return self.db.query_one("SELECT COUNT(*) FROM notification_jobs WHERE status = 'pending'")[0]
+    
+    async def drain(self, timeout: float = 60.0) -> bool:
+        """等待 timeout 秒内到期的任务全部处理完（用于命令行退出前），返回是否在超时前完成"""
+        deadline = time.time() + timeout
+        while True:
+            row = await asyncio.to_thread(
+                self.db.query_one,
+                "SELECT COUNT(*) FROM notification_jobs WHERE status = 'pending' AND next_attempt_at <= ?",
+                (deadline,)
+            )
+            if not row[0]:
+                return True
+            if time.time() >= deadline:
+                return False
+            await asyncio.sleep(0.2)
+    
+    async def stop(self):
+        self._running = False
+        workers = list(self._workers.values())
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+        self._wakeups.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        rows = self.db.query(
+            "SELECT channel, status, COUNT(*) AS count FROM notification_jobs GROUP BY channel, status"
+        )
+        return {
+            "workers": sorted(self._workers),
+            "jobs": [dict(row) for row in rows]
+        }
+
+
+_dispatcher: Optional[NotificationDispatcher] = None
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = NotificationDispatcher.from_settings(get_database(get_storage_path()), get_settings())
+    return _dispatcher
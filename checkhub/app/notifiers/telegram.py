@@ -1,42 +1,60 @@
-import httpx
-from typing import Optional
+import html
+from typing import Any, Dict, List, Optional
+from app.notifiers.base import BaseNotifier, DeliveryError, parse_retry_after
+from app.notifiers.digest import CheckDigest
+from app.utils.http import http_clients
 
 
-class TelegramNotifier:
-    def __init__(self, bot_token: str, chat_id: str):
-        self.bot_token = bot_token
-        self.chat_id = chat_id
-        self.api_url = f"https://api.telegram.org/bot{bot_token}"
+class TelegramNotifier(BaseNotifier):
+    channel_type = "telegram"
     
-    async def send_message(self, message: str) -> bool:
+    # sendMessage 文本上限 4096 个字符
+    MAX_LENGTH = 4096
+    API_BASE = "https://api.telegram.org"
+    
+    def __init__(self, config: Dict[str, Any], name: Optional[str] = None):
+        super().__init__(config, name)
+        self.bot_token = config.get("bot_token", "")
+        self.chat_id = config.get("chat_id", "")
+        # api_base 可指向自建的 Bot API 服务或反向代理
+        api_base = config.get("api_base", self.API_BASE).rstrip("/")
+        self.api_url = f"{api_base}/bot{self.bot_token}"
+        self.send_url = f"{self.api_url}/sendMessage"
+    
+    async def deliver(self, message: str):
+        """发送一条消息，失败时抛出 DeliveryError（429 附带 retry_after）"""
         if not self.bot_token or not self.chat_id:
-            return False
+            raise DeliveryError("Telegram 配置不完整", permanent=True)
+        
+        response = await http_clients.post(
+            self.send_url,
+            json={
+                "chat_id": self.chat_id,
+                "text": message,
+                "parse_mode": "HTML"
+            },
+            timeout=self.timeout
+        )
+        if response.status_code == 200:
+            return
         
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        description = f"HTTP {response.status_code}"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/sendMessage",
-                    json={
-                        "chat_id": self.chat_id,
-                        "text": message,
-                        "parse_mode": "HTML"
-                    },
-                    timeout=10
-                )
-                return response.status_code == 200
-        except Exception as e:
-            print(f"Telegram通知发送失败: {e}")
-            return False
+            data = response.json()
+            description = data.get("description", description)
+            retry_after = parse_retry_after(data.get("parameters", {}).get("retry_after")) or retry_after
+        except ValueError:
+            pass
+        raise DeliveryError(
+            description,
+            retry_after=retry_after,
+            permanent=400 <= response.status_code < 500 and response.status_code != 429
+        )
     
-    async def send_check_result(self, site_name: str, results: list):
-        success_count = sum(1 for r in results if r.success)
-        total_count = len(results)
-        
-        message = f"<b>📋 签到报告 - {site_name}</b>\n\n"
-        message += f"成功: {success_count}/{total_count}\n\n"
-        
-        for result in results:
-            status = "✅" if result.success else "❌"
-            message += f"{status} {result.message}\n"
-        
-        await self.send_message(message)
+    def digest_chunks(self, digest: CheckDigest) -> List[str]:
+        return digest.chunks(
+            self.MAX_LENGTH,
+            bold=lambda text: f"<b>{text}</b>",
+            escape=html.escape
+        )
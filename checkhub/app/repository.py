@@ -0,0 +1,369 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.config import ConfigStore, sites_store, get_settings, get_storage_path, freeze, thaw
+from app.db import Database, get_database, dumps, loads
+from app.utils.logger import get_main_logger
+
+# SQLite 存储支持的站点与账户字段，导入时其余字段会被丢弃
+SITE_FIELDS = ("name", "enabled", "checker_class", "config", "accounts")
+ACCOUNT_FIELDS = ("username", "password", "enabled", "cookies", "extra_data")
+
+
+class SitesRepository:
+    """站点配置仓库
+    
+    所有修改通过 asyncio 锁串行化，作用于内存中的工作副本；
+    短时间内的多次修改合并为一次原子写盘，调用方等待落盘完成后返回。
+    """
+    
+    def __init__(self, store: ConfigStore, flush_delay: float = 0.05):
+        self.store = store
+        self.flush_delay = flush_delay
+        self._lock = asyncio.Lock()
+        self._working: Optional[Dict[str, Any]] = None
+        self._base_version = -1
+        self._dirty = False
+        self._flush_future: Optional[asyncio.Future] = None
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    def get_all(self):
+        return self.store.get()
+    
+    def get_site(self, site_id: str):
+        return self.store.get().get(site_id)
+    
+    def enabled_sites(self) -> Dict[str, Any]:
+        return {
+            site_id: site_data for site_id, site_data in self.get_all().items()
+            if site_data.get("enabled", True)
+        }
+    
+    def site_summaries(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": site_id,
+                "name": site_data.get("name", site_id),
+                "enabled": site_data.get("enabled", True),
+                "checker_class": site_data.get("checker_class", "BaseChecker"),
+                "account_count": len(site_data.get("accounts", []))
+            } for site_id, site_data in self.get_all().items()
+        ]
+    
+    def list_accounts(self, site_id: str, offset: int = 0, limit: int = 50) -> Optional[Tuple[List[Any], int]]:
+        site = self.get_site(site_id)
+        if site is None:
+            return None
+        accounts = site.get("accounts", ())
+        return list(accounts[offset:offset + limit]), len(accounts)
+    
+    def _working_copy(self) -> Dict[str, Any]:
+        snapshot = self.store.get()
+        if self._working is None or (not self._dirty and self.store.version != self._base_version):
+            self._working = thaw(snapshot)
+            self._base_version = self.store.version
+        return self._working
+    
+    async def _mutate(self, func: Callable[[Dict[str, Any]], Tuple[Any, bool]]):
+        async with self._lock:
+            result, changed = func(self._working_copy())
+            future = None
+            if changed:
+                self._dirty = True
+                future = self._schedule_flush()
+        
+        if future is not None:
+            await asyncio.shield(future)
+        return result
+    
+    def _schedule_flush(self) -> asyncio.Future:
+        if self._flush_future is None:
+            self._flush_future = asyncio.get_running_loop().create_future()
+            self._flush_task = asyncio.create_task(self._flush_later(self._flush_future))
+        return self._flush_future
+    
+    async def _flush_later(self, future: asyncio.Future):
+        await asyncio.sleep(self.flush_delay)
+        async with self._lock:
+            self._flush_future = None
+            try:
+                await asyncio.to_thread(self.store.save, self._working)
+                self._dirty = False
+                self._base_version = self.store.version
+                future.set_result(None)
+            except Exception as e:
+                # 丢弃未能落盘的修改，下次修改从磁盘上的配置重新开始
+                self._working = None
+                self._dirty = False
+                future.set_exception(e)
+    
+    async def flush(self):
+        future = self._flush_future
+        if future is not None:
+            await asyncio.shield(future)
+    
+    async def add_site(self, site_id: str, name: str, checker_class: str = "BaseChecker") -> bool:
+        def apply(config):
+            if site_id in config:
+                return False, False
+            config[site_id] = {
+                "name": name,
+                "enabled": True,
+                "checker_class": checker_class,
+                "accounts": []
+            }
+            return True, True
+        
+        return await self._mutate(apply)
+    
+    async def delete_site(self, site_id: str) -> bool:
+        def apply(config):
+            if site_id not in config:
+                return False, False
+            del config[site_id]
+            return True, True
+        
+        return await self._mutate(apply)
+    
+    async def toggle_site(self, site_id: str) -> Optional[bool]:
+        def apply(config):
+            if site_id not in config:
+                return None, False
+            enabled = not config[site_id].get("enabled", True)
+            config[site_id]["enabled"] = enabled
+            return enabled, True
+        
+        return await self._mutate(apply)
+    
+    async def add_account(self, site_id: str, account: Dict[str, Any]) -> bool:
+        def apply(config):
+            if site_id not in config:
+                return False, False
+            config[site_id].setdefault("accounts", []).append(dict(account))
+            return True, True
+        
+        return await self._mutate(apply)
+
+
+class SqliteSitesRepository:
+    """基于 SQLite 的站点配置仓库，接口与 SitesRepository 相同
+    
+    站点与账户分表存储并建立索引，账户可分页查询，不必整体加载。
+    """
+    
+    def __init__(self, db: Database):
+        self.db = db
+        self._lock = asyncio.Lock()
+        self._version = 0
+        self._cache: Tuple[Optional[Tuple[int, int]], Any] = (None, None)
+    
+    def _cache_key(self) -> Tuple[int, int]:
+        return (self.db.data_version(), self._version)
+    
+    @staticmethod
+    def _account_from_row(row) -> Dict[str, Any]:
+        account = {
+            "username": row["username"],
+            "password": row["password"],
+            "enabled": bool(row["enabled"])
+        }
+        if row["cookies"] is not None:
+            account["cookies"] = row["cookies"]
+        if row["extra_data"] is not None:
+            account["extra_data"] = loads(row["extra_data"])
+        return account
+    
+    def _load_sites(self, where: str = "", params: Tuple[Any, ...] = ()) -> Dict[str, Any]:
+        """读取满足 where 条件的站点及其账户；where 作用于 sites 表"""
+        config: Dict[str, Any] = {}
+        for row in self.db.query(f"SELECT * FROM sites {where} ORDER BY position, id", params):
+            site = {
+                "name": row["name"],
+                "enabled": bool(row["enabled"]),
+                "checker_class": row["checker_class"],
+                "accounts": []
+            }
+            if row["config"] is not None:
+                site["config"] = loads(row["config"])
+            config[row["id"]] = site
+        
+        if not config:
+            return config
+        rows = self.db.query(
+            f"SELECT * FROM accounts WHERE site_id IN (SELECT id FROM sites {where}) ORDER BY site_id, id",
+            params
+        )
+        for row in rows:
+            if row["site_id"] in config:
+                config[row["site_id"]]["accounts"].append(self._account_from_row(row))
+        return config
+    
+    def get_all(self):
+        key, snapshot = self._cache
+        current = self._cache_key()
+        if key == current:
+            return snapshot
+        
+        snapshot = freeze(self._load_sites())
+        self._cache = (current, snapshot)
+        return snapshot
+    
+    def get_site(self, site_id: str):
+        return freeze(self._load_sites("WHERE id = ?", (site_id,))).get(site_id)
+    
+    def enabled_sites(self) -> Dict[str, Any]:
+        """已启用的站点及其账户，不加载停用站点的账户"""
+        return freeze(self._load_sites("WHERE enabled = 1"))
+    
+    def site_summaries(self) -> List[Dict[str, Any]]:
+        rows = self.db.query(
+            "SELECT s.id, s.name, s.enabled, s.checker_class, "
+            "(SELECT COUNT(*) FROM accounts a WHERE a.site_id = s.id) AS account_count "
+            "FROM sites s ORDER BY s.position, s.id"
+        )
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "enabled": bool(row["enabled"]),
+                "checker_class": row["checker_class"],
+                "account_count": row["account_count"]
+            } for row in rows
+        ]
+    
+    def list_accounts(self, site_id: str, offset: int = 0, limit: int = 50) -> Optional[Tuple[List[Any], int]]:
+        if self.db.query_one("SELECT 1 FROM sites WHERE id = ?", (site_id,)) is None:
+            return None
+        total = self.db.query_one("SELECT COUNT(*) FROM accounts WHERE site_id = ?", (site_id,))[0]
+        rows = self.db.query(
+            "SELECT * FROM accounts WHERE site_id = ? ORDER BY id LIMIT ? OFFSET ?",
+            (site_id, limit, offset)
+        )
+        return [self._account_from_row(row) for row in rows], total
+    
+    async def _write(self, func: Callable[[Any], Any]):
+        def run():
+            with self.db.transaction() as conn:
+                return func(conn)
+        
+        async with self._lock:
+            result = await asyncio.to_thread(run)
+            self._version += 1
+            return result
+    
+    async def flush(self):
+        return None
+    
+    async def add_site(self, site_id: str, name: str, checker_class: str = "BaseChecker") -> bool:
+        def apply(conn):
+            if conn.execute("SELECT 1 FROM sites WHERE id = ?", (site_id,)).fetchone():
+                return False
+            position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM sites").fetchone()[0]
+            conn.execute(
+                "INSERT INTO sites (id, name, enabled, checker_class, position) VALUES (?, ?, 1, ?, ?)",
+                (site_id, name, checker_class, position)
+            )
+            return True
+        
+        return await self._write(apply)
+    
+    async def delete_site(self, site_id: str) -> bool:
+        def apply(conn):
+            return conn.execute("DELETE FROM sites WHERE id = ?", (site_id,)).rowcount > 0
+        
+        return await self._write(apply)
+    
+    async def toggle_site(self, site_id: str) -> Optional[bool]:
+        def apply(conn):
+            row = conn.execute("SELECT enabled FROM sites WHERE id = ?", (site_id,)).fetchone()
+            if row is None:
+                return None
+            enabled = not row["enabled"]
+            conn.execute("UPDATE sites SET enabled = ? WHERE id = ?", (int(enabled), site_id))
+            return enabled
+        
+        return await self._write(apply)
+    
+    async def add_account(self, site_id: str, account: Dict[str, Any]) -> bool:
+        def apply(conn):
+            if conn.execute("SELECT 1 FROM sites WHERE id = ?", (site_id,)).fetchone() is None:
+                return False
+            self._insert_account(conn, site_id, account)
+            return True
+        
+        return await self._write(apply)
+    
+    @staticmethod
+    def _insert_account(conn, site_id: str, account: Dict[str, Any]):
+        conn.execute(
+            "INSERT INTO accounts (site_id, username, password, enabled, cookies, extra_data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                site_id,
+                account.get("username", ""),
+                account.get("password", ""),
+                int(account.get("enabled", True)),
+                account.get("cookies"),
+                dumps(account.get("extra_data"))
+            )
+        )
+    
+    def import_config(self, config: Dict[str, Any], replace: bool = True) -> int:
+        """从 TOML 结构导入站点与账户，返回导入的账户数"""
+        config = thaw(config)
+        count = 0
+        with self.db.transaction() as conn:
+            if replace:
+                conn.execute("DELETE FROM accounts")
+                conn.execute("DELETE FROM sites")
+            position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM sites").fetchone()[0]
+            for site_id, site_data in config.items():
+                warn_dropped_fields(f"站点 {site_id}", site_data, SITE_FIELDS)
+                conn.execute("DELETE FROM sites WHERE id = ?", (site_id,))
+                conn.execute(
+                    "INSERT INTO sites (id, name, enabled, checker_class, config, position) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        site_id,
+                        site_data.get("name", site_id),
+                        int(site_data.get("enabled", True)),
+                        site_data.get("checker_class", "BaseChecker"),
+                        dumps(site_data.get("config")),
+                        position
+                    )
+                )
+                position += 1
+                for account in site_data.get("accounts", []):
+                    warn_dropped_fields(f"站点 {site_id} 账户 {account.get('username', '')}", account, ACCOUNT_FIELDS)
+                    self._insert_account(conn, site_id, account)
+                    count += 1
+        self._version += 1
+        return count
+    
+    def export_config(self) -> Dict[str, Any]:
+        return thaw(self.get_all())
+
+
+def warn_dropped_fields(owner: str, data: Dict[str, Any], fields: Tuple[str, ...]):
+    dropped = [key for key in data if key not in fields]
+    if dropped:
+        get_main_logger().warning(f"{owner} 的配置项 {', '.join(dropped)} 不受 SQLite 存储支持，导入时已忽略")
+
+
+sites_repository = SitesRepository(sites_store)
+_sqlite_repositories: Dict[str, SqliteSitesRepository] = {}
+
+
+def get_sqlite_repository() -> SqliteSitesRepository:
+    path = get_storage_path()
+    key = str(path)
+    if key not in _sqlite_repositories:
+        _sqlite_repositories[key] = SqliteSitesRepository(get_database(path))
+    return _sqlite_repositories[key]
+
+
+def get_sites_repository():
+    """根据 settings.toml 中 [storage] backend 返回站点仓库（toml 或 sqlite）"""
+    backend = get_settings().get("storage", {}).get("backend", "toml")
+    if backend == "sqlite":
+        return get_sqlite_repository()
+    return sites_repository
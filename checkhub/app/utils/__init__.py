@@ -1,4 +1,11 @@
 from .logger import setup_logger, get_daily_log_file
-from .scheduler import CheckScheduler
 
 __all__ = ["setup_logger", "get_daily_log_file", "CheckScheduler"]
+
+
+def __getattr__(name):
+    # 调度器依赖 app.checkers，延迟导入以免签到器引用工具模块时形成循环导入
+    if name == "CheckScheduler":
+        from .scheduler import CheckScheduler
+        return CheckScheduler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+import httpx
+from app.config import DATA_DIR
+
+
+DEFAULT_CIRCUIT_SETTINGS = {
+    "enabled": True,
+    "failure_threshold": 3
+}
+
+# 计为主机故障的异常：连接失败与超时；HTTP 错误状态码说明主机仍可达，不计入
+FAILURE_EXCEPTIONS = (httpx.ConnectError, httpx.TimeoutException)
+
+# 命令行模式保存熔断状态的文件
+CIRCUIT_STATE_PATH = DATA_DIR / "circuit_breakers.json"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, host: str, failures: int):
+        super().__init__(f"{host} 连续 {failures} 次连接失败或超时，已暂停请求")
+        self.host = host
+        self.failures = failures
+
+
+class HostCircuit:
+    def __init__(self, host: str):
+        self.host = host
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        # 半开时只放行一个探测请求，其余请求等待它的结果；探测进行中时不为 None
+        self.probe_done: Optional[asyncio.Event] = None
+
+
+class CircuitBreakerRegistry:
+    """按上游主机的熔断器
+    
+    同一主机连续 failure_threshold 次连接失败或超时后熔断，本次运行中剩余的账户直接跳过；
+    下次运行开始时（begin_run）转为半开，只放行一个探测请求，其余请求等待它的结果：成功即恢复，失败则立即再次熔断。
+    运行相互重叠（全站签到期间手动签到单个站点）时只有最先开始的运行会把熔断转为半开。
+    命令行模式在退出时用 save() 记录熔断中的主机，下次运行 load() 后以半开状态开始。
+    """
+    
+    def __init__(self, failure_threshold: int = 3, enabled: bool = True):
+        self.failure_threshold = failure_threshold
+        self.enabled = enabled
+        self._circuits: Dict[str, HostCircuit] = {}
+        self._active_runs = 0
+    
+    def configure(self, settings: Dict[str, Any]):
+        config = dict(DEFAULT_CIRCUIT_SETTINGS)
+        config.update(settings.get("circuit_breaker", {}))
+        self.enabled = bool(config["enabled"])
+        self.failure_threshold = max(1, int(config["failure_threshold"]))
+    
+    def _circuit(self, host: str) -> HostCircuit:
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = HostCircuit(host)
+        return circuit
+    
+    def begin_run(self):
+        """开始一次运行，须与 end_run 成对调用"""
+        self._active_runs += 1
+        if self._active_runs > 1:
+            return
+        for circuit in self._circuits.values():
+            if circuit.state == OPEN:
+                circuit.state = HALF_OPEN
+    
+    def end_run(self):
+        self._active_runs = max(0, self._active_runs - 1)
+    
+    def is_open(self, host: Optional[str]) -> bool:
+        if not self.enabled or not host:
+            return False
+        circuit = self._circuits.get(host)
+        return circuit is not None and circuit.state == OPEN
+    
+    async def check(self, host: Optional[str], probe: bool = True) -> bool:
+        """熔断中时抛出 CircuitOpenError；半开时本次请求成为唯一的探测请求并返回 True
+        
+        探测进行中时等待它的结果：成功后照常放行，失败后抛出 CircuitOpenError。
+        调用方须以 record_success / record_failure / release 结束探测；probe=False 只检查状态，不占用探测名额。
+        """
+        while True:
+            if self.is_open(host):
+                raise CircuitOpenError(host, self._circuits[host].failures)
+            circuit = self._circuits.get(host) if self.enabled and host else None
+            if circuit is None or circuit.state != HALF_OPEN:
+                return False
+            if circuit.probe_done is not None:
+                await circuit.probe_done.wait()
+                continue
+            if not probe:
+                return False
+            circuit.probe_done = asyncio.Event()
+            return True
+    
+    @staticmethod
+    def _end_probe(circuit: HostCircuit):
+        if circuit.probe_done is not None:
+            circuit.probe_done.set()
+            circuit.probe_done = None
+    
+    def release(self, host: Optional[str]):
+        """探测请求没有得出结论（被取消或非连接类异常）时让出探测名额，等待中的请求之一接替探测"""
+        circuit = self._circuits.get(host) if host else None
+        if circuit is not None:
+            self._end_probe(circuit)
+    
+    def record_success(self, host: Optional[str]):
+        if not host or host not in self._circuits:
+            return
+        circuit = self._circuits[host]
+        circuit.state = CLOSED
+        circuit.failures = 0
+        circuit.opened_at = None
+        self._end_probe(circuit)
+    
+    def record_failure(self, host: Optional[str]):
+        if not self.enabled or not host:
+            return
+        circuit = self._circuit(host)
+        circuit.failures += 1
+        if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+            if circuit.state != OPEN:
+                circuit.opened_at = time.time()
+            circuit.state = OPEN
+        self._end_probe(circuit)
+    
+    def load(self, path):
+        """载入上次运行结束时熔断中的主机，以半开状态开始"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                opened = json.load(f)
+        except (OSError, ValueError):
+            return
+        for host, failures in opened.items():
+            circuit = self._circuit(host)
+            circuit.state = HALF_OPEN
+            circuit.failures = failures
+    
+    def save(self, path):
+        path = Path(path)
+        opened = {host: circuit.failures for host, circuit in self._circuits.items() if circuit.state == OPEN}
+        if not opened:
+            if path.exists():
+                path.unlink()
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(opened, f)
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            host: {"state": circuit.state, "failures": circuit.failures, "opened_at": circuit.opened_at}
+            for host, circuit in self._circuits.items()
+        }
+
+
+circuit_breakers = CircuitBreakerRegistry()
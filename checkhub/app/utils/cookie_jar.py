@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from http.cookiejar import Cookie
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import httpx
+from cryptography.fernet import Fernet, InvalidToken
+from app.config import DATA_DIR
+from app.utils.logger import get_main_logger
+
+
+COOKIE_KEY_ENV = "CHECKHUB_COOKIE_KEY"
+COOKIE_KEY_FILE_ENV = "CHECKHUB_COOKIE_KEY_FILE"
+
+DEFAULT_COOKIE_SETTINGS = {
+    "enabled": True,
+    "session_ttl_hours": 24
+}
+
+
+def parse_cookie_header(header: Optional[str]) -> Dict[str, str]:
+    """把 "a=1; b=2" 形式的 Cookie 字符串解析为字典"""
+    cookies = {}
+    for part in (header or "").split(";"):
+        name, sep, value = part.strip().partition("=")
+        if sep and name:
+            cookies[name] = value
+    return cookies
+
+
+def make_cookie(name: str, value: str, domain: str = "", path: str = "/",
+                expires: Optional[int] = None, secure: bool = False) -> Cookie:
+    return Cookie(
+        version=0, name=name, value=value,
+        port=None, port_specified=False,
+        domain=domain, domain_specified=domain.startswith("."), domain_initial_dot=domain.startswith("."),
+        path=path, path_specified=True,
+        secure=secure, expires=expires, discard=expires is None,
+        comment=None, comment_url=None, rest={}
+    )
+
+
+def static_cookies(seed: Optional[str], domain: str = "") -> httpx.Cookies:
+    """只包含配置中静态 cookies 的容器"""
+    cookies = httpx.Cookies()
+    for name, value in parse_cookie_header(seed).items():
+        cookies.jar.set_cookie(make_cookie(name, value, domain))
+    return cookies
+
+
+class CookieVault:
+    """按站点 + 账户保存的加密 Cookie（data/cookies/*.bin，Fernet 加密）
+    
+    每个账户一个文件，记录 Cookie 的域、路径与过期时间；没有过期时间的会话 Cookie
+    保存 session_ttl_hours 小时。文件中同时记录配置里静态 cookies 的指纹，
+    配置中的 cookies 被修改后旧的会话自动作废。
+    密钥依次取环境变量 CHECKHUB_COOKIE_KEY、[cookies] key、密钥文件（环境变量 CHECKHUB_COOKIE_KEY_FILE
+    或 [cookies] key_file，应放在数据目录之外）；都没有时自动生成到 data/cookies/.key 并记录警告。
+    """
+    
+    def __init__(self, directory: Path, key: Optional[str] = None, session_ttl: float = 86400, enabled: bool = True,
+                 key_file: Optional[str] = None):
+        self.directory = Path(directory)
+        self.key = key
+        self.key_file = key_file
+        self.session_ttl = session_ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._fernet: Optional[Fernet] = None
+    
+    def configure(self, settings: Dict[str, Any]):
+        config = dict(DEFAULT_COOKIE_SETTINGS)
+        config.update(settings.get("cookies", {}))
+        self.enabled = bool(config["enabled"])
+        self.session_ttl = float(config["session_ttl_hours"]) * 3600
+        key = os.environ.get(COOKIE_KEY_ENV) or config.get("key")
+        key_file = os.environ.get(COOKIE_KEY_FILE_ENV) or config.get("key_file")
+        if key != self.key or key_file != self.key_file:
+            self.key = key
+            self.key_file = key_file
+            self._fernet = None
+    
+    def _cipher(self) -> Fernet:
+        with self._lock:
+            if self._fernet is not None:
+                return self._fernet
+            
+            key = self.key or os.environ.get(COOKIE_KEY_ENV)
+            if not key:
+                key_file = self.key_file or os.environ.get(COOKIE_KEY_FILE_ENV)
+                if key_file:
+                    key = self._read_key(Path(key_file))
+                else:
+                    key_path = self.directory / ".key"
+                    key = self._read_key(key_path)
+                    get_main_logger().warning(
+                        f"未配置 Cookie 加密密钥，使用与 Cookie 同目录的 {key_path}；"
+                        f"建议通过环境变量 {COOKIE_KEY_ENV} 或 [cookies] key_file 提供数据目录之外的密钥"
+                    )
+            self._fernet = Fernet(key)
+            return self._fernet
+    
+    @staticmethod
+    def _read_key(key_path: Path) -> str:
+        """读取密钥文件，不存在时生成；多个进程同时生成时以先写入的为准"""
+        try:
+            return key_path.read_text().strip()
+        except FileNotFoundError:
+            pass
+        
+        key_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = key_path.with_name(f"{key_path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(Fernet.generate_key().decode())
+        try:
+            # link 在目标已存在时失败，不会覆盖其他进程刚写好的密钥，也不会读到写了一半的文件
+            os.link(tmp, key_path)
+            get_main_logger().warning(f"Cookie 加密密钥不存在，已生成新的密钥: {key_path}")
+        except FileExistsError:
+            pass
+        finally:
+            tmp.unlink()
+        return key_path.read_text().strip()
+    
+    def _path(self, site_id: str, account: str) -> Path:
+        name = hashlib.sha256(f"{site_id}\0{account}".encode("utf-8")).hexdigest()[:32]
+        return self.directory / f"{name}.bin"
+    
+    @staticmethod
+    def _fingerprint(seed: Optional[str]) -> str:
+        return hashlib.sha256((seed or "").encode("utf-8")).hexdigest()
+    
+    def load_records(self, site_id: str, account: str, seed: Optional[str] = None) -> List[Dict[str, Any]]:
+        """返回仍然有效的 Cookie 记录；文件不存在、无法解密或配置 cookies 已变化时返回空列表"""
+        if not self.enabled:
+            return []
+        
+        path = self._path(site_id, account)
+        try:
+            token = path.read_bytes()
+        except FileNotFoundError:
+            return []
+        
+        try:
+            data = json.loads(self._cipher().decrypt(token))
+        except (InvalidToken, ValueError) as e:
+            get_main_logger().warning(f"站点 {site_id} 账户 {account} 的 Cookie 无法解密，已忽略: {type(e).__name__}")
+            return []
+        
+        if data.get("seed") != self._fingerprint(seed):
+            return []
+        
+        now = time.time()
+        session_valid = now - data.get("saved_at", 0) < self.session_ttl
+        return [
+            record for record in data.get("cookies", [])
+            if (record.get("expires") is None and session_valid)
+            or (record.get("expires") is not None and record["expires"] > now)
+        ]
+    
+    def save_records(self, site_id: str, account: str, records: List[Dict[str, Any]], seed: Optional[str] = None):
+        if not self.enabled:
+            return
+        
+        path = self._path(site_id, account)
+        if not records:
+            self.clear(site_id, account)
+            return
+        
+        data = {"seed": self._fingerprint(seed), "saved_at": time.time(), "cookies": records}
+        token = self._cipher().encrypt(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(token)
+            os.replace(tmp, path)
+    
+    def clear(self, site_id: str, account: str):
+        try:
+            self._path(site_id, account).unlink()
+        except FileNotFoundError:
+            pass
+    
+    def load(self, site_id: str, account: str, seed: Optional[str] = None, domain: str = "") -> httpx.Cookies:
+        """构造账户的 Cookie 容器：有保存的会话时直接使用，否则用配置中的静态 cookies"""
+        records = self.load_records(site_id, account, seed)
+        if not records:
+            return static_cookies(seed, domain)
+        cookies = httpx.Cookies()
+        for record in records:
+            cookies.jar.set_cookie(make_cookie(**record))
+        return cookies
+    
+    def save(self, site_id: str, account: str, cookies: httpx.Cookies, seed: Optional[str] = None):
+        records = [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "expires": cookie.expires,
+                "secure": cookie.secure
+            }
+            for cookie in cookies.jar
+            if cookie.value is not None and not cookie.is_expired()
+        ]
+        self.save_records(site_id, account, records, seed)
+
+
+cookie_vault = CookieVault(DATA_DIR / "cookies")
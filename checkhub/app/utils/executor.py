@@ -0,0 +1,97 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_PER_SITE = 5
+DEFAULT_PER_HOST = 5
+
+
+class CheckExecutor:
+    """签到并发执行器
+    
+    通过三层信号量限制并发：全局、每个站点、每个上游主机。
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        per_site: int = DEFAULT_PER_SITE,
+        per_host: int = DEFAULT_PER_HOST
+    ):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.per_site = max(1, int(per_site))
+        self.per_host = max(1, int(per_host))
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._sites: Dict[str, asyncio.Semaphore] = {}
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+    
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "CheckExecutor":
+        config = settings.get("concurrency", {})
+        return cls(
+            max_concurrency=config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+            per_site=config.get("per_site", DEFAULT_PER_SITE),
+            per_host=config.get("per_host", DEFAULT_PER_HOST)
+        )
+    
+    def _site_semaphore(self, site_id: str, limit: Optional[int]) -> asyncio.Semaphore:
+        if site_id not in self._sites:
+            self._sites[site_id] = asyncio.Semaphore(max(1, int(limit or self.per_site)))
+        return self._sites[site_id]
+    
+    def _host_semaphore(self, host: Optional[str]) -> Optional[asyncio.Semaphore]:
+        if not host:
+            return None
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+    
+    @asynccontextmanager
+    async def slot(self, site_id: str, host: Optional[str] = None, site_limit: Optional[int] = None):
+        host_semaphore = self._host_semaphore(host)
+        async with self._site_semaphore(site_id, site_limit):
+            if host_semaphore is not None:
+                await host_semaphore.acquire()
+            try:
+                async with self._global:
+                    yield
+            finally:
+                if host_semaphore is not None:
+                    host_semaphore.release()
+    
+    async def map_accounts(
+        self,
+        site_id: str,
+        accounts: Iterable[Any],
+        func: Callable[[Any], Awaitable[Any]],
+        host: Optional[str] = None,
+        site_limit: Optional[int] = None,
+        sequential: bool = False,
+        on_error: Optional[Callable[[Any, Exception], Any]] = None
+    ) -> List[Any]:
+        """按账户顺序返回结果；sequential 为真时账户逐个执行
+        
+        单个账户抛出异常时不影响其他账户，该账户的结果为 on_error(account, 异常) 的返回值
+        （未传 on_error 时为异常对象本身）。
+        """
+        
+        async def run_one(account):
+            try:
+                async with self.slot(site_id, host, site_limit):
+                    return await func(account)
+            except Exception as e:
+                return on_error(account, e) if on_error else e
+        
+        if sequential:
+            return [await run_one(account) for account in accounts]
+        
+        return list(await asyncio.gather(*(run_one(account) for account in accounts)))
+
+
+def host_of(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    return urlparse(url).hostname
@@ -0,0 +1,81 @@
+import httpx
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+DEFAULT_HTTP_SETTINGS = {
+    "timeout": 30,
+    "max_connections_per_host": 10,
+    "max_keepalive_connections": 5,
+    "keepalive_expiry": 30,
+    "http2": True
+}
+
+
+class HttpClientRegistry:
+    """进程级 HTTP 客户端注册表
+    
+    每个上游主机复用一个 httpx.AsyncClient，连接保持复用，
+    单主机的连接数受 max_connections_per_host 限制。
+    客户端被多个账户共用，因此不保存任何 Cookie，账户 Cookie 由签到器自己的 Cookie 容器管理。
+    """
+    
+    def __init__(self, **options):
+        self.options = dict(DEFAULT_HTTP_SETTINGS)
+        self.options.update(options)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+    
+    def configure(self, settings: Dict[str, Any]):
+        self.options = dict(DEFAULT_HTTP_SETTINGS)
+        self.options.update(settings.get("http", {}))
+    
+    @property
+    def http2(self) -> bool:
+        return HTTP2_AVAILABLE and bool(self.options.get("http2", True))
+    
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.options["max_connections_per_host"],
+            max_keepalive_connections=self.options["max_keepalive_connections"],
+            keepalive_expiry=self.options["keepalive_expiry"]
+        )
+        return httpx.AsyncClient(
+            timeout=self.options["timeout"],
+            limits=limits,
+            http2=self.http2,
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        )
+    
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._build_client()
+            self._clients[key] = client
+        return client
+    
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self.client_for(url).request(method, url, **kwargs)
+    
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+    
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+    
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+http_clients = HttpClientRegistry()
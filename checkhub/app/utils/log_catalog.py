@@ -0,0 +1,124 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import LOGS_DIR
+
+
+LOG_NAME_PATTERN = re.compile(r"^(?P<site>.+)_(?P<date>\d{4}-\d{2}-\d{2})\.log(?:\.gz)?$")
+MAIN_LOG_NAME = "main.log"
+
+
+class LogCatalog:
+    """日志目录索引
+    
+    缓存一次目录扫描结果，按修改时间倒序排列；只有目录 mtime 变化（新增/删除文件）
+    或超过 ttl 秒（刷新文件大小）时才重新扫描。
+    """
+    
+    def __init__(self, directory: Path, suffixes: Tuple[str, ...] = (".log", ".log.gz"), ttl: float = 5.0):
+        self.directory = Path(directory)
+        self.suffixes = suffixes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._dir_mtime: Optional[int] = None
+        self._scanned_at = 0.0
+        self._entries: List[Dict[str, Any]] = []
+        self._by_site: Dict[str, List[Dict[str, Any]]] = {}
+        self._site_summary: Dict[str, Dict[str, Any]] = {}
+        self._total_size = 0
+    
+    def _dir_signature(self) -> Optional[int]:
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def _scan(self) -> List[Dict[str, Any]]:
+        entries = []
+        try:
+            iterator = os.scandir(self.directory)
+        except FileNotFoundError:
+            return entries
+        
+        with iterator:
+            for entry in iterator:
+                if not entry.name.endswith(self.suffixes) or not is_log_name(entry.name):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if not entry.is_file():
+                    continue
+                entries.append({
+                    "name": entry.name,
+                    "site": site_of(entry.name),
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    "modified": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+                })
+        
+        entries.sort(key=lambda item: item["mtime"], reverse=True)
+        return entries
+    
+    def _refresh(self):
+        signature = self._dir_signature()
+        now = time.monotonic()
+        if signature == self._dir_mtime and now - self._scanned_at < self.ttl:
+            return
+        
+        with self._lock:
+            if signature == self._dir_mtime and now - self._scanned_at < self.ttl:
+                return
+            entries = self._scan()
+            by_site: Dict[str, List[Dict[str, Any]]] = {}
+            for entry in entries:
+                by_site.setdefault(entry["site"], []).append(entry)
+            self._entries = entries
+            self._by_site = by_site
+            self._site_summary = {
+                site: {
+                    "count": len(site_entries),
+                    "total_size": sum(entry["size"] for entry in site_entries),
+                    "latest": site_entries[0]["name"]
+                } for site, site_entries in by_site.items()
+            }
+            self._total_size = sum(entry["size"] for entry in entries)
+            self._dir_mtime = signature
+            self._scanned_at = now
+    
+    def invalidate(self):
+        self._dir_mtime = None
+    
+    def newest(self, limit: int = 10, site: Optional[str] = None) -> List[Dict[str, Any]]:
+        self._refresh()
+        entries = self._by_site.get(site, []) if site else self._entries
+        return entries[:limit]
+    
+    def sites(self) -> Dict[str, Dict[str, Any]]:
+        """按站点汇总：文件数、总大小、最新文件"""
+        self._refresh()
+        return self._site_summary
+    
+    def total_size(self) -> int:
+        self._refresh()
+        return self._total_size
+
+
+def is_log_name(log_name: str) -> bool:
+    """是否为 logger 写出的日志文件：站点按天的日志（可能已压缩）或 main.log"""
+    return log_name == MAIN_LOG_NAME or LOG_NAME_PATTERN.match(log_name) is not None
+
+
+def site_of(log_name: str) -> str:
+    match = LOG_NAME_PATTERN.match(log_name)
+    if match:
+        return match.group("site")
+    return log_name.split(".", 1)[0]
+
+
+log_catalog = LogCatalog(LOGS_DIR)
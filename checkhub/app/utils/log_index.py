@@ -0,0 +1,188 @@
+import gzip
+import json
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from app.config import LOGS_DIR
+from app.utils.log_catalog import LOG_NAME_PATTERN
+
+
+INDEX_FILE = ".index"
+INDEX_VERSION = 1
+
+
+class LogIndex:
+    """JSON 日志的轻量索引（logs/.index）
+    
+    每个每日日志文件记录：已索引到的字节偏移、出现过的账户及各状态条数、错误类型。
+    查询时先用索引排除不可能命中的文件，只扫描剩下的文件；索引按偏移增量更新，
+    文件被压缩为 .log.gz 后沿用原来的条目。
+    """
+    
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.path = self.directory / INDEX_FILE
+        self._lock = threading.Lock()
+        self._files: Optional[Dict[str, Dict[str, Any]]] = None
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                return data.get("files", {})
+        except (OSError, ValueError):
+            pass
+        return {}
+    
+    def _save(self, files: Dict[str, Dict[str, Any]]):
+        tmp = self.path.with_name(INDEX_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": files}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+    
+    @staticmethod
+    def _open(path: Path):
+        if path.suffix == ".gz":
+            return gzip.open(path, "rb")
+        return open(path, "rb")
+    
+    @staticmethod
+    def _parse(line: bytes) -> Optional[Dict[str, Any]]:
+        if not line.startswith(b"{"):
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+    
+    def _index_file(self, path: Path, entry: Dict[str, Any]):
+        with self._open(path) as f:
+            f.seek(entry["offset"])
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                entry["offset"] += len(line)
+                record = self._parse(line)
+                if not record or not record.get("account"):
+                    continue
+                counts = entry["accounts"].setdefault(record["account"], {})
+                status = record.get("status") or "info"
+                counts[status] = counts.get(status, 0) + 1
+                if record.get("error"):
+                    errors = entry["errors"]
+                    errors[record["error"]] = errors.get(record["error"], 0) + 1
+    
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            files = self._files if self._files is not None else self._load()
+            current: Dict[str, Dict[str, Any]] = {}
+            changed = False
+            
+            for entry in os.scandir(self.directory):
+                match = LOG_NAME_PATTERN.match(entry.name)
+                if not match or not entry.is_file():
+                    continue
+                size = entry.stat().st_size
+                
+                indexed = files.get(entry.name)
+                if indexed is None and entry.name.endswith(".gz"):
+                    # 压缩前的条目内容不变，偏移按解压后的字节计算
+                    indexed = files.get(entry.name[:-3])
+                    if indexed is not None:
+                        indexed = dict(indexed, size=size)
+                        changed = True
+                if indexed is None or indexed["size"] > size and not entry.name.endswith(".gz"):
+                    indexed = {
+                        "site": match.group("site"),
+                        "date": match.group("date"),
+                        "size": 0,
+                        "offset": 0,
+                        "accounts": {},
+                        "errors": {}
+                    }
+                
+                if indexed["size"] != size:
+                    indexed["size"] = size
+                    try:
+                        self._index_file(Path(entry.path), indexed)
+                    except (OSError, EOFError):
+                        continue
+                    changed = True
+                current[entry.name] = indexed
+            
+            if changed or current.keys() != files.keys():
+                self._save(current)
+            self._files = current
+            return current
+    
+    def candidates(
+        self,
+        site: Optional[str] = None,
+        account: Optional[str] = None,
+        status: Optional[str] = None,
+        error: Optional[str] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None
+    ) -> List[str]:
+        """返回可能包含匹配记录的文件名，按日期倒序"""
+        names = []
+        for name, entry in self.refresh().items():
+            if site and entry["site"] != site:
+                continue
+            if since and entry["date"] < since.isoformat():
+                continue
+            if until and entry["date"] > until.isoformat():
+                continue
+            if error and error not in entry["errors"]:
+                continue
+            if account:
+                counts = entry["accounts"].get(account)
+                if not counts or status and not counts.get(status):
+                    continue
+            elif status and not any(counts.get(status) for counts in entry["accounts"].values()):
+                continue
+            elif not entry["accounts"]:
+                continue
+            names.append(name)
+        names.sort(key=lambda name: (self._files[name]["date"], name), reverse=True)
+        return names
+    
+    def _records(self, name: str) -> Iterator[Dict[str, Any]]:
+        lines = []
+        with self._open(self.directory / name) as f:
+            for line in f:
+                record = self._parse(line)
+                if record and record.get("account"):
+                    lines.append(record)
+        # 同一文件内也按时间倒序返回
+        return reversed(lines)
+    
+    def query(
+        self,
+        site: Optional[str] = None,
+        account: Optional[str] = None,
+        status: Optional[str] = None,
+        error: Optional[str] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        records = []
+        for name in self.candidates(site, account, status, error, since, until):
+            for record in self._records(name):
+                if account and record.get("account") != account:
+                    continue
+                if status and record.get("status") != status:
+                    continue
+                if error and record.get("error") != error:
+                    continue
+                records.append(dict(record, file=name))
+                if len(records) >= limit:
+                    return records
+        return records
+
+
+log_index = LogIndex(LOGS_DIR)
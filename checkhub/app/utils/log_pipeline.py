@@ -0,0 +1,207 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class QueuedHandler(logging.Handler):
+    """把日志记录放入管道队列，由后台线程交给 target 格式化并写入
+    
+    调用方只做一次消息拼接和入队，不做任何磁盘 I/O，可以安全地在事件循环中使用。
+    """
+    
+    def __init__(self, pipeline: "LogPipeline", target: logging.Handler):
+        super().__init__(target.level)
+        self.pipeline = pipeline
+        self.target = target
+    
+    def setLevel(self, level):
+        super().setLevel(level)
+        self.target.setLevel(level)
+    
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 在调用方线程里合并参数，避免后台线程格式化时参数对象已被修改
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.pipeline.enqueue(self.target, self.prepare(record))
+        except Exception:
+            self.handleError(record)
+    
+    def close(self):
+        super().close()
+        self.pipeline.retire(self.target)
+
+
+class LogPipeline:
+    """异步日志管道：QueuedHandler 入队，后台线程批量格式化并写入
+    
+    - 每批最多 batch_size 条，按目标 handler 分组，同一文件一次写入、一次 flush
+    - 队列满时丢弃新记录并计数，不阻塞调用方
+    - 进程退出时自动 stop()，把队列中剩余的日志写完
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, maxsize: int = 100000, batch_size: int = 512, flush_interval: float = 0.2):
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._processed = 0
+        self._dropped = 0
+        self._batches = 0
+        self._max_depth = 0
+        self._last_batch_ms = 0.0
+    
+    def wrap(self, handler: logging.Handler) -> QueuedHandler:
+        return QueuedHandler(self, handler)
+    
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="log-pipeline", daemon=True)
+            self._thread.start()
+    
+    def enqueue(self, target: logging.Handler, record: logging.LogRecord):
+        if self._thread is None:
+            self.start()
+        try:
+            self.queue.put_nowait((target, record))
+        except queue.Full:
+            self._dropped += 1
+            return
+        depth = self.queue.qsize()
+        if depth > self._max_depth:
+            self._max_depth = depth
+    
+    def retire(self, target: logging.Handler):
+        """target 不再接收新记录：排在它之前的记录写完后关闭"""
+        if self._thread is None or not self._thread.is_alive():
+            target.close()
+            return
+        self.queue.put((target, None))
+    
+    def _drain(self, first) -> List[Tuple[logging.Handler, Optional[logging.LogRecord]]]:
+        items = [first]
+        while len(items) < self.batch_size:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+    
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            
+            items = self._drain(first)
+            stop = False
+            started = time.perf_counter()
+            try:
+                batch: Dict[logging.Handler, List[logging.LogRecord]] = {}
+                for item in items:
+                    if item is self._STOP:
+                        stop = True
+                        continue
+                    target, record = item
+                    if record is None:
+                        self._write(target, batch.pop(target, []))
+                        target.close()
+                        continue
+                    batch.setdefault(target, []).append(record)
+                
+                for target, records in batch.items():
+                    self._write(target, records)
+            finally:
+                self._batches += 1
+                self._last_batch_ms = (time.perf_counter() - started) * 1000
+                for _ in items:
+                    self.queue.task_done()
+            
+            if stop:
+                return
+    
+    def _write(self, target: logging.Handler, records: List[logging.LogRecord]):
+        if not records:
+            return
+        self._processed += len(records)
+        
+        stream_handler = isinstance(target, logging.StreamHandler)
+        if stream_handler and getattr(target, "stream", None) is None and isinstance(target, logging.FileHandler):
+            target.stream = target._open()
+        if not stream_handler or target.stream is None:
+            for record in records:
+                target.handle(record)
+            return
+        
+        target.acquire()
+        try:
+            lines = []
+            for record in records:
+                if record.levelno < target.level or not target.filter(record):
+                    continue
+                try:
+                    lines.append(target.format(record) + target.terminator)
+                except Exception:
+                    target.handleError(record)
+            if lines:
+                target.stream.write("".join(lines))
+                target.flush()
+        except Exception:
+            target.handleError(records[-1])
+        finally:
+            target.release()
+    
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """等待队列中已有的记录全部写入，返回是否在超时前完成"""
+        if self._thread is None or not self._thread.is_alive():
+            return self.queue.unfinished_tasks == 0
+        
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+    
+    def stop(self, timeout: Optional[float] = 5.0):
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self.queue.put(self._STOP)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self._max_depth,
+            "queue_capacity": self.queue.maxsize,
+            "processed": self._processed,
+            "dropped": self._dropped,
+            "batches": self._batches,
+            "last_batch_ms": round(self._last_batch_ms, 3),
+            "running": bool(self._thread and self._thread.is_alive())
+        }
+
+
+log_pipeline = LogPipeline()
+atexit.register(log_pipeline.stop)
@@ -0,0 +1,131 @@
+import aiofiles
+import asyncio
+import gzip
+import struct
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """解析单段 Range 头，返回 [start, end) 字节区间；不支持多段"""
+    if not header:
+        return None
+    
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text == "":
+            length = int(end_text)
+            # 空文件没有可返回的后缀区间
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiable(header)
+            return max(size - length, 0), size
+        
+        start = int(start_text)
+        end = int(end_text) + 1 if end_text else size
+    except ValueError:
+        return None
+    
+    if start >= size or start < 0 or end <= start:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size)
+
+
+def is_compressed(path: Path) -> bool:
+    return path.suffix == ".gz"
+
+
+def log_size(path: Path) -> int:
+    """日志内容大小；gzip 文件读取尾部 ISIZE 字段得到解压后大小"""
+    if not is_compressed(path):
+        return path.stat().st_size
+    
+    with open(path, "rb") as f:
+        f.seek(-4, 2)
+        return struct.unpack("<I", f.read(4))[0]
+
+
+def _gzip_tail_offset(path: Path, lines: int) -> int:
+    starts = deque([0], maxlen=lines + 1)
+    position = 0
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            position += len(line)
+            starts.append(position)
+    # starts 末尾是文件结束位置，其前 lines 个为最后 lines 行的起点
+    return starts[0] if len(starts) > lines else 0
+
+
+async def find_tail_offset(path: Path, lines: int, size: int) -> int:
+    """从文件末尾向前查找，返回最后 lines 行的起始偏移"""
+    if lines <= 0 or size == 0:
+        return size
+    
+    if is_compressed(path):
+        return await asyncio.to_thread(_gzip_tail_offset, path, lines)
+    
+    async with aiofiles.open(path, "rb") as f:
+        position = size
+        newlines = 0
+        await f.seek(size - 1)
+        if await f.read(1) == b"\n":
+            newlines = -1
+        
+        while position > 0:
+            read_size = min(CHUNK_SIZE, position)
+            position -= read_size
+            await f.seek(position)
+            block = await f.read(read_size)
+            index = len(block)
+            while True:
+                index = block.rfind(b"\n", 0, index)
+                if index < 0:
+                    break
+                newlines += 1
+                if newlines == lines:
+                    return position + index + 1
+    return 0
+
+
+async def _iter_gzip(path: Path, start: int, end: int, chunk_size: int) -> AsyncIterator[bytes]:
+    f = await asyncio.to_thread(gzip.open, path, "rb")
+    try:
+        await asyncio.to_thread(f.seek, start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = await asyncio.to_thread(f.read, min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+async def iter_file(path: Path, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """按块异步读取 [start, end) 区间；gzip 文件读取解压后的内容"""
+    if is_compressed(path):
+        async for chunk in _iter_gzip(path, start, end, chunk_size):
+            yield chunk
+        return
+    
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = await f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,111 @@
+import gzip
+import os
+import re
+import shutil
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DATE_PATTERN = re.compile(r"_(\d{4}-\d{2}-\d{2})\.log(?:\.gz)?$")
+
+DEFAULT_LOG_SETTINGS = {
+    "max_age_days": 30,
+    "max_total_mb": 500,
+    "compress_after_days": 3,
+    "cleanup_time": "03:30"
+}
+
+
+class LogRetention:
+    """日志保留策略：压缩旧日志、删除过期日志、限制日志目录总大小
+    
+    只处理带日期的每日日志（<site>_<YYYY-MM-DD>.log），当天的日志和 main.log 不会被改动。
+    """
+    
+    def __init__(
+        self,
+        directory: Path,
+        max_age_days: int = DEFAULT_LOG_SETTINGS["max_age_days"],
+        max_total_mb: float = DEFAULT_LOG_SETTINGS["max_total_mb"],
+        compress_after_days: int = DEFAULT_LOG_SETTINGS["compress_after_days"]
+    ):
+        self.directory = Path(directory)
+        self.max_age_days = max_age_days
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024) if max_total_mb else 0
+        self.compress_after_days = compress_after_days
+    
+    @classmethod
+    def from_settings(cls, directory: Path, settings: Dict[str, Any]) -> "LogRetention":
+        config = dict(DEFAULT_LOG_SETTINGS)
+        config.update(settings.get("logs", {}))
+        return cls(
+            directory,
+            max_age_days=config["max_age_days"],
+            max_total_mb=config["max_total_mb"],
+            compress_after_days=config["compress_after_days"]
+        )
+    
+    def _daily_logs(self) -> List[Tuple[date, Path]]:
+        logs = []
+        for path in self.directory.iterdir():
+            match = DATE_PATTERN.search(path.name)
+            if not match or not path.is_file():
+                continue
+            try:
+                log_date = datetime.strptime(match.group(1), "%Y-%m-%d").date()
+            except ValueError:
+                continue
+            logs.append((log_date, path))
+        logs.sort()
+        return logs
+    
+    @staticmethod
+    def compress(path: Path) -> Path:
+        target = path.with_name(path.name + ".gz")
+        tmp = path.with_name(path.name + ".gz.tmp")
+        with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        stat = path.stat()
+        os.utime(tmp, (stat.st_atime, stat.st_mtime))
+        os.replace(tmp, target)
+        path.unlink()
+        return target
+    
+    def run(self, today: Optional[date] = None) -> Dict[str, int]:
+        today = today or date.today()
+        stats = {"compressed": 0, "deleted": 0, "freed_bytes": 0}
+        
+        remaining = []
+        for log_date, path in self._daily_logs():
+            if log_date >= today:
+                remaining.append((log_date, path))
+                continue
+            
+            age = (today - log_date).days
+            if self.max_age_days and age > self.max_age_days:
+                stats["freed_bytes"] += path.stat().st_size
+                path.unlink()
+                stats["deleted"] += 1
+                continue
+            
+            if self.compress_after_days and age > self.compress_after_days and path.suffix == ".log":
+                size = path.stat().st_size
+                path = self.compress(path)
+                stats["compressed"] += 1
+                stats["freed_bytes"] += size - path.stat().st_size
+            
+            remaining.append((log_date, path))
+        
+        if self.max_total_bytes:
+            total = sum(path.stat().st_size for _, path in remaining)
+            for log_date, path in remaining:
+                if total <= self.max_total_bytes or log_date >= today:
+                    break
+                size = path.stat().st_size
+                path.unlink()
+                total -= size
+                stats["deleted"] += 1
+                stats["freed_bytes"] += size
+        
+        return stats
@@ -1,7 +1,11 @@
+import json
 import logging
+import threading
 from pathlib import Path
 from datetime import datetime
-from app.config import LOGS_DIR
+from typing import Dict, Tuple
+from app.config import LOGS_DIR, get_settings
+from app.utils.log_pipeline import log_pipeline
 
 
 def get_daily_log_file(site_id: str) -> Path:
@@ -10,27 +14,131 @@ def get_daily_log_file(site_id: str) -> Path:
     return log_file
 
 
-def setup_logger(site_id: str) -> logging.Logger:
-    logger = logging.getLogger(f"checkhub.{site_id}")
-    logger.setLevel(logging.INFO)
+FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON Lines 格式：每行一个对象，附带 extra 中的结构化字段"""
     
-    if logger.handlers:
-        logger.handlers.clear()
+    FIELDS = ("site_id", "account", "status", "duration_ms", "error")
     
-    log_file = get_daily_log_file(site_id)
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "site_id": record.name.split(".", 1)[1] if record.name.startswith("checkhub.") else None
+        }
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = round(value, 1) if field == "duration_ms" else value
+        payload["message"] = record.getMessage()
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+def get_formatter() -> logging.Formatter:
+    """按 settings 中 [logs] format 选择站点日志格式：text（默认）或 json"""
+    if get_settings().get("logs", {}).get("format", "text") == "json":
+        return JsonFormatter()
+    return FORMATTER
+
+
+def log_result(logger: logging.Logger, account: str, result, duration_ms: float):
+    """记录单个账户的签到结果，附带结构化字段"""
+    logger.info(
+        f"账户 {account}: {result}",
+        extra={
+            "account": account,
+            "status": "success" if result.success else "failed",
+            "duration_ms": duration_ms
+        }
+    )
+
+
+def log_account_error(logger: logging.Logger, account: str, error: Exception, duration_ms: float):
+    logger.error(
+        f"账户 {account} 签到异常: {error}",
+        extra={
+            "account": account,
+            "status": "error",
+            "duration_ms": duration_ms,
+            "error": type(error).__name__
+        }
+    )
+
+
+class SiteLoggerRegistry:
+    """站点日志器注册表
     
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
+    每个站点只有一个 logger 和一个文件 handler，重复获取不会重新打开文件；
+    日期变化后第一次获取时换成新一天的文件，旧 handler 交给日志管道在写完排队的记录后关闭。
+    """
     
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    file_handler.setFormatter(formatter)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, Tuple[str, logging.Handler]] = {}
+    
+    def get(self, site_id: str) -> logging.Logger:
+        logger = logging.getLogger(f"checkhub.{site_id}")
+        date_str = datetime.now().strftime("%Y-%m-%d")
+        current = self._handlers.get(site_id)
+        if current and current[0] == date_str:
+            return logger
+        
+        with self._lock:
+            current = self._handlers.get(site_id)
+            if current and current[0] == date_str:
+                return logger
+            
+            logger.setLevel(logging.INFO)
+            stale = [current[1]] if current else list(logger.handlers)
+            
+            file_handler = logging.FileHandler(
+                LOGS_DIR / f"{site_id}_{date_str}.log",
+                encoding='utf-8',
+                delay=True
+            )
+            file_handler.setLevel(logging.INFO)
+            file_handler.setFormatter(get_formatter())
+            handler = log_pipeline.wrap(file_handler)
+            
+            logger.addHandler(handler)
+            for old in stale:
+                logger.removeHandler(old)
+                old.close()
+            self._handlers[site_id] = (date_str, handler)
+        return logger
     
-    logger.addHandler(file_handler)
+    def prune(self):
+        """关闭所有不是今天的文件 handler（日期变化后未再签到的站点）"""
+        date_str = datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            for site_id, (handler_date, handler) in list(self._handlers.items()):
+                if handler_date == date_str:
+                    continue
+                logging.getLogger(f"checkhub.{site_id}").removeHandler(handler)
+                handler.close()
+                del self._handlers[site_id]
     
-    return logger
+    def close_all(self):
+        with self._lock:
+            for site_id, (_, handler) in self._handlers.items():
+                logging.getLogger(f"checkhub.{site_id}").removeHandler(handler)
+                handler.close()
+            self._handlers.clear()
+
+
+site_loggers = SiteLoggerRegistry()
+
+
+def setup_logger(site_id: str) -> logging.Logger:
+    return site_loggers.get(site_id)
 
 
 def get_main_logger() -> logging.Logger:
@@ -40,20 +148,15 @@ def get_main_logger() -> logging.Logger:
     if not logger.handlers:
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(FORMATTER)
         
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        console_handler.setFormatter(formatter)
-        
-        logger.addHandler(console_handler)
+        logger.addHandler(log_pipeline.wrap(console_handler))
         
         file_handler = logging.FileHandler(
             LOGS_DIR / "main.log",
             encoding='utf-8'
         )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(FORMATTER)
+        logger.addHandler(log_pipeline.wrap(file_handler))
     
     return logger
@@ -0,0 +1,188 @@
+import bisect
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CHECK_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+    
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+    
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+    
+    def replace(self, values: Dict[LabelValues, float]):
+        """整体替换所有标签组合的取值（用于抓取时重新计算的指标）"""
+        with self._lock:
+            self._values = dict(values)
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 每个标签组合：[各桶计数（非累计）..., +Inf 桶计数], 总和
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+    
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """进程内指标注册表，render() 输出 Prometheus 文本格式"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets or DEFAULT_BUCKETS))
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+checks_total = registry.counter(
+    "checkhub_checks_total", "签到次数（按站点与结果）", ("site", "status")
+)
+check_success_ratio = registry.gauge(
+    "checkhub_check_success_ratio", "站点最近一次签到的成功比例", ("site",)
+)
+check_duration = registry.histogram(
+    "checkhub_check_duration_seconds", "单个账户签到耗时", ("site",), CHECK_BUCKETS
+)
+upstream_request_duration = registry.histogram(
+    "checkhub_upstream_request_duration_seconds", "签到器请求上游的耗时（按主机）", ("host",)
+)
+upstream_request_errors = registry.counter(
+    "checkhub_upstream_request_errors_total", "上游请求失败次数（按主机与错误类型）", ("host", "error")
+)
+notification_queue_depth = registry.gauge(
+    "checkhub_notification_queue_depth", "通知队列中的任务数（按渠道与状态）", ("channel", "status")
+)
+scheduler_job_lag = registry.gauge(
+    "checkhub_scheduler_job_lag_seconds", "定时任务实际开始时间相对计划时间的延迟", ("job",)
+)
+scheduler_jobs_missed = registry.counter(
+    "checkhub_scheduler_jobs_missed_total", "错过执行时间的定时任务次数", ("job",)
+)
+http_request_duration = registry.histogram(
+    "checkhub_http_request_duration_seconds", "Web 请求处理耗时（按路由）", ("route", "method", "status")
+)
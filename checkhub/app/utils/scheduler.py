@@ -1,23 +1,60 @@
+import asyncio
+import time
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from app.config import load_settings, load_sites_config
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_MISSED
+from datetime import datetime, timezone
+from app.config import get_settings, LOGS_DIR
 from app.models import Site
+from app.repository import get_sites_repository
+from app.history import get_history_store
 from app.checkers import get_checker
-from app.notifiers import TelegramNotifier, DingTalkNotifier
-from app.utils.logger import setup_logger, get_main_logger
+from app.checkers.base import CheckResult
+from app.notifiers import CheckDigest, get_notifiers
+from app.notifiers.dispatcher import get_dispatcher
+from app.utils.logger import setup_logger, get_main_logger, site_loggers, log_result, log_account_error
+from app.utils.executor import CheckExecutor, host_of
+from app.utils.circuit_breaker import circuit_breakers, OPEN
+from app.utils.log_catalog import log_catalog
+from app.utils.log_retention import DEFAULT_LOG_SETTINGS, LogRetention
+from app.utils.metrics import check_success_ratio, scheduler_job_lag, scheduler_jobs_missed
 
 
 class CheckScheduler:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_listener(self._on_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED)
         self.logger = get_main_logger()
     
+    def _on_job_event(self, event):
+        """记录定时任务相对计划时间的延迟，以及错过执行的次数"""
+        if event.code == EVENT_JOB_MISSED:
+            scheduler_jobs_missed.inc(job=event.job_id)
+            return
+        scheduled = max(event.scheduled_run_times)
+        lag = (datetime.now(timezone.utc) - scheduled).total_seconds()
+        scheduler_job_lag.set(max(lag, 0.0), job=event.job_id)
+    
     def start(self):
-        settings = load_settings()
+        if self.scheduler.running:
+            return
+        
+        settings = get_settings()
         scheduler_config = settings.get("scheduler", {})
         
+        cleanup_time = settings.get("logs", {}).get("cleanup_time", DEFAULT_LOG_SETTINGS["cleanup_time"])
+        cleanup_hour, cleanup_minute = cleanup_time.split(":")
+        
+        self.scheduler.add_job(
+            self.cleanup_logs,
+            CronTrigger(hour=int(cleanup_hour), minute=int(cleanup_minute)),
+            id="log_retention",
+            replace_existing=True
+        )
+        
         if not scheduler_config.get("enabled", True):
-            self.logger.info("定时任务已禁用")
+            self.scheduler.start()
+            self.logger.info(f"定时签到已禁用，每天 {cleanup_time} 清理日志")
             return
         
         check_time = scheduler_config.get("check_time", "08:00")
@@ -31,7 +68,22 @@ class CheckScheduler:
         )
         
         self.scheduler.start()
-        self.logger.info(f"定时任务已启动，每天 {check_time} 执行签到")
+        self.logger.info(f"定时任务已启动，每天 {check_time} 执行签到，{cleanup_time} 清理日志")
+    
+    async def cleanup_logs(self):
+        site_loggers.prune()
+        retention = LogRetention.from_settings(LOGS_DIR, get_settings())
+        try:
+            stats = await asyncio.to_thread(retention.run)
+        except Exception as e:
+            self.logger.error(f"日志清理失败: {e}")
+            return
+        
+        log_catalog.invalidate()
+        self.logger.info(
+            f"日志清理完成: 压缩 {stats['compressed']} 个，删除 {stats['deleted']} 个，"
+            f"释放 {stats['freed_bytes'] / 1024 / 1024:.1f} MB"
+        )
     
     def stop(self):
         if self.scheduler.running:
@@ -40,61 +92,114 @@ class CheckScheduler:
     
     async def run_all_checks(self):
         self.logger.info("开始执行所有站点签到任务")
-        sites_config = load_sites_config()
+        circuit_breakers.begin_run()
+        try:
+            await self._run_all_checks()
+        finally:
+            circuit_breakers.end_run()
+        self.logger.info("所有站点签到任务执行完成")
+    
+    async def _run_all_checks(self):
+        sites_config = await asyncio.to_thread(get_sites_repository().enabled_sites)
+        executor = CheckExecutor.from_settings(get_settings())
         
-        for site_id, site_data in sites_config.items():
-            site = Site.from_config(site_id, site_data)
-            if site.enabled:
-                await self.check_site(site)
+        sites = [Site.from_config(site_id, site_data) for site_id, site_data in sites_config.items()]
         
-        self.logger.info("所有站点签到任务执行完成")
+        digest = CheckDigest()
+        outcomes = await asyncio.gather(
+            *(self.check_site(site, executor, digest) for site in sites),
+            return_exceptions=True
+        )
+        
+        for site, outcome in zip(sites, outcomes):
+            if isinstance(outcome, Exception):
+                self.logger.error(f"站点 {site.id} 签到异常: {outcome}")
+        
+        await self._send_notifications(digest)
+        for host, state in circuit_breakers.stats().items():
+            if state["state"] == OPEN:
+                self.logger.warning(f"{host} 已熔断（连续 {state['failures']} 次连接失败或超时），下次签到时重新尝试")
+    
+    async def check_site(self, site: Site, executor: CheckExecutor = None, digest: CheckDigest = None):
+        """签到单个站点；传入 digest 时结果汇总到 digest 由调用方统一通知，否则立即发送本站点的通知"""
+        if digest is not None:
+            return await self._check_site(site, executor, digest)
+        
+        # 单独签到也算一次运行；与正在进行的全站签到重叠时不会把其中熔断的主机重新转为半开
+        circuit_breakers.begin_run()
+        try:
+            return await self._check_site(site, executor, digest)
+        finally:
+            circuit_breakers.end_run()
     
-    async def check_site(self, site: Site):
+    async def _check_site(self, site: Site, executor: CheckExecutor, digest: CheckDigest):
         logger = setup_logger(site.id)
         logger.info(f"开始签到: {site.name}")
         
-        results = []
-        
-        for account in site.accounts:
-            if not account.enabled:
-                continue
-            
-            checker_class = get_checker(site.checker_class)
-            checker = checker_class(
-                site.id,
-                site.name,
-                account.model_dump()
-            )
-            
-            result = await checker.check_in()
-            results.append(result)
-            
-            logger.info(f"账户 {account.username}: {result}")
-        
-        await self._send_notifications(site.name, results)
+        if executor is None:
+            executor = CheckExecutor.from_settings(get_settings())
+        
+        checker_class = get_checker(site.checker_class)
+        accounts = [account for account in site.accounts if account.enabled]
+        records = []
+        
+        async def run_account(account):
+            started = time.perf_counter()
+            try:
+                checker = checker_class(
+                    site.id,
+                    site.name,
+                    account.model_dump()
+                )
+                result = await checker.check_in()
+            except Exception as e:
+                return account_failed(account, e, (time.perf_counter() - started) * 1000)
+            duration_ms = (time.perf_counter() - started) * 1000
+            records.append((account.username, result, duration_ms))
+            log_result(logger, account.username, result, duration_ms)
+            return result
+        
+        def account_failed(account, error: Exception, duration_ms: float = 0.0):
+            """单个账户异常只记为该账户失败，不影响同站点的其他账户"""
+            log_account_error(logger, account.username, error, duration_ms)
+            result = CheckResult(False, f"签到异常: {error}")
+            records.append((account.username, result, duration_ms))
+            return result
+        
+        results = await executor.map_accounts(
+            site.id,
+            accounts,
+            run_account,
+            host=host_of(getattr(checker_class, "BASE_URL", None)),
+            site_limit=(site.config or {}).get("concurrency"),
+            sequential=checker_class.sequential,
+            on_error=account_failed
+        )
+        
+        await self._record_history(site.id, records)
+        if results:
+            check_success_ratio.set(sum(1 for r in results if r.success) / len(results), site=site.id)
+        if digest is not None:
+            digest.add(site.name, results)
+        else:
+            single = CheckDigest()
+            single.add(site.name, results)
+            await self._send_notifications(single)
         
         logger.info(f"签到完成: {site.name}")
         return results
     
-    async def _send_notifications(self, site_name: str, results: list):
-        if not results:
+    async def _record_history(self, site_id: str, records: list):
+        try:
+            await asyncio.to_thread(get_history_store().append_many, site_id, records)
+        except Exception as e:
+            self.logger.error(f"站点 {site_id} 签到历史写入失败: {e}")
+    
+    async def _send_notifications(self, digest: CheckDigest):
+        """把汇总通知交给后台队列，不等待发送完成"""
+        if not digest:
             return
         
-        settings = load_settings()
-        notifications = settings.get("notifications", {})
-        
-        telegram_config = notifications.get("telegram", {})
-        if telegram_config.get("enabled", False):
-            notifier = TelegramNotifier(
-                telegram_config.get("bot_token", ""),
-                telegram_config.get("chat_id", "")
-            )
-            await notifier.send_check_result(site_name, results)
-        
-        dingtalk_config = notifications.get("dingtalk", {})
-        if dingtalk_config.get("enabled", False):
-            notifier = DingTalkNotifier(
-                dingtalk_config.get("webhook", ""),
-                dingtalk_config.get("secret", "")
-            )
-            await notifier.send_check_result(site_name, results)
+        dispatcher = get_dispatcher()
+        for name, notifier in get_notifiers().items():
+            await dispatcher.submit(name, notifier.digest_chunks(digest))
@@ -2,8 +2,9 @@ from sanic import Blueprint, response, request
 from sanic.response import html, redirect
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from pathlib import Path
+from functools import wraps
 import uuid
-from app.config import load_settings
+from app.config import get_settings
 
 bp = Blueprint("auth", url_prefix="/auth")
 
@@ -28,6 +29,7 @@ def create_session(request, user_data):
 
 
 def require_auth(func):
+    @wraps(func)
     async def wrapper(request, *args, **kwargs):
         session = get_session(request)
         if not session:
@@ -47,7 +49,7 @@ async def login(request):
     username = request.form.get("username")
     password = request.form.get("password")
     
-    settings = load_settings()
+    settings = get_settings()
     admin = settings.get("admin", {})
     
     if username == admin.get("username") and password == admin.get("password"):
@@ -1,14 +1,26 @@
 from sanic import Blueprint, response
-from sanic.response import html, redirect
+from sanic.response import html, json, redirect
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from pathlib import Path
-from app.config import load_sites_config, load_settings, LOGS_DIR
+from typing import Optional
+from app.config import get_settings, LOGS_DIR
+from app.repository import get_sites_repository
 from app.views.auth import require_auth
-import os
-from datetime import datetime
+from app.utils.log_catalog import is_log_name, log_catalog
+from app.utils.log_pipeline import log_pipeline
+from app.utils.log_index import log_index
+from app.utils.log_reader import (
+    RangeNotSatisfiable, find_tail_offset, is_compressed, iter_file, log_size, parse_range
+)
+import asyncio
+from datetime import date
 
 bp = Blueprint("dashboard", url_prefix="/")
 
+# ?limit= 单次最多返回的字节数，?tail= 最多返回的行数
+MAX_LOG_PAGE_BYTES = 4 * 1024 * 1024
+MAX_TAIL_LINES = 10000
+
 template_dir = Path(__file__).parent.parent / "templates"
 jinja_env = Environment(
     loader=FileSystemLoader(str(template_dir)),
@@ -19,26 +31,10 @@ jinja_env = Environment(
 @bp.route("/")
 @require_auth
 async def index(request):
-    sites_config = load_sites_config()
-    settings = load_settings()
-    
-    sites = []
-    for site_id, site_data in sites_config.items():
-        sites.append({
-            "id": site_id,
-            "name": site_data.get("name", site_id),
-            "enabled": site_data.get("enabled", True),
-            "account_count": len(site_data.get("accounts", []))
-        })
-    
-    logs = []
-    if LOGS_DIR.exists():
-        for log_file in sorted(LOGS_DIR.glob("*.log"), key=os.path.getmtime, reverse=True)[:10]:
-            logs.append({
-                "name": log_file.name,
-                "size": log_file.stat().st_size,
-                "modified": datetime.fromtimestamp(log_file.stat().st_mtime).strftime("%Y-%m-%d %H:%M:%S")
-            })
+    settings = get_settings()
+    sites = await asyncio.to_thread(get_sites_repository().site_summaries)
+    
+    logs = await asyncio.to_thread(log_catalog.newest, 10)
     
     template = jinja_env.get_template("dashboard.html")
     return html(template.render(
@@ -48,14 +44,174 @@ async def index(request):
     ))
 
 
+def non_negative_arg(request, name: str) -> Optional[int]:
+    """读取非负整数参数，缺省时返回 None；不是整数或小于 0 时抛出 ValueError"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    number = int(value)
+    if number < 0:
+        raise ValueError(f"{name} 不能为负数")
+    return number
+
+
+@bp.route("/api/logs", methods=["GET"])
+@require_auth
+async def list_logs(request):
+    try:
+        limit = min(max(int(request.args.get("limit", 10)), 1), 500)
+    except ValueError:
+        return json({"success": False, "error": "参数无效"}, status=400)
+    
+    site = request.args.get("site")
+    # 缓存过期时会重新扫描日志目录，放到线程中执行
+    logs = await asyncio.to_thread(log_catalog.newest, limit, site)
+    sites = await asyncio.to_thread(log_catalog.sites)
+    return json({
+        "success": True,
+        "logs": [{key: entry[key] for key in ("name", "site", "size", "modified")} for entry in logs],
+        "sites": sites
+    })
+
+
+@bp.route("/api/logs/pipeline", methods=["GET"])
+@require_auth
+async def log_pipeline_stats(request):
+    return json({"success": True, "pipeline": log_pipeline.stats()})
+
+
+@bp.route("/api/logs/search", methods=["GET"])
+@require_auth
+async def search_logs(request):
+    """跨天检索 JSON 日志中的签到记录，先按 logs/.index 排除不相关的文件"""
+    try:
+        limit = min(max(int(request.args.get("limit", 100)), 1), 1000)
+        since = request.args.get("since")
+        until = request.args.get("until")
+        filters = {
+            "site": request.args.get("site"),
+            "account": request.args.get("account"),
+            "status": request.args.get("status"),
+            "error": request.args.get("error"),
+            "since": date.fromisoformat(since) if since else None,
+            "until": date.fromisoformat(until) if until else None
+        }
+    except ValueError:
+        return json({"success": False, "error": "参数无效"}, status=400)
+    
+    records = await asyncio.to_thread(log_index.query, limit=limit, **filters)
+    return json({"success": True, "total": len(records), "records": records})
+
+
+def resolve_log_file(log_name: str):
+    """只提供日志目录下由 logger 写出的日志，不提供 .index 等其他文件"""
+    if not is_log_name(log_name):
+        return None
+    log_file = (LOGS_DIR / log_name).resolve()
+    if log_file.parent != LOGS_DIR.resolve() or not log_file.is_file():
+        return None
+    return log_file
+
+
 @bp.route("/logs/<log_name>")
 @require_auth
 async def view_log(request, log_name):
-    log_file = LOGS_DIR / log_name
-    if not log_file.exists():
+    """流式查看日志
+
+    支持 Range 请求头、?tail=N（最后 N 行）、?offset=&limit=（按字节分页）
+    以及 ?follow=1（SSE 实时追踪）。已压缩的 .log.gz 日志按解压后的内容提供。
+    """
+    log_file = await asyncio.to_thread(resolve_log_file, log_name)
+    if log_file is None:
         return response.text("日志文件不存在", status=404)
     
-    with open(log_file, "r", encoding="utf-8") as f:
-        content = f.read()
+    if request.args.get("follow") in ("1", "true") and not is_compressed(log_file):
+        return await follow_log(request, log_file)
+    
+    size = await asyncio.to_thread(log_size, log_file)
+    status = 200
+    headers = {"Accept-Ranges": "bytes", "X-Log-Size": str(size)}
+    
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+        tail = non_negative_arg(request, "tail")
+        offset = non_negative_arg(request, "offset")
+        limit = non_negative_arg(request, "limit")
+        
+        if byte_range is not None:
+            start, end = byte_range
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        elif tail is not None:
+            start, end = await find_tail_offset(log_file, min(tail, MAX_TAIL_LINES), size), size
+        else:
+            start = min(offset or 0, size)
+            end = min(start + min(limit, MAX_LOG_PAGE_BYTES), size) if limit else size
+    except RangeNotSatisfiable:
+        return response.text(
+            "请求的范围无效",
+            status=416,
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    except ValueError:
+        return response.text("参数无效", status=400)
+    
+    headers["X-Next-Offset"] = str(end)
+    headers["Content-Length"] = str(end - start)
+    
+    resp = await request.respond(
+        status=status,
+        headers=headers,
+        content_type="text/plain; charset=utf-8"
+    )
+    async for chunk in iter_file(log_file, start, end):
+        await resp.send(chunk)
+    await resp.eof()
+
+
+async def follow_log(request, log_file: Path):
+    """以 SSE 推送日志新增内容，先发送最后 tail 行（默认 100）"""
+    try:
+        tail = non_negative_arg(request, "tail")
+        tail = 100 if tail is None else min(tail, MAX_TAIL_LINES)
+        interval = max(float(request.args.get("interval", 1)), 0.2)
+    except ValueError:
+        return response.text("参数无效", status=400)
+    
+    resp = await request.respond(
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        content_type="text/event-stream; charset=utf-8"
+    )
+    
+    size = log_file.stat().st_size
+    position = await find_tail_offset(log_file, tail, size)
+    pending = b""
+    
+    while True:
+        try:
+            size = log_file.stat().st_size
+        except FileNotFoundError:
+            break
+        
+        if size < position:
+            position = 0
+            pending = b""
+        
+        if size > position:
+            async for chunk in iter_file(log_file, position, size):
+                pending += chunk
+            position = size
+            
+            lines = pending.split(b"\n")
+            pending = lines.pop()
+            if lines:
+                event = "".join(
+                    f"data: {line.decode('utf-8', errors='replace')}\n" for line in lines
+                )
+                await resp.send(event + "\n")
+        else:
+            await resp.send(": keep-alive\n\n")
+        
+        await asyncio.sleep(interval)
     
-    return response.text(content, content_type="text/plain; charset=utf-8")
+    await resp.eof()
@@ -0,0 +1,66 @@
+from sanic import Blueprint
+from sanic.response import text
+from app.config import get_settings
+from app.notifiers.dispatcher import get_dispatcher
+from app.utils.logger import get_main_logger
+from app.views.auth import get_session
+from app.utils.metrics import registry, notification_queue_depth, http_request_duration
+import asyncio
+import hmac
+import time
+
+bp = Blueprint("metrics")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def install(app):
+    """注册请求耗时中间件，按路由模板记录每个 Web 请求的处理耗时"""
+    
+    @app.on_request
+    async def start_timer(request):
+        request.ctx.metrics_started = time.perf_counter()
+    
+    @app.on_response
+    async def observe_latency(request, response):
+        started = getattr(request.ctx, "metrics_started", None)
+        if started is None or response is None:
+            return
+        route = "/" + request.route.path if request.route else "unmatched"
+        http_request_duration.observe(
+            time.perf_counter() - started,
+            route=route,
+            method=request.method,
+            status=response.status
+        )
+
+
+def _authorized(request, token: str) -> bool:
+    """配置了 token 时校验 Bearer 令牌，否则要求已登录管理后台"""
+    if not token:
+        return get_session(request) is not None
+    header = request.headers.get("authorization", "")
+    return hmac.compare_digest(header, f"Bearer {token}")
+
+
+async def _refresh_queue_depth():
+    try:
+        stats = await asyncio.to_thread(get_dispatcher().stats)
+    except Exception as e:
+        get_main_logger().warning(f"读取通知队列状态失败: {e}")
+        return
+    notification_queue_depth.replace({
+        (row["channel"], row["status"]): row["count"] for row in stats["jobs"]
+    })
+
+
+@bp.route("/metrics", methods=["GET"])
+async def metrics(request):
+    config = get_settings().get("metrics", {})
+    if not config.get("enabled", False):
+        return text("metrics disabled", status=404)
+    if not _authorized(request, config.get("token", "")):
+        return text("unauthorized", status=401)
+    
+    await _refresh_queue_depth()
+    return text(registry.render(), content_type=CONTENT_TYPE)
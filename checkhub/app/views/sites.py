@@ -1,8 +1,10 @@
+import asyncio
 from sanic import Blueprint, response
 from sanic.response import html, json, redirect
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from pathlib import Path
-from app.config import load_sites_config, save_sites_config
+from app.repository import get_sites_repository
+from app.history import get_history_store, parse_time
 from app.models import Site
 from app.utils.scheduler import CheckScheduler
 from app.views.auth import require_auth
@@ -19,7 +21,7 @@ jinja_env = Environment(
 @bp.route("/")
 @require_auth
 async def sites_page(request):
-    sites_config = load_sites_config()
+    sites_config = await asyncio.to_thread(get_sites_repository().get_all)
     
     sites = []
     for site_id, site_data in sites_config.items():
@@ -38,21 +40,40 @@ async def sites_page(request):
 @bp.route("/api/list", methods=["GET"])
 @require_auth
 async def list_sites(request):
-    sites_config = load_sites_config()
-    
-    sites = []
-    for site_id, site_data in sites_config.items():
-        sites.append({
-            "id": site_id,
-            "name": site_data.get("name", site_id),
-            "enabled": site_data.get("enabled", True),
-            "checker_class": site_data.get("checker_class", "BaseChecker"),
-            "account_count": len(site_data.get("accounts", []))
-        })
+    sites = await asyncio.to_thread(get_sites_repository().site_summaries)
     
     return json({"success": True, "sites": sites})
 
 
+@bp.route("/api/accounts/<site_id>", methods=["GET"])
+@require_auth
+async def list_accounts(request, site_id):
+    try:
+        offset = max(int(request.args.get("offset", 0)), 0)
+        limit = min(max(int(request.args.get("limit", 50)), 1), 500)
+    except ValueError:
+        return json({"success": False, "error": "分页参数无效"}, status=400)
+    
+    page = await asyncio.to_thread(get_sites_repository().list_accounts, site_id, offset, limit)
+    
+    if page is None:
+        return json({"success": False, "error": "站点不存在"}, status=404)
+    
+    accounts, total = page
+    return json({
+        "success": True,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "accounts": [
+            {
+                "username": account.get("username"),
+                "enabled": account.get("enabled", True)
+            } for account in accounts
+        ]
+    })
+
+
 @bp.route("/api/add", methods=["POST"])
 @require_auth
 async def add_site(request):
@@ -65,51 +86,36 @@ async def add_site(request):
     if not site_id or not site_name:
         return json({"success": False, "error": "站点ID和名称不能为空"}, status=400)
     
-    sites_config = load_sites_config()
+    added = await get_sites_repository().add_site(site_id, site_name, checker_class)
     
-    if site_id in sites_config:
+    if not added:
         return json({"success": False, "error": "站点ID已存在"}, status=400)
     
-    sites_config[site_id] = {
-        "name": site_name,
-        "enabled": True,
-        "checker_class": checker_class,
-        "accounts": []
-    }
-    
-    save_sites_config(sites_config)
-    
     return json({"success": True, "message": "站点添加成功"})
 
 
 @bp.route("/api/delete/<site_id>", methods=["DELETE"])
 @require_auth
 async def delete_site(request, site_id):
-    sites_config = load_sites_config()
+    deleted = await get_sites_repository().delete_site(site_id)
     
-    if site_id not in sites_config:
+    if not deleted:
         return json({"success": False, "error": "站点不存在"}, status=404)
     
-    del sites_config[site_id]
-    save_sites_config(sites_config)
-    
     return json({"success": True, "message": "站点删除成功"})
 
 
 @bp.route("/api/toggle/<site_id>", methods=["POST"])
 @require_auth
 async def toggle_site(request, site_id):
-    sites_config = load_sites_config()
+    enabled = await get_sites_repository().toggle_site(site_id)
     
-    if site_id not in sites_config:
+    if enabled is None:
         return json({"success": False, "error": "站点不存在"}, status=404)
     
-    sites_config[site_id]["enabled"] = not sites_config[site_id].get("enabled", True)
-    save_sites_config(sites_config)
-    
     return json({
         "success": True,
-        "enabled": sites_config[site_id]["enabled"],
+        "enabled": enabled,
         "message": "状态更新成功"
     })
 
@@ -125,21 +131,14 @@ async def add_account(request, site_id):
     if not username or not password:
         return json({"success": False, "error": "用户名和密码不能为空"}, status=400)
     
-    sites_config = load_sites_config()
-    
-    if site_id not in sites_config:
-        return json({"success": False, "error": "站点不存在"}, status=404)
-    
-    if "accounts" not in sites_config[site_id]:
-        sites_config[site_id]["accounts"] = []
-    
-    sites_config[site_id]["accounts"].append({
+    added = await get_sites_repository().add_account(site_id, {
         "username": username,
         "password": password,
         "enabled": True
     })
     
-    save_sites_config(sites_config)
+    if not added:
+        return json({"success": False, "error": "站点不存在"}, status=404)
     
     return json({"success": True, "message": "账户添加成功"})
 
@@ -147,12 +146,12 @@ async def add_account(request, site_id):
 @bp.route("/api/check/<site_id>", methods=["POST"])
 @require_auth
 async def check_site_now(request, site_id):
-    sites_config = load_sites_config()
+    site_data = await asyncio.to_thread(get_sites_repository().get_site, site_id)
     
-    if site_id not in sites_config:
+    if site_data is None:
         return json({"success": False, "error": "站点不存在"}, status=404)
     
-    site = Site.from_config(site_id, sites_config[site_id])
+    site = Site.from_config(site_id, site_data)
     
     scheduler = CheckScheduler()
     results = await scheduler.check_site(site)
@@ -167,3 +166,40 @@ async def check_site_now(request, site_id):
             } for r in results
         ]
     })
+
+
+@bp.route("/api/history", methods=["GET"])
+@require_auth
+async def history(request):
+    try:
+        offset = max(int(request.args.get("offset", 0)), 0)
+        limit = min(max(int(request.args.get("limit", 50)), 1), 500)
+        since = parse_time(request.args.get("since"))
+        until = parse_time(request.args.get("until"))
+    except ValueError:
+        return json({"success": False, "error": "查询参数无效"}, status=400)
+    
+    success = request.args.get("success")
+    filters = {
+        "site_id": request.args.get("site_id"),
+        "username": request.args.get("username"),
+        "since": since,
+        "until": until,
+        "success": None if success in (None, "") else success.lower() in ("1", "true", "yes")
+    }
+    
+    store = get_history_store()
+    records, total = await asyncio.to_thread(store.query, offset=offset, limit=limit, **filters)
+    
+    response_data = {
+        "success": True,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "records": records
+    }
+    
+    if request.args.get("stats") in ("1", "true"):
+        response_data["stats"] = await asyncio.to_thread(store.daily_stats, **filters)
+    
+    return json(response_data)
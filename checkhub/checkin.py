@@ -11,16 +11,29 @@ CheckHub 命令行签到工具
 import sys
 import asyncio
 import argparse
+import time
+import toml
+from datetime import date
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.config import load_settings, load_sites_config
+from app.config import get_settings, SITES_CONFIG_PATH
 from app.models.site import Site
+from app.repository import get_sites_repository, get_sqlite_repository
+from app.history import get_history_store
 from app.checkers import get_checker
-from app.notifiers.telegram import TelegramNotifier
-from app.notifiers.dingtalk import DingTalkNotifier
-from app.utils.logger import setup_logger, get_main_logger
+from app.checkers.base import CheckResult
+from app.notifiers import CheckDigest, get_notifiers
+from app.notifiers.dispatcher import get_dispatcher
+from app.utils.logger import setup_logger, get_main_logger, log_result, log_account_error
+from app.utils.log_index import log_index
+from app.utils.http import http_clients
+from app.utils.executor import CheckExecutor, host_of
+from app.utils.cookie_jar import cookie_vault
+from app.utils.circuit_breaker import circuit_breakers, CIRCUIT_STATE_PATH
+from app.utils.log_pipeline import log_pipeline
+from app.utils.timing import span, start_recording
 
 
 class CheckInCLI:
@@ -28,92 +41,161 @@ class CheckInCLI:
     
     def __init__(self):
         self.logger = get_main_logger()
-        self.settings = load_settings()
-        self.sites_config = load_sites_config()
+        self.settings = get_settings()
+        self.sites_config = get_sites_repository().get_all()
+        http_clients.configure(self.settings)
+        cookie_vault.configure(self.settings)
+        circuit_breakers.configure(self.settings)
     
-    async def check_site(self, site: Site):
-        """执行单个站点的签到"""
+    async def run(self, site_ids: list = None, report: str = None):
+        """运行签到，等待通知发送后释放共享连接池；未送达的通知留在队列中，下次运行时继续发送。
+        结束时打印站点 / 账户 / 请求 / 通知的耗时统计，传入 report 时同时写入 JSON 文件"""
+        recorder = start_recording()
+        dispatcher = get_dispatcher()
+        await dispatcher.start()
+        circuit_breakers.load(CIRCUIT_STATE_PATH)
+        try:
+            if site_ids:
+                await self.run_specific_sites(site_ids)
+            else:
+                await self.run_all_sites()
+            if not await dispatcher.drain(timeout=60):
+                self.logger.warning("部分通知未在 60 秒内发送完成，将在下次运行时重试")
+        finally:
+            circuit_breakers.save(CIRCUIT_STATE_PATH)
+            await dispatcher.stop()
+            await http_clients.aclose()
+            await asyncio.to_thread(log_pipeline.flush)
+            recorder.finish()
+            print(recorder.render() + "\n")
+            if report:
+                recorder.write(report)
+                print(f"📄 耗时报告已写入 {report}\n")
+    
+    async def check_site(self, site: Site, executor: CheckExecutor = None, digest: CheckDigest = None):
+        """执行单个站点的签到；传入 digest 时只汇总结果，由调用方统一发送通知"""
+        if executor is None:
+            executor = CheckExecutor.from_settings(self.settings)
+        with span(site.id, "site"):
+            return await self._check_site(site, executor, digest)
+    
+    async def _check_site(self, site: Site, executor: CheckExecutor, digest: CheckDigest = None):
+        """账户与 Web 端定时签到一样交给 CheckExecutor 并发执行；站点全部完成后一次性打印，
+        多个站点并发时输出不会交错"""
         logger = setup_logger(site.id)
         logger.info(f"开始签到: {site.name}")
-        print(f"\n{'='*60}")
-        print(f"🌐 站点: {site.name} ({site.id})")
-        print(f"{'='*60}")
-        
-        results = []
         
+        checker_class = get_checker(site.checker_class)
+        accounts = [account for account in site.accounts if account.enabled]
         for account in site.accounts:
             if not account.enabled:
                 logger.info(f"跳过已禁用账户: {account.username}")
-                print(f"⏭️  跳过: {account.username} (已禁用)")
-                continue
-            
-            print(f"\n👤 账户: {account.username}")
-            
+        records = []
+        errors = {}
+        
+        async def run_account(account):
+            started = time.perf_counter()
             try:
-                checker_class = get_checker(site.checker_class)
                 checker = checker_class(
                     site.id,
                     site.name,
                     account.model_dump()
                 )
-                
                 result = await checker.check_in()
-                results.append(result)
-                
-                status = "✅ 成功" if result.success else "❌ 失败"
-                logger.info(f"账户 {account.username}: {result}")
-                print(f"   状态: {status}")
-                print(f"   消息: {result.message}")
-                
-                if result.data:
-                    print(f"   详情: {result.data}")
-            
             except Exception as e:
-                logger.error(f"账户 {account.username} 签到异常: {e}")
-                print(f"   状态: ❌ 异常")
-                print(f"   错误: {e}")
+                return account_failed(account, e, (time.perf_counter() - started) * 1000)
+            duration_ms = (time.perf_counter() - started) * 1000
+            records.append((account.username, result, duration_ms))
+            log_result(logger, account.username, result, duration_ms)
+            return result
         
-        await self._send_notifications(site.name, results)
+        def account_failed(account, error: Exception, duration_ms: float = 0.0):
+            """单个账户异常只记为该账户失败，不影响同站点的其他账户"""
+            log_account_error(logger, account.username, error, duration_ms)
+            errors[id(account)] = error
+            result = CheckResult(False, f"签到异常: {error}")
+            records.append((account.username, result, duration_ms))
+            return result
         
-        logger.info(f"签到完成: {site.name}")
+        results = await executor.map_accounts(
+            site.id,
+            accounts,
+            run_account,
+            host=host_of(getattr(checker_class, "BASE_URL", None)),
+            site_limit=(site.config or {}).get("concurrency"),
+            sequential=checker_class.sequential,
+            on_error=account_failed
+        )
         
-        success_count = sum(1 for r in results if r.success)
-        total_count = len(results)
-        print(f"\n📊 统计: {success_count}/{total_count} 成功")
-        print(f"{'='*60}\n")
+        try:
+            await asyncio.to_thread(get_history_store().append_many, site.id, records)
+        except Exception as e:
+            self.logger.error(f"站点 {site.id} 签到历史写入失败: {e}")
         
+        if digest is not None:
+            digest.add(site.name, results)
+        else:
+            single = CheckDigest()
+            single.add(site.name, results)
+            await self._send_notifications(single)
+        
+        logger.info(f"签到完成: {site.name}")
+        self._print_site(site, dict(zip(map(id, accounts), results)), errors)
         return results
     
-    async def _send_notifications(self, site_name: str, results: list):
-        """发送通知"""
-        if not results:
-            return
+    @staticmethod
+    def _print_site(site: Site, results: dict, errors: dict):
+        print(f"\n{'='*60}")
+        print(f"🌐 站点: {site.name} ({site.id})")
+        print(f"{'='*60}")
         
-        notifications = self.settings.get("notifications", {})
+        for account in site.accounts:
+            if not account.enabled:
+                print(f"⏭️  跳过: {account.username} (已禁用)")
+                continue
+            
+            print(f"\n👤 账户: {account.username}")
+            if id(account) in errors:
+                print(f"   状态: ❌ 异常")
+                print(f"   错误: {errors[id(account)]}")
+                continue
+            
+            result = results[id(account)]
+            status = "✅ 成功" if result.success else "❌ 失败"
+            print(f"   状态: {status}")
+            print(f"   消息: {result.message}")
+            if result.data:
+                print(f"   详情: {result.data}")
         
-        telegram_config = notifications.get("telegram", {})
-        if telegram_config.get("enabled", False):
-            try:
-                notifier = TelegramNotifier(
-                    telegram_config.get("bot_token", ""),
-                    telegram_config.get("chat_id", "")
-                )
-                await notifier.send_check_result(site_name, results)
-                self.logger.info(f"Telegram 通知已发送: {site_name}")
-            except Exception as e:
-                self.logger.error(f"Telegram 通知发送失败: {e}")
+        success_count = sum(1 for r in results.values() if r.success)
+        print(f"\n📊 统计: {success_count}/{len(results)} 成功")
+        print(f"{'='*60}\n")
+    
+    async def _check_sites(self, sites: list):
+        """所有站点共用一个 CheckExecutor 并发签到，与 Web 端的定时签到相同；汇总后统一发送通知"""
+        executor = CheckExecutor.from_settings(self.settings)
+        digest = CheckDigest()
+        outcomes = await asyncio.gather(
+            *(self.check_site(site, executor, digest) for site in sites),
+            return_exceptions=True
+        )
         
-        dingtalk_config = notifications.get("dingtalk", {})
-        if dingtalk_config.get("enabled", False):
-            try:
-                notifier = DingTalkNotifier(
-                    dingtalk_config.get("webhook", ""),
-                    dingtalk_config.get("secret", "")
-                )
-                await notifier.send_check_result(site_name, results)
-                self.logger.info(f"钉钉通知已发送: {site_name}")
-            except Exception as e:
-                self.logger.error(f"钉钉通知发送失败: {e}")
+        for site, outcome in zip(sites, outcomes):
+            if isinstance(outcome, Exception):
+                self.logger.error(f"站点 {site.id} 签到异常: {outcome}")
+                print(f"\n❌ 站点 {site.id} 签到异常: {outcome}")
+        
+        await self._send_notifications(digest)
+    
+    async def _send_notifications(self, digest: CheckDigest):
+        """把汇总通知放入通知队列：每个渠道一条（超长时分段）"""
+        if not digest:
+            return
+        
+        dispatcher = get_dispatcher()
+        for name, notifier in get_notifiers().items():
+            count = await dispatcher.submit(name, notifier.digest_chunks(digest))
+            self.logger.info(f"{name} 通知已入队: {len(digest.sites)} 个站点，{count} 条消息")
     
     async def run_all_sites(self):
         """运行所有启用的站点签到"""
@@ -134,8 +216,7 @@ class CheckInCLI:
         
         print(f"\n📋 共找到 {len(enabled_sites)} 个启用的站点")
         
-        for site in enabled_sites:
-            await self.check_site(site)
+        await self._check_sites(enabled_sites)
         
         self.logger.info("所有站点签到任务执行完成")
         print("✅ 所有站点签到任务执行完成\n")
@@ -148,6 +229,7 @@ class CheckInCLI:
         print("="*60)
         print(f"\n📋 指定站点: {', '.join(site_ids)}")
         
+        sites = []
         for site_id in site_ids:
             if site_id not in self.sites_config:
                 print(f"\n⚠️  站点 '{site_id}' 不存在，跳过")
@@ -162,8 +244,9 @@ class CheckInCLI:
                 self.logger.warning(f"站点 '{site_id}' 已禁用")
                 continue
             
-            await self.check_site(site)
+            sites.append(site)
         
+        await self._check_sites(sites)
         self.logger.info("指定站点签到任务执行完成")
         print("✅ 指定站点签到任务执行完成\n")
     
@@ -188,6 +271,57 @@ class CheckInCLI:
             print(f"  签到器: {site.checker_class}")
             print(f"  账户数: {accounts_count}/{len(site.accounts)}")
             print()
+    
+    def import_toml(self, path: str = None):
+        """把 TOML 站点配置导入 SQLite 存储"""
+        source = Path(path) if path else SITES_CONFIG_PATH
+        if not source.exists():
+            print(f"\n⚠️  配置文件不存在: {source}\n")
+            return
+        
+        with open(source, "r", encoding="utf-8") as f:
+            config = toml.load(f)
+        
+        repository = get_sqlite_repository()
+        count = repository.import_config(config)
+        print(f"\n✅ 已导入 {len(config)} 个站点、{count} 个账户到 {repository.db.path}\n")
+    
+    def search_logs(self, site_ids: list, account: str = None, status: str = None,
+                    error: str = None, since: str = None, until: str = None, limit: int = 100):
+        """按账户、状态、错误类型、日期检索 JSON 日志（需要 [logs] format = "json"）"""
+        try:
+            since_date = date.fromisoformat(since) if since else None
+            until_date = date.fromisoformat(until) if until else None
+        except ValueError:
+            print("\n⚠️  日期格式应为 YYYY-MM-DD\n")
+            return
+        
+        records = []
+        for site_id in site_ids or [None]:
+            records.extend(log_index.query(
+                site=site_id,
+                account=account,
+                status=status,
+                error=error,
+                since=since_date,
+                until=until_date,
+                limit=limit
+            ))
+        records.sort(key=lambda record: record.get("time", ""), reverse=True)
+        
+        print(f"\n🔍 找到 {len(records[:limit])} 条记录\n")
+        for record in records[:limit]:
+            duration = f" {record['duration_ms']}ms" if record.get("duration_ms") is not None else ""
+            print(f"{record.get('time')} [{record.get('site_id')}] {record.get('status', '-')}{duration} {record.get('message')}")
+        print()
+    
+    def export_toml(self, path: str):
+        """把 SQLite 存储中的站点配置导出为 TOML"""
+        repository = get_sqlite_repository()
+        config = repository.export_config()
+        with open(path, "w", encoding="utf-8") as f:
+            toml.dump(config, f)
+        print(f"\n✅ 已导出 {len(config)} 个站点到 {path}\n")
 
 
 def main():
@@ -199,7 +333,12 @@ def main():
   %(prog)s                     # 运行所有启用的站点签到
   %(prog)s example             # 运行指定站点签到
   %(prog)s example glados      # 运行多个指定站点签到
+  %(prog)s --report run.json   # 运行签到并把耗时统计写入 run.json
   %(prog)s --list              # 列出所有站点
+  %(prog)s --import-toml       # 把 config/sites.toml 导入 SQLite 存储
+  %(prog)s --export-toml out.toml  # 把 SQLite 存储导出为 TOML
+  %(prog)s --search-logs --account user1 --status failed --since 2024-01-01
+                               # 检索 JSON 日志
   %(prog)s --help              # 显示帮助信息
         '''
     )
@@ -216,6 +355,39 @@ def main():
         help='列出所有站点'
     )
     
+    parser.add_argument(
+        '--import-toml',
+        nargs='?',
+        const='',
+        metavar='PATH',
+        help='把 TOML 站点配置导入 SQLite 存储（默认 config/sites.toml）'
+    )
+    
+    parser.add_argument(
+        '--export-toml',
+        metavar='PATH',
+        help='把 SQLite 存储中的站点配置导出为 TOML 文件'
+    )
+    
+    parser.add_argument(
+        '--search-logs',
+        action='store_true',
+        help='检索 JSON 日志（位置参数作为站点过滤条件）'
+    )
+    
+    parser.add_argument('--account', help='检索日志时按账户过滤')
+    parser.add_argument('--status', choices=['success', 'failed', 'error'], help='检索日志时按状态过滤')
+    parser.add_argument('--error', help='检索日志时按异常类型过滤，如 TimeoutException')
+    parser.add_argument('--since', help='检索日志的起始日期（含），YYYY-MM-DD')
+    parser.add_argument('--until', help='检索日志的结束日期（含），YYYY-MM-DD')
+    parser.add_argument('--limit', type=int, default=100, help='检索日志最多返回的条数，默认 100')
+    
+    parser.add_argument(
+        '--report',
+        metavar='PATH',
+        help='把本次运行的耗时统计（站点 / 账户 / 请求 / 通知的 p50、p95、最大值）写入 JSON 文件'
+    )
+    
     parser.add_argument(
         '-v', '--version',
         action='version',
@@ -230,10 +402,19 @@ def main():
         cli.list_sites()
         return
     
-    if args.sites:
-        asyncio.run(cli.run_specific_sites(args.sites))
-    else:
-        asyncio.run(cli.run_all_sites())
+    if args.import_toml is not None:
+        cli.import_toml(args.import_toml or None)
+        return
+    
+    if args.export_toml:
+        cli.export_toml(args.export_toml)
+        return
+    
+    if args.search_logs:
+        cli.search_logs(args.sites, args.account, args.status, args.error, args.since, args.until, args.limit)
+        return
+    
+    asyncio.run(cli.run(args.sites, args.report))
 
 
 if __name__ == "__main__":
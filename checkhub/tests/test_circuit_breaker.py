@@ -0,0 +1,205 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.checkers.base import BaseChecker, CheckResult
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreakerRegistry, CircuitOpenError
+from app.utils.metrics import checks_total
+
+
+HOST = "example.com"
+
+
+def opened(threshold=2):
+    breakers = CircuitBreakerRegistry(failure_threshold=threshold)
+    for _ in range(threshold):
+        breakers.record_failure(HOST)
+    return breakers
+
+
+def half_open(monkeypatch):
+    """把全局熔断器换成一个已半开的 HOST"""
+    breakers = opened()
+    breakers.begin_run()
+    monkeypatch.setattr(circuit_breaker.circuit_breakers, "_circuits", breakers._circuits)
+    return breakers
+
+
+class FakeClient:
+    """记录并发请求数的上游；error 不为空时每个请求都抛出该异常"""
+    
+    def __init__(self, error=None, delay=0.02):
+        self.error = error
+        self.delay = delay
+        self.sent = 0
+        self.active = 0
+        self.peak = 0
+    
+    def client_for(self, url):
+        return self
+    
+    def build_request(self, method, url, **kwargs):
+        return httpx.Request(method, url)
+    
+    async def send(self, request, follow_redirects=False):
+        self.sent += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return httpx.Response(200, request=request)
+        finally:
+            self.active -= 1
+
+
+def checker_for(client):
+    class Checker(BaseChecker):
+        BASE_URL = f"https://{HOST}"
+        
+        @property
+        def http(self):
+            return client
+        
+        async def _do_check_in(self):
+            await self.request("POST", f"https://{HOST}/checkin")
+            return CheckResult(True, "ok")
+    
+    return Checker
+
+
+def run_accounts(client, count):
+    checker = checker_for(client)
+    
+    async def main():
+        return await asyncio.gather(*(
+            checker("breaker-test", "Test", {"username": f"user{i}"}).check_in() for i in range(count)
+        ))
+    
+    return asyncio.run(main())
+
+
+def test_opens_after_consecutive_failures():
+    breakers = CircuitBreakerRegistry(failure_threshold=3)
+    breakers.record_failure(HOST)
+    breakers.record_failure(HOST)
+    asyncio.run(breakers.check(HOST))
+    
+    breakers.record_failure(HOST)
+    
+    assert breakers.stats()[HOST]["state"] == OPEN
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(breakers.check(HOST))
+
+
+def test_success_resets_failure_count():
+    breakers = CircuitBreakerRegistry(failure_threshold=2)
+    breakers.record_failure(HOST)
+    breakers.record_success(HOST)
+    breakers.record_failure(HOST)
+    
+    assert breakers.stats()[HOST]["state"] == CLOSED
+
+
+def test_half_open_requests_wait_for_the_probe():
+    async def main():
+        breakers = opened()
+        breakers.begin_run()
+        assert await breakers.check(HOST, probe=False) is False
+        assert await breakers.check(HOST) is True
+        
+        waiter = asyncio.create_task(breakers.check(HOST))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        
+        breakers.record_success(HOST)
+        assert await waiter is False
+        return breakers
+    
+    assert asyncio.run(main()).stats()[HOST]["state"] == CLOSED
+
+
+def test_waiting_requests_are_rejected_when_the_probe_fails():
+    async def main():
+        breakers = opened()
+        breakers.begin_run()
+        await breakers.check(HOST)
+        waiter = asyncio.create_task(breakers.check(HOST))
+        await asyncio.sleep(0.01)
+        
+        breakers.record_failure(HOST)
+        with pytest.raises(CircuitOpenError):
+            await waiter
+        return breakers
+    
+    assert asyncio.run(main()).stats()[HOST]["state"] == OPEN
+
+
+def test_released_probe_hands_over_to_a_waiting_request():
+    async def main():
+        breakers = opened()
+        breakers.begin_run()
+        await breakers.check(HOST)
+        waiter = asyncio.create_task(breakers.check(HOST))
+        await asyncio.sleep(0.01)
+        
+        breakers.release(HOST)
+        return await waiter, breakers
+    
+    became_probe, breakers = asyncio.run(main())
+    
+    assert became_probe is True
+    assert breakers.stats()[HOST]["state"] == HALF_OPEN
+
+
+def test_overlapping_run_keeps_circuit_open():
+    breakers = opened()
+    breakers.begin_run()
+    breakers.record_failure(HOST)
+    
+    breakers.begin_run()
+    breakers.end_run()
+    
+    assert breakers.stats()[HOST]["state"] == OPEN
+    breakers.end_run()
+    breakers.begin_run()
+    assert breakers.stats()[HOST]["state"] == HALF_OPEN
+
+
+def test_concurrent_accounts_on_recovered_half_open_host_all_check_in(monkeypatch):
+    breakers = half_open(monkeypatch)
+    client = FakeClient()
+    
+    results = run_accounts(client, 5)
+    
+    assert [result.success for result in results] == [True] * 5
+    assert client.sent == 5
+    # 探测请求单独进行，成功后等待中的 4 个账户同时放行
+    assert client.peak == 4
+    assert breakers.stats()[HOST]["state"] == CLOSED
+
+
+def test_concurrent_accounts_are_skipped_when_the_probe_fails(monkeypatch):
+    breakers = half_open(monkeypatch)
+    client = FakeClient(error=httpx.ConnectError("refused"))
+    before = checks_total.value(site="breaker-test", status="skipped")
+    
+    results = run_accounts(client, 5)
+    
+    assert client.sent == 1
+    assert [result.message.startswith("已跳过") for result in results].count(True) == 4
+    assert checks_total.value(site="breaker-test", status="skipped") == before + 4
+    assert breakers.stats()[HOST]["state"] == OPEN
+
+
+def test_request_releases_probe_on_non_connection_error(monkeypatch):
+    breakers = half_open(monkeypatch)
+    checker = checker_for(FakeClient(error=httpx.DecodingError("bad body")))("breaker-test", "Test", {"username": "alice"})
+    
+    with pytest.raises(httpx.DecodingError):
+        asyncio.run(checker.request("GET", f"https://{HOST}/"))
+    
+    assert asyncio.run(breakers.check(HOST)) is True
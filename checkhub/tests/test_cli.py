@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+import checkin
+from app.checkers.base import CheckResult
+from app.models.site import Account, Site
+
+
+class Tracker:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+
+@pytest.fixture
+def cli(monkeypatch):
+    tracker = Tracker()
+    
+    class Checker:
+        sequential = False
+        BASE_URL = None
+        
+        def __init__(self, site_id, site_name, account):
+            self.username = account["username"]
+        
+        async def check_in(self):
+            tracker.active += 1
+            tracker.peak = max(tracker.peak, tracker.active)
+            try:
+                await asyncio.sleep(0.01)
+            finally:
+                tracker.active -= 1
+            if self.username == "broken":
+                raise RuntimeError("boom")
+            return CheckResult(True, f"{self.username} ok")
+    
+    monkeypatch.setattr(checkin, "get_checker", lambda name: Checker)
+    monkeypatch.setattr(checkin, "setup_logger", lambda site_id: logging.getLogger("checkhub.cli-test"))
+    monkeypatch.setattr(checkin, "get_history_store", lambda: SimpleNamespace(append_many=lambda *args: None))
+    monkeypatch.setattr(checkin, "get_notifiers", dict)
+    
+    cli = checkin.CheckInCLI.__new__(checkin.CheckInCLI)
+    cli.logger = logging.getLogger("checkhub.cli-test")
+    cli.settings = {"concurrency": {"max_concurrency": 4, "per_site": 2, "per_host": 10}}
+    cli.tracker = tracker
+    return cli
+
+
+def make_site(site_id, usernames):
+    return Site.from_config(site_id, {
+        "name": site_id.upper(),
+        "accounts": [{"username": name, "password": ""} for name in usernames]
+    })
+
+
+def test_sites_run_through_shared_executor(cli, capsys):
+    sites = [make_site(site_id, [f"{site_id}{i}" for i in range(4)]) for site_id in ("a", "b", "c")]
+    
+    asyncio.run(cli._check_sites(sites))
+    
+    # 站点之间并发，全局上限 4，每站点上限 2
+    assert cli.tracker.peak == 4
+    
+    # 每个站点的输出是连续的一段，不与其他站点交错
+    output = capsys.readouterr().out
+    for site in sites:
+        block = output[output.index(f"({site.id})"):]
+        block = block[:block.index("📊 统计")]
+        assert [line.split(": ")[1] for line in block.splitlines() if "👤 账户" in line] == [
+            account.username for account in site.accounts
+        ]
+    assert output.count("📊 统计: 4/4 成功") == 3
+
+
+def test_failing_account_does_not_stop_the_site(cli, capsys):
+    site = make_site("a", ["x", "broken", "y"])
+    site.accounts.insert(1, Account(username="off", password="", enabled=False))
+    
+    results = asyncio.run(cli.check_site(site, digest=checkin.CheckDigest()))
+    
+    assert [r.success for r in results] == [True, False, True]
+    output = capsys.readouterr().out
+    assert "错误: boom" in output
+    assert "⏭️  跳过: off (已禁用)" in output
+    assert "📊 统计: 2/3 成功" in output
@@ -0,0 +1,111 @@
+import os
+
+import pytest
+import toml
+
+from app import config as config_module
+from app.config import ConfigStore, thaw
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "sites.toml"
+    path.write_text('[a]\nname = "A"\naccounts = [ "x" ]\n', encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+    real_load = config_module.toml.load
+    
+    def counting_load(f):
+        calls.append(f.name)
+        return real_load(f)
+    
+    monkeypatch.setattr(config_module.toml, "load", counting_load)
+    return calls
+
+
+def test_snapshot_is_cached_and_read_only(path, loads):
+    store = ConfigStore(path, dict)
+    
+    snapshot = store.get()
+    assert store.get() is snapshot
+    assert len(loads) == 1
+    
+    with pytest.raises(TypeError):
+        snapshot["b"] = {}
+    with pytest.raises(TypeError):
+        snapshot["a"]["name"] = "B"
+    assert snapshot["a"]["accounts"] == ("x",)
+    
+    copy = thaw(snapshot)
+    copy["a"]["accounts"].append("y")
+    assert store.get()["a"]["accounts"] == ("x",)
+
+
+def test_mtime_change_invalidates(path, loads):
+    store = ConfigStore(path, dict)
+    store.get()
+    stat = path.stat()
+    
+    # 大小不变，只有 mtime 变化
+    path.write_text('[a]\nname = "B"\naccounts = [ "x" ]\n', encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    
+    assert store.get()["a"]["name"] == "B"
+    assert len(loads) == 2
+
+
+def test_size_change_invalidates(path, loads):
+    store = ConfigStore(path, dict)
+    store.get()
+    stat = path.stat()
+    
+    # mtime 不变，只有大小变化
+    path.write_text('[a]\nname = "AB"\naccounts = [ "x" ]\n', encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    
+    assert store.get()["a"]["name"] == "AB"
+    assert len(loads) == 2
+
+
+def test_missing_file_writes_defaults(tmp_path):
+    path = tmp_path / "settings.toml"
+    store = ConfigStore(path, lambda: {"admin": {"username": "admin"}})
+    
+    assert store.get()["admin"]["username"] == "admin"
+    assert toml.load(path) == {"admin": {"username": "admin"}}
+
+
+def test_save_updates_snapshot_and_keeps_mode(path, loads):
+    os.chmod(path, 0o600)
+    store = ConfigStore(path, dict)
+    version = store.version
+    
+    store.save({"b": {"name": "B"}})
+    
+    # 保存后直接使用新快照，不重新解析文件
+    assert store.get() == {"b": {"name": "B"}}
+    assert store.version == version + 1
+    assert not loads
+    assert toml.loads(path.read_text(encoding="utf-8")) == {"b": {"name": "B"}}
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_failed_write_keeps_original_file(path, monkeypatch):
+    store = ConfigStore(path, dict)
+    original = path.read_bytes()
+    
+    def broken_dump(data, f):
+        f.write("[partial")
+        raise OSError("disk full")
+    
+    monkeypatch.setattr(config_module.toml, "dump", broken_dump)
+    with pytest.raises(OSError):
+        store.save({"b": {}})
+    
+    assert path.read_bytes() == original
+    assert [p.name for p in path.parent.iterdir()] == ["sites.toml"]
+    assert store.get()["a"]["name"] == "A"
@@ -0,0 +1,184 @@
+import asyncio
+import os
+import time
+
+import httpx
+from cryptography.fernet import Fernet
+
+from app.checkers.base import BaseChecker, CheckResult
+from app.checkers.glados import GladosChecker
+from app.utils import cookie_jar
+from app.utils.cookie_jar import CookieVault, make_cookie
+
+
+def vault_for(tmp_path, **kwargs):
+    return CookieVault(tmp_path / "cookies", key=Fernet.generate_key().decode(), **kwargs)
+
+
+def test_saved_session_round_trip(tmp_path):
+    vault = vault_for(tmp_path)
+    cookies = httpx.Cookies()
+    cookies.jar.set_cookie(make_cookie("session", "abc=", "example.com", expires=int(time.time()) + 3600))
+    cookies.jar.set_cookie(make_cookie("koa:sess", "eyJ1c2VySWQiOjE=", "example.com"))
+    
+    vault.save("glados", "alice", cookies, seed="koa:sess=seed")
+    loaded = vault.load("glados", "alice", seed="koa:sess=seed", domain="example.com")
+    
+    assert {cookie.name: cookie.value for cookie in loaded.jar} == {"session": "abc=", "koa:sess": "eyJ1c2VySWQiOjE="}
+    assert b"eyJ1c2VySWQiOjE" not in next((tmp_path / "cookies").glob("*.bin")).read_bytes()
+
+
+def test_changed_seed_discards_saved_session(tmp_path):
+    vault = vault_for(tmp_path)
+    cookies = httpx.Cookies()
+    cookies.jar.set_cookie(make_cookie("session", "old", "example.com"))
+    vault.save("glados", "alice", cookies, seed="a=1")
+    
+    loaded = vault.load("glados", "alice", seed="a=2", domain="example.com")
+    
+    assert {cookie.name: cookie.value for cookie in loaded.jar} == {"a": "2"}
+
+
+def test_expired_session_cookies_are_dropped(tmp_path):
+    vault = vault_for(tmp_path, session_ttl=0)
+    vault.save_records("glados", "alice", [
+        {"name": "session", "value": "x", "domain": "example.com", "path": "/", "expires": None, "secure": False},
+        {"name": "remember", "value": "y", "domain": "example.com", "path": "/", "expires": int(time.time()) + 60, "secure": False}
+    ])
+    
+    assert [record["name"] for record in vault.load_records("glados", "alice")] == ["remember"]
+
+
+def test_key_file_is_used_and_created_outside_data_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv(cookie_jar.COOKIE_KEY_ENV, raising=False)
+    key_file = tmp_path / "secrets" / "cookie.key"
+    vault = CookieVault(tmp_path / "cookies", key_file=str(key_file))
+    vault.save_records("glados", "alice", [
+        {"name": "a", "value": "1", "domain": "example.com", "path": "/", "expires": None, "secure": False}
+    ])
+    
+    assert key_file.exists()
+    assert os.stat(key_file).st_mode & 0o777 == 0o600
+    assert not (tmp_path / "cookies" / ".key").exists()
+    assert CookieVault(tmp_path / "cookies", key_file=str(key_file)).load_records("glados", "alice")
+
+
+def test_existing_key_is_reused_when_another_process_wins(tmp_path, monkeypatch):
+    key_path = tmp_path / "cookie.key"
+    existing = Fernet.generate_key().decode()
+    real_link = os.link
+    
+    def link_after_other_process(src, dst):
+        key_path.write_text(existing)
+        return real_link(src, dst)
+    
+    monkeypatch.setattr(cookie_jar.os, "link", link_after_other_process)
+    
+    assert CookieVault._read_key(key_path) == existing
+    assert list(tmp_path.iterdir()) == [key_path]
+
+
+def test_check_in_continues_when_vault_fails(monkeypatch):
+    def broken(*args, **kwargs):
+        raise OSError("disk full")
+    
+    monkeypatch.setattr(cookie_jar.cookie_vault, "load", broken)
+    monkeypatch.setattr(cookie_jar.cookie_vault, "save", broken)
+    
+    class Checker(BaseChecker):
+        BASE_URL = "https://example.com"
+        
+        async def _do_check_in(self):
+            return CheckResult(True, dict(self.session_cookies))
+    
+    result = asyncio.run(Checker("site", "Site", {"username": "alice", "cookies": "a=1"}).check_in())
+    
+    assert result.success
+    assert result.message == {"a": "1"}
+
+
+def test_glados_checks_in_without_saved_session(monkeypatch):
+    sent = []
+    
+    class Client:
+        def client_for(self, url):
+            return self
+        
+        def build_request(self, method, url, **kwargs):
+            return httpx.Request(method, url, **kwargs)
+        
+        async def send(self, request, follow_redirects=False):
+            sent.append((request.method, str(request.url), request.headers.get("Cookie")))
+            return httpx.Response(200, json={"code": 1, "message": "请先登录"}, request=request)
+    
+    monkeypatch.setattr(cookie_jar.cookie_vault, "load", lambda *args: httpx.Cookies())
+    monkeypatch.setattr(cookie_jar.cookie_vault, "save", lambda *args: None)
+    monkeypatch.setattr(GladosChecker, "http", property(lambda self: Client()))
+    
+    result = asyncio.run(GladosChecker("glados", "GLaDOS", {"username": "alice"}).check_in())
+    
+    # 没有会话 Cookie 时仍然发送签到请求，由上游返回具体原因
+    assert sent == [("POST", "https://glados.rocks/api/user/checkin", None)]
+    assert result.message == "签到失败: 请先登录"
+
+
+class LoginChecker(BaseChecker):
+    """第一次请求用 Cookie 中的 token 签到，token 不是 fresh 时上游返回 401"""
+    BASE_URL = "https://example.com"
+    
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.logins = 0
+        self.attempts = 0
+    
+    async def login(self):
+        self.logins += 1
+        self.session_cookies.set("token", "fresh", domain="example.com")
+        return True
+    
+    async def _do_check_in(self):
+        self.attempts += 1
+        if self.session_cookies.get("token") != "fresh":
+            self.auth_rejected = True
+            return CheckResult(False, "HTTP 401")
+        return CheckResult(True, "ok")
+
+
+def run_login_checker(monkeypatch, saved):
+    monkeypatch.setattr(cookie_jar.cookie_vault, "load", lambda *args: saved)
+    monkeypatch.setattr(cookie_jar.cookie_vault, "save", lambda *args: None)
+    checker = LoginChecker("site", "Site", {"username": "alice"})
+    return checker, asyncio.run(checker.check_in())
+
+
+def test_check_in_logs_in_without_session(monkeypatch):
+    checker, result = run_login_checker(monkeypatch, httpx.Cookies())
+    
+    assert result.success
+    assert (checker.logins, checker.attempts) == (1, 1)
+
+
+def test_check_in_logs_in_again_after_auth_rejected(monkeypatch):
+    checker, result = run_login_checker(monkeypatch, httpx.Cookies({"token": "stale"}))
+    
+    assert result.success
+    assert (checker.logins, checker.attempts) == (1, 2)
+
+
+def test_request_marks_auth_rejected(monkeypatch):
+    class Client:
+        def client_for(self, url):
+            return self
+        
+        def build_request(self, method, url, **kwargs):
+            return httpx.Request(method, url, **kwargs)
+        
+        async def send(self, request, follow_redirects=False):
+            return httpx.Response(403, request=request)
+    
+    monkeypatch.setattr(LoginChecker, "http", property(lambda self: Client()))
+    checker = LoginChecker("site", "Site", {"username": "alice"})
+    
+    asyncio.run(checker.request("GET", "https://example.com/api"))
+    
+    assert checker.auth_rejected
@@ -0,0 +1,80 @@
+import html
+
+import pytest
+
+from app.checkers.base import CheckResult
+from app.notifiers.digest import CheckDigest, split_message, utf8_len
+from app.notifiers.dingtalk import DingTalkNotifier
+from app.notifiers.telegram import TelegramNotifier
+
+
+def lines_of(chunks):
+    return [line for chunk in chunks for line in chunk.split("\n") if line]
+
+
+@pytest.mark.parametrize("measure", [len, utf8_len])
+def test_split_keeps_whole_lines(measure):
+    lines = [f"{i} 签到成功 " + "x" * (i % 7) for i in range(200)]
+    text = "\n".join(lines)
+    
+    chunks = split_message(text, 120, measure)
+    
+    assert len(chunks) > 1
+    assert all(measure(chunk) <= 120 for chunk in chunks)
+    assert lines_of(chunks) == lines
+
+
+def test_short_message_is_not_split():
+    assert split_message("a\nb", 10) == ["a\nb"]
+
+
+@pytest.mark.parametrize("measure", [len, utf8_len])
+def test_split_hard_cuts_a_single_long_line(measure):
+    long_line = "签到" * 50 + "abc"
+    
+    chunks = split_message(f"first\n{long_line}\nlast", 16, measure)
+    
+    assert all(0 < measure(chunk) <= 16 for chunk in chunks)
+    assert chunks[0] == "first"
+    # 超长行按字符切开，切剩的部分与下一行合并，不丢字符
+    assert "".join(chunks[1:]) == f"{long_line}\nlast"
+
+
+def test_split_skips_chunks_of_blank_lines():
+    assert split_message("aaaa\n\n" + "b" * 12, 5) == ["aaaa", "bbbbb", "bbbbb", "bb"]
+
+
+def make_digest(sites, accounts, message="签到成功，获得 1 天 <b>&</b>"):
+    digest = CheckDigest()
+    for i in range(sites):
+        digest.add(f"站点{i}", [CheckResult(j % 3 != 0, f"{message} #{j}") for j in range(accounts)])
+    return digest
+
+
+@pytest.mark.parametrize("notifier, limit, measure", [
+    (TelegramNotifier({}), TelegramNotifier.MAX_LENGTH, len),
+    (DingTalkNotifier({}), DingTalkNotifier.MAX_BYTES, utf8_len),
+])
+def test_digest_chunks_fit_channel_limit(notifier, limit, measure):
+    digest = make_digest(sites=20, accounts=60)
+    
+    chunks = notifier.digest_chunks(digest)
+    
+    assert len(chunks) > 1
+    assert all(measure(chunk) <= limit for chunk in chunks)
+    for i, chunk in enumerate(chunks, 1):
+        assert f"({i}/{len(chunks)})" in chunk.split("\n", 1)[0]
+    
+    # 去掉每段重复的标题后，正文各行完整且顺序不变
+    escape = html.escape if isinstance(notifier, TelegramNotifier) else str
+    bold = (lambda text: f"<b>{text}</b>") if isinstance(notifier, TelegramNotifier) else str
+    _, body = digest.render(bold=bold, escape=escape)
+    assert lines_of(chunk.split("\n\n", 1)[1] for chunk in chunks) == [line for line in body.split("\n") if line]
+
+
+def test_single_site_digest_is_one_chunk():
+    chunks = TelegramNotifier({}).digest_chunks(make_digest(sites=1, accounts=2))
+    
+    assert len(chunks) == 1
+    assert chunks[0].startswith("<b>📋 签到报告 - 站点0</b>\n\n成功: 1/2")
+    assert "&lt;b&gt;&amp;&lt;/b&gt;" in chunks[0]
@@ -0,0 +1,58 @@
+import base64
+import hashlib
+import hmac
+from types import SimpleNamespace
+from urllib.parse import quote_plus
+
+import pytest
+
+from app.notifiers import dingtalk
+from app.notifiers.dingtalk import DingTalkNotifier
+
+
+WEBHOOK = "https://oapi.dingtalk.com/robot/send?access_token=token"
+SECRET = "SEC123"
+
+
+def reference_sign(timestamp: int) -> str:
+    """文档中的签名算法，每次重新计算"""
+    string_to_sign = f"{timestamp}\n{SECRET}".encode("utf-8")
+    digest = hmac.new(SECRET.encode("utf-8"), string_to_sign, digestmod=hashlib.sha256).digest()
+    return quote_plus(base64.b64encode(digest))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1700000000.0001)
+    monkeypatch.setattr(dingtalk, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_signed_url_is_cached_within_a_millisecond(clock, monkeypatch):
+    notifier = DingTalkNotifier({"webhook": WEBHOOK, "secret": SECRET})
+    calls = []
+    sign = notifier._sign
+    monkeypatch.setattr(notifier, "_sign", lambda timestamp: calls.append(timestamp) or sign(timestamp))
+    
+    url = notifier.signed_url()
+    assert url == f"{WEBHOOK}&timestamp=1700000000000&sign={reference_sign(1700000000000)}"
+    
+    clock.now += 0.0003
+    assert notifier.signed_url() is url
+    assert calls == ["1700000000000"]
+    
+    clock.now += 0.001
+    assert notifier.signed_url() == f"{WEBHOOK}&timestamp=1700000000001&sign={reference_sign(1700000000001)}"
+    assert calls == ["1700000000000", "1700000000001"]
+
+
+def test_signature_matches_uncached_hmac():
+    notifier = DingTalkNotifier({"webhook": WEBHOOK, "secret": SECRET})
+    
+    # 预载密钥的 HMAC 对象被反复 copy() 后结果不变
+    for timestamp in (1, 1700000000000, 1700000000001, 1700000000000):
+        assert notifier._sign(str(timestamp)) == reference_sign(timestamp)
+
+
+def test_without_secret_uses_plain_webhook(clock):
+    assert DingTalkNotifier({"webhook": WEBHOOK}).signed_url() == WEBHOOK
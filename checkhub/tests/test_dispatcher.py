@@ -0,0 +1,186 @@
+import asyncio
+import time
+
+import pytest
+
+from app.db import Database
+from app.notifiers import build_notifiers
+from app.notifiers.base import DeliveryError
+from app.notifiers.dispatcher import NotificationDispatcher
+
+
+class FakeNotifier:
+    timeout = 5.0
+    
+    def __init__(self, failures=None):
+        self.sent = []
+        # 消息 -> 还需失败的次数
+        self.failures = dict(failures or {})
+    
+    async def deliver(self, message):
+        if self.failures.get(message, 0) > 0:
+            self.failures[message] -= 1
+            raise DeliveryError("temporary")
+        self.sent.append(message)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "test.db")
+    yield database
+    database.close()
+
+
+def make_dispatcher(db, notifier, **kwargs):
+    kwargs.setdefault("base_delay", 0.05)
+    kwargs.setdefault("max_delay", 0.05)
+    return NotificationDispatcher(db, notifier_factory=lambda: {"telegram": notifier}, **kwargs)
+
+
+async def run_until_drained(dispatcher, timeout=5.0):
+    await dispatcher.start()
+    try:
+        assert await dispatcher.drain(timeout=timeout)
+    finally:
+        await dispatcher.stop()
+
+
+def test_delivers_in_submission_order(db):
+    notifier = FakeNotifier()
+    dispatcher = make_dispatcher(db, notifier)
+    
+    async def main():
+        await dispatcher.start()
+        await dispatcher.submit("telegram", ["1", "2"])
+        await dispatcher.submit("telegram", ["3"])
+        assert await dispatcher.drain(timeout=5)
+        await dispatcher.stop()
+    
+    asyncio.run(main())
+    assert notifier.sent == ["1", "2", "3"]
+    assert dispatcher.pending_count() == 0
+
+
+def test_submit_while_worker_idle(db):
+    notifier = FakeNotifier()
+    dispatcher = make_dispatcher(db, notifier)
+    original = dispatcher._next_job
+    state = {"raced": False}
+    
+    def racing(channel):
+        # 模拟查询返回空之后、worker 进入等待之前，另一次 submit() 完成并发出唤醒信号
+        job = original(channel)
+        if job is None and not state["raced"]:
+            state["raced"] = True
+            dispatcher._enqueue(channel, ["2"])
+            state["loop"].call_soon_threadsafe(dispatcher._wake, channel)
+        return job
+    
+    dispatcher._next_job = racing
+    
+    async def main():
+        state["loop"] = asyncio.get_running_loop()
+        await dispatcher.start()
+        await dispatcher.submit("telegram", ["1"])
+        assert await dispatcher.drain(timeout=2)
+        
+        # worker 已空闲等待，新提交的消息应立即投递
+        await asyncio.sleep(0.1)
+        await dispatcher.submit("telegram", ["3"])
+        assert await dispatcher.drain(timeout=2)
+        await dispatcher.stop()
+    
+    asyncio.run(main())
+    assert notifier.sent == ["1", "2", "3"]
+
+
+def test_retried_chunk_is_not_overtaken(db):
+    notifier = FakeNotifier(failures={"1": 2})
+    dispatcher = make_dispatcher(db, notifier)
+    
+    async def main():
+        await dispatcher.submit("telegram", ["1", "2", "3"])
+        await run_until_drained(dispatcher)
+    
+    asyncio.run(main())
+    assert notifier.sent == ["1", "2", "3"]
+
+
+def test_gives_up_after_max_attempts(db):
+    notifier = FakeNotifier(failures={"1": 10})
+    dispatcher = make_dispatcher(db, notifier, max_attempts=2)
+    
+    async def main():
+        await dispatcher.submit("telegram", ["1", "2"])
+        await run_until_drained(dispatcher)
+    
+    asyncio.run(main())
+    assert notifier.sent == ["2"]
+    row = db.query_one("SELECT status, attempts FROM notification_jobs")
+    assert (row["status"], row["attempts"]) == ("failed", 2)
+
+
+def test_permanent_error_is_not_retried(db):
+    class Broken(FakeNotifier):
+        async def deliver(self, message):
+            raise DeliveryError("bad config", permanent=True)
+    
+    dispatcher = make_dispatcher(db, Broken())
+    
+    async def main():
+        await dispatcher.submit("telegram", ["1"])
+        await run_until_drained(dispatcher)
+    
+    asyncio.run(main())
+    assert db.query_one("SELECT attempts FROM notification_jobs")["attempts"] == 1
+
+
+def test_worker_survives_database_errors(db):
+    notifier = FakeNotifier()
+    dispatcher = make_dispatcher(db, notifier)
+    original = dispatcher._next_job
+    calls = {"count": 0}
+    
+    def flaky(channel):
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise RuntimeError("database is locked")
+        return original(channel)
+    
+    dispatcher._next_job = flaky
+    
+    async def main():
+        await dispatcher.submit("telegram", ["1"])
+        await run_until_drained(dispatcher)
+    
+    asyncio.run(main())
+    assert notifier.sent == ["1"]
+
+
+def test_prunes_old_finished_jobs(db):
+    old = time.time() - 30 * 86400
+    db.execute(
+        "INSERT INTO notification_jobs (channel, message, status, next_attempt_at, created_at) "
+        "VALUES ('telegram', 'old', 'failed', ?, ?), ('telegram', 'gone', 'dropped', ?, ?), "
+        "('telegram', 'recent', 'failed', ?, ?)",
+        (old, old, old, old, time.time(), time.time())
+    )
+    dispatcher = make_dispatcher(db, FakeNotifier())
+    
+    asyncio.run(run_until_drained(dispatcher))
+    assert [row["message"] for row in db.query("SELECT message FROM notification_jobs")] == ["recent"]
+
+
+def test_rate_limit_follows_channel_type(db):
+    notifiers = build_notifiers({"notifications": {"channels": [
+        {"type": "dingtalk", "name": "dt-ops", "enabled": True},
+        {"type": "telegram", "name": "tg-ops", "enabled": True},
+        {"type": "telegram", "name": "tg-admin", "enabled": True, "rate_per_minute": 10},
+    ]}})
+    dispatcher = NotificationDispatcher(
+        db, notifier_factory=lambda: notifiers, channel_rates={"tg-ops": (5, 60.0)}
+    )
+    
+    assert dispatcher._channel_rate("dt-ops") == (20, 60.0)
+    assert dispatcher._channel_rate("tg-ops") == (5, 60.0)
+    assert dispatcher._channel_rate("tg-admin") == (10, 60.0)
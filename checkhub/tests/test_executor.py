@@ -0,0 +1,93 @@
+import asyncio
+
+from app.utils.executor import CheckExecutor, host_of
+
+
+class Tracker:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+    
+    async def run(self, value, delay=0.01):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(delay)
+            return value
+        finally:
+            self.active -= 1
+
+
+def test_site_limit_bounds_concurrency_and_keeps_order():
+    executor = CheckExecutor(max_concurrency=10, per_site=3, per_host=10)
+    tracker = Tracker()
+    
+    results = asyncio.run(executor.map_accounts("site", range(12), tracker.run))
+    
+    assert results == list(range(12))
+    assert tracker.peak == 3
+
+
+def test_global_limit_applies_across_sites():
+    async def main():
+        executor = CheckExecutor(max_concurrency=4, per_site=10, per_host=10)
+        tracker = Tracker()
+        await asyncio.gather(*(
+            executor.map_accounts(site, range(6), tracker.run, host=f"{site}.example.com")
+            for site in ("a", "b", "c")
+        ))
+        return tracker
+    
+    assert asyncio.run(main()).peak == 4
+
+
+def test_host_limit_is_shared_between_sites():
+    async def main():
+        executor = CheckExecutor(max_concurrency=10, per_site=10, per_host=2)
+        tracker = Tracker()
+        await asyncio.gather(
+            executor.map_accounts("a", range(5), tracker.run, host="glados.rocks"),
+            executor.map_accounts("b", range(5), tracker.run, host="glados.rocks")
+        )
+        return tracker
+    
+    assert asyncio.run(main()).peak == 2
+
+
+def test_sequential_runs_one_at_a_time():
+    executor = CheckExecutor(max_concurrency=10, per_site=10, per_host=10)
+    tracker = Tracker()
+    
+    assert asyncio.run(executor.map_accounts("site", range(4), tracker.run, sequential=True)) == [0, 1, 2, 3]
+    assert tracker.peak == 1
+
+
+def test_failing_account_does_not_fail_the_site():
+    executor = CheckExecutor()
+    
+    async def check(value):
+        if value == 2:
+            raise RuntimeError("boom")
+        return value
+    
+    results = asyncio.run(executor.map_accounts(
+        "site", range(4), check, on_error=lambda account, error: f"failed {account}: {error}"
+    ))
+    
+    assert results == [0, 1, "failed 2: boom", 3]
+
+
+def test_failing_account_without_handler_returns_the_exception():
+    executor = CheckExecutor()
+    
+    async def check(value):
+        raise ValueError(value)
+    
+    results = asyncio.run(executor.map_accounts("site", [1], check))
+    
+    assert isinstance(results[0], ValueError)
+
+
+def test_host_of():
+    assert host_of("https://glados.rocks/api/user/checkin") == "glados.rocks"
+    assert host_of(None) is None
@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+from sanic import Sanic
+
+from app.checkers.base import CheckResult
+from app.db import Database
+from app.history import HistoryStore, parse_time
+from app.views import sites
+
+
+def make_result(success, day, hour=8):
+    result = CheckResult(success, "ok" if success else "failed", {"points": 1} if success else None)
+    result.timestamp = datetime(2024, 1, day, hour)
+    return result
+
+
+@pytest.fixture
+def store(tmp_path):
+    db = Database(tmp_path / "test.db")
+    store = HistoryStore(db)
+    store.append_many("glados", [
+        ("alice", make_result(True, 1), 120.0),
+        ("bob", make_result(False, 1), 80.0),
+        ("alice", make_result(True, 2), 100.0),
+    ])
+    store.append("example", "carol", make_result(True, 2, 9))
+    yield store
+    db.close()
+
+
+def test_query_filters_and_orders_newest_first(store):
+    records, total = store.query()
+    assert total == 4
+    assert [(r["site_id"], r["username"]) for r in records] == [
+        ("example", "carol"), ("glados", "alice"), ("glados", "bob"), ("glados", "alice")
+    ]
+    assert records[1]["data"] == {"points": 1}
+    assert records[2]["data"] is None
+    
+    records, total = store.query(site_id="glados", username="alice")
+    assert total == 2
+    assert [r["timestamp"] for r in records] == ["2024-01-02T08:00:00", "2024-01-01T08:00:00"]
+    
+    _, total = store.query(success=False)
+    assert total == 1
+    
+    records, total = store.query(since=parse_time("2024-01-02"), until=parse_time("2024-01-02T09:00:00"))
+    assert total == 1
+    assert records[0]["username"] == "alice"
+
+
+def test_query_pages_with_total(store):
+    records, total = store.query(offset=1, limit=2)
+    assert total == 4
+    assert [r["username"] for r in records] == ["alice", "bob"]
+    
+    records, total = store.query(offset=10)
+    assert (records, total) == ([], 4)
+
+
+def test_daily_stats(store):
+    assert store.daily_stats(site_id="glados") == [
+        {"date": "2024-01-01", "site_id": "glados", "total": 2, "success": 1, "success_rate": 0.5,
+         "avg_duration_ms": 100.0},
+        {"date": "2024-01-02", "site_id": "glados", "total": 1, "success": 1, "success_rate": 1.0,
+         "avg_duration_ms": 100.0},
+    ]
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(sites, "get_history_store", lambda: store)
+    app = Sanic(f"HistoryTest{id(store)}")
+    app.ctx.sessions = {"test-session": {"username": "admin"}}
+    app.blueprint(sites.bp)
+    
+    def get(query=""):
+        _, resp = app.test_client.get(f"/sites/api/history?{query}", cookies={"session_id": "test-session"})
+        return resp
+    
+    return get
+
+
+@pytest.mark.parametrize("query, offset, limit, count", [
+    ("", 0, 50, 4),
+    ("offset=-5&limit=0", 0, 1, 1),
+    ("offset=3&limit=100000", 3, 500, 1),
+])
+def test_view_clamps_paging(client, query, offset, limit, count):
+    data = client(query).json
+    assert (data["offset"], data["limit"], data["total"]) == (offset, limit, 4)
+    assert len(data["records"]) == count
+
+
+def test_view_filters_and_stats(client):
+    data = client("site_id=glados&success=false&stats=1").json
+    assert data["total"] == 1
+    assert data["records"][0]["username"] == "bob"
+    assert data["stats"] == [
+        {"date": "2024-01-01", "site_id": "glados", "total": 1, "success": 0, "success_rate": 0.0,
+         "avg_duration_ms": 80.0}
+    ]
+
+
+@pytest.mark.parametrize("query", ["limit=abc", "offset=x", "since=yesterday"])
+def test_view_rejects_invalid_query(client, query):
+    assert client(query).status == 400
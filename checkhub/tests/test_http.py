@@ -0,0 +1,51 @@
+import asyncio
+
+import httpx
+
+from app.utils.http import HttpClientRegistry
+
+
+def test_one_client_per_scheme_and_host():
+    async def main():
+        registry = HttpClientRegistry()
+        client = registry.client_for("https://example.com/api/checkin")
+        
+        assert registry.client_for("https://example.com/user?id=1") is client
+        assert registry.client_for("http://example.com/") is not client
+        assert registry.client_for("https://example.com:8443/") is not client
+        assert registry.client_for("https://other.example.com/") is not client
+        await registry.aclose()
+    
+    asyncio.run(main())
+
+
+def test_aclose_closes_every_client():
+    async def main():
+        registry = HttpClientRegistry()
+        clients = [registry.client_for(f"https://host{i}.example.com/") for i in range(3)]
+        
+        await registry.aclose()
+        
+        assert all(client.is_closed for client in clients)
+        # 关闭后再次使用时重新创建客户端
+        client = registry.client_for("https://host0.example.com/")
+        assert client not in clients and not client.is_closed
+        await registry.aclose()
+    
+    asyncio.run(main())
+
+
+def test_shared_client_does_not_keep_cookies():
+    async def main():
+        registry = HttpClientRegistry()
+        registry.configure({"http": {"timeout": 5}})
+        client = registry.client_for("https://example.com/")
+        
+        assert client.timeout.read == 5
+        # 客户端被多个账户共用，不保存响应中的 Cookie
+        request = httpx.Request("GET", "https://example.com/")
+        client.cookies.extract_cookies(httpx.Response(200, headers={"Set-Cookie": "a=1"}, request=request))
+        assert not client.cookies
+        await registry.aclose()
+    
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from app.utils import log_catalog as catalog_module
+from app.utils.log_catalog import LogCatalog
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(catalog_module, "time", clock)
+    return clock
+
+
+def write(path, content, mtime):
+    path.write_bytes(content)
+    os.utime(path, (mtime, mtime))
+
+
+def names(entries):
+    return [entry["name"] for entry in entries]
+
+
+def test_newest_orders_by_mtime_and_groups_by_site(tmp_path, clock):
+    write(tmp_path / "a_2024-01-01.log", b"x" * 10, 100)
+    write(tmp_path / "b_2024-01-02.log", b"x" * 20, 300)
+    write(tmp_path / "a_2024-01-02.log", b"x" * 30, 200)
+    write(tmp_path / "main.log", b"", 50)
+    write(tmp_path / ".index", b"{}", 400)
+    catalog = LogCatalog(tmp_path)
+    
+    assert names(catalog.newest(10)) == ["b_2024-01-02.log", "a_2024-01-02.log", "a_2024-01-01.log", "main.log"]
+    assert names(catalog.newest(1, "a")) == ["a_2024-01-02.log"]
+    assert catalog.sites()["a"] == {"count": 2, "total_size": 40, "latest": "a_2024-01-02.log"}
+    assert catalog.total_size() == 60
+
+
+def test_new_file_is_picked_up(tmp_path, clock):
+    catalog = LogCatalog(tmp_path)
+    assert catalog.newest() == []
+    
+    # 新增文件改变目录 mtime，不必等 ttl 过期
+    write(tmp_path / "a_2024-01-01.log", b"x", 100)
+    stat = tmp_path.stat()
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert names(catalog.newest()) == ["a_2024-01-01.log"]
+
+
+def test_sizes_refresh_after_ttl(tmp_path, clock, monkeypatch):
+    path = tmp_path / "a_2024-01-01.log"
+    write(path, b"x", 100)
+    catalog = LogCatalog(tmp_path, ttl=5)
+    assert catalog.total_size() == 1
+    
+    scans = []
+    real_scan = catalog._scan
+    monkeypatch.setattr(catalog, "_scan", lambda: scans.append(1) or real_scan())
+    
+    # 追加内容不改变目录 mtime，ttl 内沿用缓存
+    with open(path, "ab") as f:
+        f.write(b"yy")
+    clock.now += 4.9
+    assert catalog.total_size() == 1
+    assert not scans
+    
+    clock.now += 0.2
+    assert catalog.total_size() == 3
+    assert catalog.newest()[0]["size"] == 3
+    assert len(scans) == 1
@@ -0,0 +1,137 @@
+import gzip
+import json
+import re
+from datetime import date
+
+import pytest
+
+from app.utils.log_index import LogIndex
+from app.utils.log_retention import LogRetention
+
+
+QUERIES = [
+    {},
+    {"site": "glados"},
+    {"account": "alice"},
+    {"account": "alice", "status": "failed"},
+    {"status": "success"},
+    {"error": "timeout"},
+    {"site": "glados", "since": date(2024, 1, 2)},
+    {"until": date(2024, 1, 1)},
+    {"account": "nobody"},
+]
+
+
+def record(account, status, error=None, message="check"):
+    payload = {"level": "INFO", "account": account, "status": status, "message": message}
+    if error:
+        payload["error"] = error
+    return json.dumps(payload) + "\n"
+
+
+def append(path, *lines):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(lines))
+
+
+def full_scan(directory, site=None, account=None, status=None, error=None, since=None, until=None):
+    """不用索引，逐个文件逐行扫描的参考实现"""
+    files = []
+    for path in directory.iterdir():
+        match = re.match(r"(.+)_(\d{4}-\d{2}-\d{2})\.log(\.gz)?$", path.name)
+        if not match:
+            continue
+        name_site, day = match.group(1), match.group(2)
+        if site and name_site != site or since and day < since.isoformat() or until and day > until.isoformat():
+            continue
+        files.append((day, path.name, path))
+    
+    records = []
+    for _, name, path in sorted(files, reverse=True):
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.startswith("{") and line.endswith("\n")]
+        for item in reversed(lines):
+            if not item.get("account"):
+                continue
+            if account and item["account"] != account or status and item.get("status") != status:
+                continue
+            if error and item.get("error") != error:
+                continue
+            records.append(dict(item, file=name))
+    return records
+
+
+def assert_matches_scan(index, directory):
+    for filters in QUERIES:
+        assert index.query(limit=1000, **filters) == full_scan(directory, **filters), filters
+
+
+@pytest.fixture
+def logs(tmp_path):
+    append(
+        tmp_path / "glados_2024-01-01.log",
+        "plain text line\n",
+        record("alice", "success"),
+        record("bob", "failed", "timeout"),
+    )
+    append(
+        tmp_path / "glados_2024-01-02.log",
+        record("alice", "failed", "login"),
+        record("alice", "success"),
+    )
+    append(tmp_path / "example_2024-01-02.log", record("carol", "success"), record(None, "info"))
+    (tmp_path / "main.log").write_text(record("alice", "success"), encoding="utf-8")
+    return tmp_path
+
+
+def test_index_matches_full_scan(logs):
+    index = LogIndex(logs)
+    
+    assert_matches_scan(index, logs)
+    assert index.candidates(account="carol") == ["example_2024-01-02.log"]
+    assert index.candidates(account="alice", status="failed") == ["glados_2024-01-02.log"]
+    
+    # 重新加载磁盘上的索引文件后结果相同
+    assert_matches_scan(LogIndex(logs), logs)
+
+
+def test_index_updates_incrementally(logs):
+    index = LogIndex(logs)
+    index.refresh()
+    
+    path = logs / "glados_2024-01-02.log"
+    append(path, record("dave", "failed", "timeout"), '{"account": "dave", "status": "succ')
+    assert index.candidates(account="dave") == ["glados_2024-01-02.log"]
+    assert_matches_scan(index, logs)
+    # 未写完的行不计入索引，写完后再补上
+    assert index.refresh()[path.name]["offset"] < path.stat().st_size
+    append(path, 'ess"}\n')
+    assert index.candidates(account="dave", status="success") == ["glados_2024-01-02.log"]
+    assert_matches_scan(index, logs)
+
+
+def test_index_survives_rotation(logs):
+    index = LogIndex(logs)
+    index.refresh()
+    
+    # 保留策略把旧日志压缩为 .log.gz：沿用原条目，不需要重新扫描
+    LogRetention.compress(logs / "glados_2024-01-01.log")
+    files = index.refresh()
+    assert "glados_2024-01-01.log" not in files
+    assert files["glados_2024-01-01.log.gz"]["accounts"] == {"alice": {"success": 1}, "bob": {"failed": 1}}
+    assert_matches_scan(index, logs)
+    
+    # 新的一天开始写新文件
+    append(logs / "glados_2024-01-03.log", record("bob", "success"))
+    assert_matches_scan(index, logs)
+    
+    # 文件被截断重写后重新建立条目
+    (logs / "example_2024-01-02.log").write_text(record("erin", "failed"), encoding="utf-8")
+    assert index.candidates(account="carol") == []
+    assert_matches_scan(index, logs)
+    
+    # 删除的文件从索引中移除
+    (logs / "glados_2024-01-02.log").unlink()
+    assert "glados_2024-01-02.log" not in index.refresh()
+    assert_matches_scan(index, logs)
@@ -0,0 +1,131 @@
+import asyncio
+import gzip
+
+import pytest
+from sanic import Sanic
+
+from app.utils.log_reader import RangeNotSatisfiable, find_tail_offset, iter_file, log_size, parse_range
+from app.views import dashboard
+
+
+LINES = [f"line {i}\n".encode() for i in range(200)]
+CONTENT = b"".join(LINES)
+
+
+async def read_all(path, start, end, chunk_size=64):
+    return b"".join([chunk async for chunk in iter_file(path, start, end, chunk_size)])
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "site_2024-01-01.log"
+    path.write_bytes(CONTENT)
+    return path
+
+
+@pytest.fixture
+def gz_file(tmp_path):
+    path = tmp_path / "site_2023-12-31.log.gz"
+    with gzip.open(path, "wb") as f:
+        f.write(CONTENT)
+    return path
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 10)
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=-10", 100) == (90, 100)
+    assert parse_range("bytes=50-500", 100) == (50, 100)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    for header in ("bytes=100-", "bytes=9-3", "bytes=-0"):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range(header, 100)
+    for header in ("bytes=-10", "bytes=0-"):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range(header, 0)
+
+
+@pytest.mark.parametrize("fixture", ["log_file", "gz_file"])
+def test_tail_and_ranges(request, fixture):
+    path = request.getfixturevalue(fixture)
+    size = log_size(path)
+    assert size == len(CONTENT)
+    
+    start = asyncio.run(find_tail_offset(path, 3, size))
+    assert asyncio.run(read_all(path, start, size)) == b"".join(LINES[-3:])
+    assert asyncio.run(find_tail_offset(path, 1000, size)) == 0
+    assert asyncio.run(find_tail_offset(path, 0, size)) == size
+    assert asyncio.run(read_all(path, 100, 300)) == CONTENT[100:300]
+
+
+def test_tail_without_trailing_newline(tmp_path):
+    path = tmp_path / "partial.log"
+    path.write_bytes(b"a\nb\nc")
+    assert asyncio.run(find_tail_offset(path, 2, 5)) == 2
+
+
+@pytest.fixture
+def client(tmp_path, log_file, monkeypatch):
+    monkeypatch.setattr(dashboard, "LOGS_DIR", tmp_path)
+    app = Sanic(f"LogViewTest{id(tmp_path)}")
+    app.ctx.sessions = {"test-session": {"username": "admin"}}
+    app.blueprint(dashboard.bp)
+    
+    def get(url, **kwargs):
+        _, resp = app.test_client.get(url, cookies={"session_id": "test-session"}, **kwargs)
+        return resp
+    
+    return get
+
+
+def test_view_offset_and_limit(client, log_file):
+    resp = client(f"/logs/{log_file.name}?offset=10&limit=20")
+    assert resp.status == 200
+    assert resp.body == CONTENT[10:30]
+    assert resp.headers["X-Next-Offset"] == "30"
+
+
+def test_view_tail_and_range(client, log_file):
+    resp = client(f"/logs/{log_file.name}?tail=2")
+    assert resp.body == b"".join(LINES[-2:])
+    
+    resp = client(f"/logs/{log_file.name}", headers={"Range": "bytes=0-4"})
+    assert resp.status == 206
+    assert resp.body == CONTENT[:5]
+    assert resp.headers["Content-Range"] == f"bytes 0-4/{len(CONTENT)}"
+    
+    resp = client(f"/logs/{log_file.name}", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert resp.status == 416
+    
+    empty = log_file.with_name("empty_2024-01-01.log")
+    empty.write_bytes(b"")
+    resp = client(f"/logs/{empty.name}", headers={"Range": "bytes=-10"})
+    assert resp.status == 416
+
+
+@pytest.mark.parametrize("query", ["limit=-5", "offset=-1", "tail=-3", "limit=abc"])
+def test_view_rejects_invalid_paging(client, log_file, query):
+    assert client(f"/logs/{log_file.name}?{query}").status == 400
+
+
+def test_view_clamps_limit(client, log_file, monkeypatch):
+    monkeypatch.setattr(dashboard, "MAX_LOG_PAGE_BYTES", 16)
+    resp = client(f"/logs/{log_file.name}?limit=1000")
+    assert resp.body == CONTENT[:16]
+    assert resp.headers["X-Next-Offset"] == "16"
+
+
+def test_view_serves_only_log_files(client, tmp_path, gz_file):
+    (tmp_path / ".index").write_text("{}", encoding="utf-8")
+    (tmp_path / "notes.log").write_text("x", encoding="utf-8")
+    (tmp_path / "main.log").write_bytes(CONTENT)
+    
+    assert client("/logs/.index").status == 404
+    assert client("/logs/notes.log").status == 404
+    assert client("/logs/main.log").body == CONTENT
+    
+    resp = client(f"/logs/{gz_file.name}?offset=10&limit=20")
+    assert resp.body == CONTENT[10:30]
+    assert resp.headers["X-Log-Size"] == str(len(CONTENT))
@@ -0,0 +1,71 @@
+import gzip
+from datetime import date
+
+from app.utils.log_retention import LogRetention
+
+
+TODAY = date(2024, 1, 31)
+CONTENT = b"x" * 1024
+
+
+def write_logs(directory, names):
+    for name in names:
+        path = directory / name
+        if name.endswith(".gz"):
+            with gzip.open(path, "wb") as f:
+                f.write(CONTENT)
+        else:
+            path.write_bytes(CONTENT)
+
+
+def test_compresses_old_logs_and_deletes_expired(tmp_path):
+    write_logs(tmp_path, [
+        "site_2024-01-31.log",
+        "site_2024-01-29.log",
+        "site_2024-01-27.log",
+        "site_2024-01-25.log.gz",
+        "site_2024-01-20.log",
+        "site_2024-01-10.log.gz",
+        "main.log",
+        "notes.txt",
+    ])
+    retention = LogRetention(tmp_path, max_age_days=10, max_total_mb=0, compress_after_days=3)
+    
+    stats = retention.run(TODAY)
+    
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "main.log",
+        "notes.txt",
+        "site_2024-01-25.log.gz",
+        "site_2024-01-27.log.gz",
+        "site_2024-01-29.log",
+        "site_2024-01-31.log",
+    ]
+    with gzip.open(tmp_path / "site_2024-01-27.log.gz", "rb") as f:
+        assert f.read() == CONTENT
+    assert (stats["compressed"], stats["deleted"]) == (1, 2)
+    assert stats["freed_bytes"] > 0
+
+
+def test_total_size_limit_deletes_oldest_but_never_today(tmp_path):
+    write_logs(tmp_path, [
+        "a_2024-01-31.log",
+        "b_2024-01-31.log",
+        "a_2024-01-30.log",
+        "a_2024-01-29.log",
+        "a_2024-01-28.log",
+    ])
+    # 上限只够 3.5 个文件
+    retention = LogRetention(tmp_path, max_age_days=0, max_total_mb=3.5 / 1024, compress_after_days=0)
+    
+    stats = retention.run(TODAY)
+    
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "a_2024-01-30.log", "a_2024-01-31.log", "b_2024-01-31.log"
+    ]
+    assert stats == {"compressed": 0, "deleted": 2, "freed_bytes": 2 * len(CONTENT)}
+    
+    # 只剩当天的日志时即使超过上限也不删除
+    retention.max_total_bytes = 1
+    retention.run(TODAY)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a_2024-01-31.log", "b_2024-01-31.log"]
@@ -0,0 +1,96 @@
+import logging
+from datetime import datetime
+
+import pytest
+
+from app.utils import logger as logger_module
+from app.utils.log_pipeline import log_pipeline
+from app.utils.logger import SiteLoggerRegistry
+
+
+class FakeDatetime:
+    today = datetime(2024, 1, 1, 8)
+    
+    @classmethod
+    def now(cls):
+        return cls.today
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger_module, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(logger_module, "datetime", FakeDatetime)
+    monkeypatch.setattr(FakeDatetime, "today", datetime(2024, 1, 1, 8))
+    registry = SiteLoggerRegistry()
+    yield registry
+    registry.close_all()
+
+
+def site_id(request):
+    # logging.getLogger 是进程级的，每个测试用不同的站点名
+    return f"logger-test-{request.node.name}"
+
+
+def file_handlers(logger):
+    return [handler.target for handler in logger.handlers]
+
+
+def closed(handler):
+    log_pipeline.flush()
+    return handler.stream is None
+
+
+def test_repeated_lookups_reuse_logger_and_handler(registry, request, tmp_path):
+    site = site_id(request)
+    logger = registry.get(site)
+    handlers = list(logger.handlers)
+    
+    for _ in range(3):
+        assert registry.get(site) is logger
+    
+    assert logger.handlers == handlers
+    assert len(handlers) == 1
+    assert file_handlers(logger)[0].baseFilename == str(tmp_path / f"{site}_2024-01-01.log")
+
+
+def test_new_day_swaps_handler_and_closes_old_one(registry, request, tmp_path):
+    site = site_id(request)
+    logger = registry.get(site)
+    logger.info("first day")
+    old = file_handlers(logger)[0]
+    
+    FakeDatetime.today = datetime(2024, 1, 2, 0, 1)
+    assert registry.get(site) is logger
+    
+    assert closed(old)
+    assert [handler.baseFilename for handler in file_handlers(logger)] == [str(tmp_path / f"{site}_2024-01-02.log")]
+    assert "first day" in (tmp_path / f"{site}_2024-01-01.log").read_text(encoding="utf-8")
+
+
+def test_close_all_closes_every_handler(registry, request):
+    loggers = [registry.get(f"{site_id(request)}-{i}") for i in range(3)]
+    for logger in loggers:
+        logger.info("message")
+    handlers = [handler for logger in loggers for handler in file_handlers(logger)]
+    
+    registry.close_all()
+    
+    assert all(closed(handler) for handler in handlers)
+    assert all(logger.handlers == [] for logger in loggers)
+
+
+def test_prune_closes_only_stale_handlers(registry, request):
+    stale = registry.get(f"{site_id(request)}-stale")
+    stale_handler = file_handlers(stale)[0]
+    
+    FakeDatetime.today = datetime(2024, 1, 2, 9)
+    fresh = registry.get(f"{site_id(request)}-fresh")
+    registry.prune()
+    
+    assert closed(stale_handler)
+    assert stale.handlers == []
+    assert len(fresh.handlers) == 1
+    
+    logging.getLogger(fresh.name).info("still open")
+    log_pipeline.flush()
+    assert file_handlers(fresh)[0].stream is not None
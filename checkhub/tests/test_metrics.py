@@ -0,0 +1,47 @@
+import pytest
+from sanic import Sanic
+
+from app.views import metrics
+
+
+@pytest.fixture
+def scrape(monkeypatch):
+    settings = {}
+    monkeypatch.setattr(metrics, "get_settings", lambda: settings)
+    
+    async def no_queue():
+        pass
+    
+    monkeypatch.setattr(metrics, "_refresh_queue_depth", no_queue)
+    app = Sanic(f"MetricsTest{id(settings)}")
+    app.ctx.sessions = {"test-session": {"username": "admin"}}
+    app.blueprint(metrics.bp)
+    
+    def get(config=None, **kwargs):
+        settings.clear()
+        if config is not None:
+            settings["metrics"] = config
+        _, resp = app.test_client.get("/metrics", **kwargs)
+        return resp.status
+    
+    return get
+
+
+def test_disabled_by_default(scrape):
+    assert scrape() == 404
+    assert scrape({"token": "secret"}, headers={"Authorization": "Bearer secret"}) == 404
+
+
+def test_token_is_required_when_configured(scrape):
+    config = {"enabled": True, "token": "secret"}
+    assert scrape(config) == 401
+    assert scrape(config, headers={"Authorization": "Bearer wrong"}) == 401
+    assert scrape(config, cookies={"session_id": "test-session"}) == 401
+    assert scrape(config, headers={"Authorization": "Bearer secret"}) == 200
+
+
+def test_without_token_requires_admin_session(scrape):
+    config = {"enabled": True}
+    assert scrape(config) == 401
+    assert scrape(config, cookies={"session_id": "unknown"}) == 401
+    assert scrape(config, cookies={"session_id": "test-session"}) == 200
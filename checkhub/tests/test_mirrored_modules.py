@@ -0,0 +1,75 @@
+import ast
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+# 两个应用独立部署，以下模块在两边各有一份（说明见 checkinhub/DEVELOP.md）。
+# 每项为 (checkhub 路径, checkinhub 路径, 必须一致的定义)；None 表示整个模块的定义都必须一致
+MIRRORED = [
+    ("checkhub/app/utils/log_pipeline.py", "checkinhub/utils/log_pipeline.py", None),
+    ("checkhub/app/utils/log_retention.py", "checkinhub/utils/log_retention.py", [
+        "DATE_PATTERN", "LogRetention.__init__", "LogRetention._daily_logs", "LogRetention.compress",
+        "LogRetention.run",
+    ]),
+    ("checkhub/app/utils/circuit_breaker.py", "checkinhub/utils/circuit_breaker.py", [
+        "CLOSED", "OPEN", "HALF_OPEN", "CircuitOpenError.__init__", "HostCircuit.__init__",
+        "CircuitBreakerRegistry._circuit", "CircuitBreakerRegistry.is_open",
+        "CircuitBreakerRegistry.check", "CircuitBreakerRegistry._end_probe",
+        "CircuitBreakerRegistry.release", "CircuitBreakerRegistry.record_success",
+        "CircuitBreakerRegistry.record_failure", "CircuitBreakerRegistry.load",
+        "CircuitBreakerRegistry.save", "CircuitBreakerRegistry.stats",
+    ]),
+    ("checkhub/app/notifiers/digest.py", "checkinhub/notifiers/digest.py", [
+        "utf8_len", "split_message",
+    ]),
+    ("checkhub/app/utils/cookie_jar.py", "checkinhub/utils/cookie_jar.py", [
+        "parse_cookie_header", "CookieVault._path", "CookieVault._fingerprint",
+        "CookieVault.save_records", "CookieVault.clear",
+    ]),
+    ("checkhub/app/utils/timing.py", "checkinhub/utils/timing.py", [
+        "SPAN_KINDS", "percentile", "RunRecorder.__init__", "RunRecorder.record",
+        "RunRecorder.finish", "RunRecorder.summary", "RunRecorder.render", "RunRecorder.write",
+        "start_recording", "current_recorder", "Span.__init__", "span",
+    ]),
+]
+
+
+def strip_docstring(node):
+    body = getattr(node, "body", None)
+    if isinstance(body, list) and body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        node.body = body[1:] or [ast.Pass()]
+    for child in ast.iter_child_nodes(node):
+        strip_docstring(child)
+    return node
+
+
+def definitions(path: Path) -> dict:
+    """模块中的顶层赋值、函数和类方法，按名称映射到去掉文档字符串后的 AST"""
+    result = {}
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            result[node.name] = node
+        elif isinstance(node, ast.ClassDef):
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    result[f"{node.name}.{item.name}"] = item
+        elif isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+            result[node.targets[0].id] = node
+    return {name: ast.dump(strip_docstring(node)) for name, node in result.items()}
+
+
+@pytest.mark.parametrize("left, right, shared", MIRRORED)
+def test_mirrored_copies_are_in_sync(left, right, shared):
+    if not (ROOT / right).exists():
+        pytest.skip("只检出了 checkhub")
+    left_defs, right_defs = definitions(ROOT / left), definitions(ROOT / right)
+    if shared is None:
+        assert left_defs.keys() == right_defs.keys()
+        shared = list(left_defs)
+    
+    for name in shared:
+        assert name in left_defs and name in right_defs, name
+        assert left_defs[name] == right_defs[name], f"{name} 两边不一致"
@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import ConfigStore
+from app.db import Database
+from app import repository as repository_module
+from app.repository import SitesRepository, SqliteSitesRepository
+
+
+def test_failed_save_discards_unsaved_changes(tmp_path, monkeypatch):
+    store = ConfigStore(tmp_path / "sites.toml", dict)
+    repository = SitesRepository(store, flush_delay=0)
+    real_save = store.save
+    
+    def broken(config):
+        raise OSError("disk full")
+    
+    async def main():
+        monkeypatch.setattr(store, "save", broken)
+        with pytest.raises(OSError):
+            await repository.add_site("a", "A")
+        
+        monkeypatch.setattr(store, "save", real_save)
+        assert await repository.add_site("b", "B")
+    
+    asyncio.run(main())
+    assert list(store.get()) == ["b"]
+
+
+SITES = {
+    "on": {"name": "On", "enabled": True, "accounts": [{"username": "a"}, {"username": "b"}]},
+    "off": {"name": "Off", "enabled": False, "accounts": [{"username": "c"}]},
+}
+
+
+@pytest.fixture
+def sqlite_repository(tmp_path):
+    db = Database(tmp_path / "test.db")
+    repository = SqliteSitesRepository(db)
+    repository.import_config(SITES)
+    yield repository
+    db.close()
+
+
+def test_sqlite_enabled_sites_skips_disabled(sqlite_repository):
+    sites = sqlite_repository.enabled_sites()
+    
+    assert list(sites) == ["on"]
+    assert [account["username"] for account in sites["on"]["accounts"]] == ["a", "b"]
+
+
+def test_sqlite_get_site_loads_one_site(sqlite_repository):
+    assert [account["username"] for account in sqlite_repository.get_site("off")["accounts"]] == ["c"]
+    assert sqlite_repository.get_site("missing") is None
+
+
+def test_toml_enabled_sites_skips_disabled(tmp_path):
+    store = ConfigStore(tmp_path / "sites.toml", dict)
+    store.save(SITES)
+    
+    assert list(SitesRepository(store).enabled_sites()) == ["on"]
+
+
+def test_import_warns_about_dropped_fields(tmp_path, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(repository_module, "get_main_logger", lambda: SimpleNamespace(warning=warnings.append))
+    db = Database(tmp_path / "test.db")
+    repository = SqliteSitesRepository(db)
+    
+    repository.import_config({
+        "a": {"name": "A", "schedule": "0 8 * * *", "accounts": [{"username": "x", "token": "t"}, {"username": "y"}]},
+        "b": {"name": "B"},
+    })
+    db.close()
+    
+    assert warnings == [
+        "站点 a 的配置项 schedule 不受 SQLite 存储支持，导入时已忽略",
+        "站点 a 账户 x 的配置项 token 不受 SQLite 存储支持，导入时已忽略",
+    ]
@@ -0,0 +1,61 @@
+import contextvars
+import json
+
+import pytest
+
+from app.utils import timing
+from app.utils.timing import RunRecorder, percentile, span, start_recording
+
+
+@pytest.mark.parametrize("values, p50, p95", [
+    ([], 0.0, 0.0),
+    ([7.0], 7.0, 7.0),
+    ([1.0, 2.0], 1.0, 2.0),
+    ([1.0, 2.0, 3.0], 2.0, 3.0),
+    ([float(i) for i in range(1, 11)], 5.0, 10.0),
+    ([float(i) for i in range(1, 101)], 50.0, 95.0),
+])
+def test_nearest_rank_percentile(values, p50, p95):
+    assert percentile(values, 50) == p50
+    assert percentile(values, 95) == p95
+
+
+def test_summary_of_small_and_empty_runs(tmp_path):
+    recorder = RunRecorder()
+    assert recorder.summary()["groups"] == {}
+    
+    for duration in (30.0, 10.0, 20.0):
+        recorder.record("glados", "account", duration)
+    recorder.record("glados", "account", 40.0, error="failed")
+    recorder.record("telegram", "notify", 5.0)
+    recorder.finish()
+    
+    groups = recorder.summary()["groups"]
+    assert groups["glados"]["account"] == {
+        "count": 4, "errors": 1, "p50_ms": 20.0, "p95_ms": 40.0, "max_ms": 40.0, "total_ms": 100.0
+    }
+    assert groups["telegram"]["notify"]["p50_ms"] == groups["telegram"]["notify"]["p95_ms"] == 5.0
+    
+    path = tmp_path / "report.json"
+    recorder.write(str(path))
+    assert json.loads(path.read_text(encoding="utf-8"))["groups"] == groups
+    assert recorder.render().splitlines()[2].startswith("glados")
+
+
+def test_span_records_only_while_recording():
+    def run():
+        with span("glados", "site"):
+            pass
+        recorder = start_recording()
+        with span("glados", "site") as handle:
+            handle.error = "failed"
+        with pytest.raises(ValueError):
+            with span("glados", "request"):
+                raise ValueError
+        return recorder
+    
+    recorder = contextvars.copy_context().run(run)
+    
+    assert {kind: len(values) for kind, values in recorder.spans["glados"].items()} == {"site": 1, "request": 1}
+    assert recorder.errors["glados"] == {"site": 1, "request": 1}
+    assert timing.current_recorder() is None
@@ -1,15 +1,20 @@
 #!/usr/bin/env python3
 import asyncio
 import sys
+import time
 import argparse
 from pathlib import Path
 
-from utils import setup_logger, get_site_logger, load_config, load_sites_config
+from utils import setup_logger, get_site_logger, load_config, load_sites_config, LogRetention, log_pipeline, cookie_vault, circuit_breakers, span, start_recording
 from sites import SITE_REGISTRY
-from notifiers import TelegramNotifier, DingtalkNotifier
+from notifiers import Digest, NotificationQueue, build_notifiers
 
 
-async def run_site_checkin(site_id: str, site_config: dict, main_config: dict):
+CIRCUIT_STATE_PATH = 'data/circuit_breakers.json'
+
+
+async def run_site_checkin(site_id: str, site_config: dict, main_config: dict, digest: Digest = None,
+                           account_pool: asyncio.Semaphore = None):
     if not site_config.get('enabled', True):
         print(f"站点 {site_id} 已禁用，跳过")
         return None
@@ -22,7 +27,8 @@ async def run_site_checkin(site_id: str, site_config: dict, main_config: dict):
     logger = get_site_logger(
         site_id,
         log_dir='logs',
-        level=main_config.get('logging', {}).get('level', 'INFO')
+        level=main_config.get('logging', {}).get('level', 'INFO'),
+        json_format=main_config.get('logging', {}).get('json_format', False)
     )
     
     site_name = site_config.get('name', site_id)
@@ -31,6 +37,7 @@ async def run_site_checkin(site_id: str, site_config: dict, main_config: dict):
     logger.info(f"=" * 50)
     
     site = site_class(logger, {site_id: site_config})
+    site.account_pool = account_pool
     accounts = site_config.get('accounts', [])
     
     if not accounts:
@@ -41,26 +48,88 @@ async def run_site_checkin(site_id: str, site_config: dict, main_config: dict):
     
     should_notify = site_config.get('notify', False)
     
-    if should_notify and results:
-        message = site.format_results_message(results, accounts)
-        
-        telegram_config = main_config.get('notifications', {}).get('telegram', {})
-        telegram = TelegramNotifier(telegram_config, logger)
-        await telegram.send_if_enabled(f"CheckinHub - {site_name}", message)
-        
-        dingtalk_config = main_config.get('notifications', {}).get('dingtalk', {})
-        dingtalk = DingtalkNotifier(dingtalk_config, logger)
-        await dingtalk.send_if_enabled(f"CheckinHub - {site_name}", message)
+    if should_notify and results and digest is not None:
+        digest.add(site.format_results_message(results))
     
     return results
 
 
+async def run_sites(target_sites: list, sites_config: dict, main_config: dict, digest: Digest, logger,
+                    workers: int = 1, max_concurrency: int = 0, site_timeout: float = 0):
+    """在共享的工作池中运行站点
+    
+    最多 workers 个站点同时签到，max_concurrency 限制所有站点合计同时签到的账户数（0 表示不限制）。
+    每个站点单独捕获异常并受 site_timeout 秒限制（0 表示不限制），一个站点失败或卡住不影响其他站点；
+    每个站点结束时打印进度，汇总按站点顺序加入 digest。
+    """
+    pool = asyncio.Semaphore(max(1, workers))
+    account_pool = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    site_digests = {site_id: Digest() for site_id in target_sites}
+    running = set()
+    progress = {'done': 0}
+    
+    async def run_one(site_id: str):
+        site_config = sites_config[site_id]
+        async with pool:
+            running.add(site_id)
+            started = time.perf_counter()
+            try:
+                with span(site_id, 'site') as timer:
+                    results = await asyncio.wait_for(
+                        run_site_checkin(site_id, site_config, main_config, site_digests[site_id], account_pool),
+                        site_timeout or None
+                    )
+                    if results and not all(r.success for r in results):
+                        timer.error = 'failed'
+                if results is None:
+                    status = "跳过"
+                else:
+                    status = f"成功 {sum(1 for r in results if r.success)}/{len(results)}"
+            except asyncio.TimeoutError:
+                status = f"超时（{site_timeout} 秒）"
+                logger.error(f"站点 {site_id} 运行超时（{site_timeout} 秒），已取消")
+            except Exception as e:
+                status = f"运行失败: {e}"
+                logger.error(f"站点 {site_id} 运行失败: {e}", exc_info=True)
+            finally:
+                running.discard(site_id)
+                progress['done'] += 1
+            
+            if not status.startswith(("成功", "跳过")) and site_config.get('notify', False):
+                site_digests[site_id].add(f"❌ {site_config.get('name', site_id)}: {status}")
+            
+            line = f"[{progress['done']}/{len(target_sites)}] {site_id}: {status}，用时 {time.perf_counter() - started:.1f} 秒"
+            if running:
+                line += f"（进行中: {', '.join(sorted(running))}）"
+            print(line)
+    
+    await asyncio.gather(*(run_one(site_id) for site_id in target_sites))
+    
+    for site_id in target_sites:
+        for section in site_digests[site_id].sections:
+            digest.add(section)
+
+
+def submit_digest(queue: NotificationQueue, notifiers: dict, digest: Digest):
+    """每个通知渠道放入一条本次运行的汇总（超长时分段）"""
+    if not digest:
+        return
+    
+    for channel, notifier in notifiers.items():
+        if notifier.enabled:
+            queue.submit_digest(channel, notifier, digest)
+
+
 async def main():
     parser = argparse.ArgumentParser(description='CheckinHub - 自动签到中心')
     parser.add_argument('sites', nargs='*', help='要运行的站点ID（留空表示运行所有启用的站点）')
     parser.add_argument('--list', '-l', action='store_true', help='列出所有可用站点')
     parser.add_argument('--config', '-c', default='config/config.toml', help='主配置文件路径')
     parser.add_argument('--sites-config', '-s', default='config/sites.toml', help='站点配置文件路径')
+    parser.add_argument('--workers', '-w', type=int, help='同时运行的站点数（默认取 [runner] workers，1 表示逐个运行）')
+    parser.add_argument('--max-concurrency', type=int, help='所有站点合计同时签到的账户数（0 表示不限制）')
+    parser.add_argument('--site-timeout', type=float, help='单个站点的运行时间上限（秒，0 表示不限制）')
+    parser.add_argument('--report', metavar='PATH', help='把本次运行的耗时统计（站点 / 账户 / 请求 / 通知）写入 JSON 文件')
     
     args = parser.parse_args()
     
@@ -102,19 +171,67 @@ async def main():
     
     Path('logs').mkdir(exist_ok=True)
     
-    for site_id in target_sites:
-        if site_id not in sites_config:
-            print(f"警告: 站点 {site_id} 未在配置文件中找到")
-            continue
+    try:
+        stats = LogRetention.from_settings(Path('logs'), main_config.get('logging', {})).run()
+        if stats['compressed'] or stats['deleted']:
+            logger.info(
+                f"日志清理: 压缩 {stats['compressed']} 个, 删除 {stats['deleted']} 个, "
+                f"释放 {stats['freed_bytes'] / 1024:.1f} KB"
+            )
+    except OSError as e:
+        logger.warning(f"日志清理失败: {e}")
+    
+    # 记录站点 / 账户 / 请求 / 通知的耗时，需在启动通知队列之前开始，后台发送任务才能继承
+    recorder = start_recording()
+    cookie_vault.configure(main_config.get('cookies', {}))
+    circuit_breakers.configure(main_config.get('circuit_breaker', {}))
+    circuit_breakers.load(CIRCUIT_STATE_PATH)
+    
+    # 通知在后台发送，上次运行未送达的消息也会在签到期间补发
+    notifiers = build_notifiers(main_config.get('notifications', {}), logger)
+    queue = NotificationQueue.from_config(main_config.get('notifications', {}), logger)
+    queue.start(notifiers)
+    
+    try:
+        runner_config = main_config.get('runner', {})
+        workers = args.workers if args.workers is not None else runner_config.get('workers', 1)
+        max_concurrency = args.max_concurrency if args.max_concurrency is not None else runner_config.get('max_concurrency', 0)
+        site_timeout = args.site_timeout if args.site_timeout is not None else runner_config.get('site_timeout', 0)
         
-        site_config = sites_config[site_id]
+        for site_id in target_sites:
+            if site_id not in sites_config:
+                print(f"警告: 站点 {site_id} 未在配置文件中找到")
+        target_sites = [site_id for site_id in target_sites if site_id in sites_config]
+        
+        digest = Digest()
+        started = time.perf_counter()
+        await run_sites(
+            target_sites, sites_config, main_config, digest, logger,
+            workers=workers, max_concurrency=max_concurrency, site_timeout=site_timeout
+        )
+        logger.info(f"全部 {len(target_sites)} 个站点运行结束，用时 {time.perf_counter() - started:.1f} 秒")
+        
+        for host, state in circuit_breakers.stats().items():
+            if state['state'] == 'open':
+                logger.warning(f"{host} 已熔断（连续 {state['failures']} 次连接失败或超时），下次运行时先试探一次")
         
-        try:
-            await run_site_checkin(site_id, site_config, main_config)
-        except Exception as e:
-            logger.error(f"站点 {site_id} 运行失败: {e}", exc_info=True)
+        submit_digest(queue, notifiers, digest)
+        if not await queue.drain():
+            logger.warning(f"仍有 {queue.pending()} 条通知未发送，将在下次运行时重试")
+    finally:
+        # 签到中途出错时也要停止发送任务，保存未送达的通知供下次补发，并保存熔断状态
+        await queue.close()
+        await asyncio.gather(*(notifier.close() for notifier in notifiers.values()))
+        circuit_breakers.save(CIRCUIT_STATE_PATH)
+    
+    recorder.finish()
+    print(recorder.render())
+    if args.report:
+        recorder.write(args.report)
+        logger.info(f"耗时报告已写入 {args.report}")
     
     logger.info("CheckinHub 运行完成")
+    logger.debug(f"日志队列统计: {log_pipeline.stats()}")
 
 
 if __name__ == '__main__':
@@ -123,3 +240,5 @@ if __name__ == '__main__':
     except KeyboardInterrupt:
         print("\n用户中断")
         sys.exit(0)
+    finally:
+        log_pipeline.stop()
@@ -1,5 +1,39 @@
-from .base import BaseNotifier
+from .base import BaseNotifier, DeliveryError
 from .telegram import TelegramNotifier
 from .dingtalk import DingtalkNotifier
+from .digest import Digest
+from .dispatcher import NotificationQueue
 
-__all__ = ['BaseNotifier', 'TelegramNotifier', 'DingtalkNotifier']
+NOTIFIER_REGISTRY = {
+    'telegram': TelegramNotifier,
+    'dingtalk': DingtalkNotifier,
+}
+
+
+def build_notifiers(notifications: dict, logger=None) -> dict:
+    """按 [[notifications.channels]] 列表构造通知渠道，以渠道名称为键；
+    没有该列表时兼容旧的 [notifications.telegram] / [notifications.dingtalk] 配置"""
+    channels = notifications.get('channels')
+    if channels is None:
+        channels = [
+            dict(notifications[channel_type], type=channel_type)
+            for channel_type in NOTIFIER_REGISTRY
+            if channel_type in notifications
+        ]
+    
+    notifiers = {}
+    for config in channels:
+        notifier_class = NOTIFIER_REGISTRY.get(config.get('type', ''))
+        if notifier_class is None:
+            if logger:
+                logger.warning(f"未知的通知渠道类型: {config.get('type')}")
+            continue
+        notifier = notifier_class(config, logger)
+        notifiers[notifier.name] = notifier
+    return notifiers
+
+
+__all__ = [
+    'BaseNotifier', 'DeliveryError', 'TelegramNotifier', 'DingtalkNotifier', 'Digest', 'NotificationQueue',
+    'NOTIFIER_REGISTRY', 'build_notifiers'
+]
@@ -1,29 +1,64 @@
+import aiohttp
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import List, Optional, Tuple
+
+from .digest import Digest
+
+
+class DeliveryError(Exception):
+    """通知发送失败；retry_after 为上游要求的等待秒数（如 Telegram 429、钉钉限流）"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
 class BaseNotifier(ABC):
+    # 渠道类型，与 NOTIFIER_REGISTRY 的键一致，用于按类型查找默认发送速率
+    channel_type: str = ''
+    
+    # 单条消息的长度上限及计算方式（字符数或字节数），用于汇总消息分段
+    max_length: int = 4096
+    
+    # 单次发送的超时（秒），可在渠道配置中用 timeout 覆盖
+    timeout: float = 30.0
+    
     def __init__(self, config: dict, logger=None):
         self.config = config
         self.logger = logger
         self.enabled = config.get('enabled', False)
+        self.name = config.get('name') or config.get('type') or self.__class__.__name__
+        self.timeout = float(config.get('timeout', self.timeout))
+        # 每分钟最多发送条数，未配置时按渠道类型取默认值
+        self.rate_per_minute = config.get('rate_per_minute')
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """渠道内复用的连接池，首次使用时创建，运行结束调用 close() 释放"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+    
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     @abstractmethod
     async def send(self, title: str, message: str) -> bool:
         pass
     
-    async def send_if_enabled(self, title: str, message: str) -> bool:
-        if not self.enabled:
-            if self.logger:
-                self.logger.debug(f"{self.__class__.__name__} 未启用，跳过发送")
-            return False
-        
-        try:
-            result = await self.send(title, message)
-            if result and self.logger:
-                self.logger.info(f"{self.__class__.__name__} 通知发送成功")
-            return result
-        except Exception as e:
-            if self.logger:
-                self.logger.error(f"{self.__class__.__name__} 通知发送失败: {e}")
-            return False
+    @staticmethod
+    def measure(text: str) -> int:
+        return len(text)
+    
+    def digest_chunks(self, digest: Digest) -> List[Tuple[str, str]]:
+        """把汇总按本渠道的长度上限切分为 (标题, 内容) 列表"""
+        # 为标题和分段编号预留空间
+        reserved = self.measure(digest.title) + 32
+        chunks = digest.chunks(self.max_length - reserved, self.measure)
+        return [
+            (digest.title if len(chunks) == 1 else f"{digest.title} ({i}/{len(chunks)})", chunk)
+            for i, chunk in enumerate(chunks, 1)
+        ]
@@ -0,0 +1,56 @@
+from typing import Callable, List
+
+
+def split_message(text: str, limit: int, measure: Callable[[str], int] = len) -> List[str]:
+    """按行把消息切分为不超过 limit 的若干段；measure 为长度计算方式（字符数或字节数）"""
+    if measure(text) <= limit:
+        return [text]
+    
+    chunks = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        if measure(current + line) <= limit:
+            current += line
+            continue
+        if current:
+            chunks.append(current)
+            current = ""
+        # 单行超长时按字符硬切
+        while measure(line) > limit:
+            low, high = 1, len(line)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if measure(line[:middle]) <= limit:
+                    low = middle
+                else:
+                    high = middle - 1
+            chunks.append(line[:low])
+            line = line[low:]
+        current = line
+    if current:
+        chunks.append(current)
+    chunks = [chunk.rstrip("\n") for chunk in chunks]
+    # 分段边界上只剩空行的分段不单独发送
+    return [chunk for chunk in chunks if chunk]
+
+
+def utf8_len(text: str) -> int:
+    return len(text.encode('utf-8'))
+
+
+class Digest:
+    """一次运行的签到汇总：收集各站点的报告，每个通知渠道只发送一条（超长时分段）"""
+    
+    def __init__(self, title: str = "CheckinHub 签到汇总"):
+        self.title = title
+        self.sections: List[str] = []
+    
+    def add(self, message: str):
+        if message:
+            self.sections.append(message)
+    
+    def __bool__(self) -> bool:
+        return bool(self.sections)
+    
+    def chunks(self, limit: int, measure: Callable[[str], int] = len) -> List[str]:
+        return split_message("\n\n".join(self.sections), limit, measure)
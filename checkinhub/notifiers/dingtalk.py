@@ -1,27 +1,48 @@
-import aiohttp
 import time
 import hmac
 import hashlib
 import base64
 import urllib.parse
-from typing import Optional
-from .base import BaseNotifier
+from .base import BaseNotifier, DeliveryError
+from .digest import utf8_len
+
+
+# 钉钉机器人每分钟最多 20 条，超过后返回 130101
+RATE_LIMITED_ERRCODE = 130101
 
 
 class DingtalkNotifier(BaseNotifier):
+    channel_type = 'dingtalk'
+    
+    # markdown 消息内容上限约 20000 字节
+    max_length = 20000
+    measure = staticmethod(utf8_len)
+    
     def __init__(self, config: dict, logger=None):
         super().__init__(config, logger)
         self.webhook = config.get('webhook', '')
         self.secret = config.get('secret', '')
+        # 密钥只编码一次；HMAC 对象预先载入密钥，签名时 copy() 即可
+        self._hmac = hmac.new(self.secret.encode('utf-8'), digestmod=hashlib.sha256) if self.secret else None
+        self._signed = (0, self.webhook)
     
-    def _generate_sign(self) -> tuple:
-        timestamp = str(round(time.time() * 1000))
-        secret_enc = self.secret.encode('utf-8')
-        string_to_sign = f'{timestamp}\n{self.secret}'
-        string_to_sign_enc = string_to_sign.encode('utf-8')
-        hmac_code = hmac.new(secret_enc, string_to_sign_enc, digestmod=hashlib.sha256).digest()
-        sign = urllib.parse.quote_plus(base64.b64encode(hmac_code))
-        return timestamp, sign
+    def _generate_sign(self, timestamp: str) -> str:
+        hmac_code = self._hmac.copy()
+        hmac_code.update(f'{timestamp}\n{self.secret}'.encode('utf-8'))
+        return urllib.parse.quote_plus(base64.b64encode(hmac_code.digest()))
+    
+    def signed_url(self) -> str:
+        """带签名的 Webhook 地址；同一毫秒内复用上一次的签名"""
+        if not self._hmac:
+            return self.webhook
+        
+        timestamp = round(time.time() * 1000)
+        cached_timestamp, url = self._signed
+        if cached_timestamp == timestamp:
+            return url
+        url = f"{self.webhook}&timestamp={timestamp}&sign={self._generate_sign(str(timestamp))}"
+        self._signed = (timestamp, url)
+        return url
     
     async def send(self, title: str, message: str) -> bool:
         if not self.webhook:
@@ -29,11 +50,7 @@ class DingtalkNotifier(BaseNotifier):
                 self.logger.error("钉钉 Webhook 未配置")
             return False
         
-        url = self.webhook
-        
-        if self.secret:
-            timestamp, sign = self._generate_sign()
-            url = f"{self.webhook}&timestamp={timestamp}&sign={sign}"
+        url = self.signed_url()
         
         payload = {
             "msgtype": "markdown",
@@ -44,25 +61,24 @@ class DingtalkNotifier(BaseNotifier):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    url,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if data.get('errcode') == 0:
-                            return True
-                        else:
-                            if self.logger:
-                                self.logger.error(f"钉钉 API 返回错误: {data.get('errmsg', '')}")
-                            return False
+            async with self.session.post(url, json=payload) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    if data.get('errcode') == 0:
+                        return True
+                    elif data.get('errcode') == RATE_LIMITED_ERRCODE:
+                        raise DeliveryError("钉钉发送过于频繁", retry_after=60)
                     else:
                         if self.logger:
-                            self.logger.error(f"钉钉 HTTP 错误: {resp.status}")
+                            self.logger.error(f"钉钉 API 返回错误: {data.get('errmsg', '')}")
                         return False
+                else:
+                    if self.logger:
+                        self.logger.error(f"钉钉 HTTP 错误: {resp.status}")
+                    return False
         
+        except DeliveryError:
+            raise
         except Exception as e:
             if self.logger:
                 self.logger.error(f"钉钉发送失败: {e}")
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List
+
+from utils import span
+from .base import BaseNotifier, DeliveryError
+
+
+# 各渠道类型每分钟最多发送的条数（钉钉机器人限制为 20 条/分钟），未知类型按 20 条
+DEFAULT_RATE_PER_MINUTE = {
+    'telegram': 20,
+    'dingtalk': 20
+}
+
+
+class NotificationQueue:
+    """通知发送队列
+    
+    submit() 只把消息放入队列；start() 为每个渠道启动一个后台任务按顺序发送，渠道之间并发，
+    遵守每分钟条数限制，失败后按指数退避（或上游返回的 retry_after）重试。
+    同一渠道严格按提交顺序发送：队首的消息等待重试时，后面的消息（如同一份汇总的后续分段）也随之等待。
+    close() 时把未送达的消息写入 path，下次运行时继续发送。
+    """
+    
+    def __init__(self, path: str = 'data/notification_queue.json', rate_per_minute: Dict[str, int] = None,
+                 max_attempts: int = 5, base_delay: float = 2.0, max_delay: float = 300.0, logger=None):
+        self.path = Path(path)
+        # 按渠道名称覆盖的速率；未覆盖的渠道取渠道配置的 rate_per_minute，再按类型取默认值
+        self.rate_per_minute = dict(rate_per_minute or {})
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.logger = logger
+        self.jobs: Dict[str, List[Dict[str, Any]]] = {}
+        self._sent: Dict[str, deque] = {}
+        self._limits: Dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._channels: List[str] = []
+        self._load()
+    
+    @classmethod
+    def from_config(cls, config: dict, logger=None) -> "NotificationQueue":
+        dispatch = config.get('dispatch', {})
+        return cls(
+            path=dispatch.get('queue_file', 'data/notification_queue.json'),
+            rate_per_minute=dispatch.get('rate_per_minute'),
+            max_attempts=dispatch.get('max_attempts', 5),
+            base_delay=dispatch.get('base_delay', 2.0),
+            max_delay=dispatch.get('max_delay', 300.0),
+            logger=logger
+        )
+    
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for job in saved:
+            job['next_attempt_at'] = 0.0
+            self.jobs.setdefault(job['channel'], []).append(job)
+    
+    def _save(self):
+        pending = [job for jobs in self.jobs.values() for job in jobs]
+        if not pending:
+            if self.path.exists():
+                self.path.unlink()
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(pending, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+    
+    def submit(self, channel: str, title: str, message: str):
+        self.jobs.setdefault(channel, []).append({
+            'channel': channel,
+            'title': title,
+            'message': message,
+            'attempts': 0,
+            'next_attempt_at': 0.0
+        })
+        self._wakeup.set()
+    
+    def submit_digest(self, channel: str, notifier: BaseNotifier, digest) -> int:
+        chunks = notifier.digest_chunks(digest)
+        for title, chunk in chunks:
+            self.submit(channel, title, chunk)
+        return len(chunks)
+    
+    def pending(self) -> int:
+        return sum(len(jobs) for jobs in self.jobs.values())
+    
+    def _rate_delay(self, channel: str) -> float:
+        sent = self._sent.setdefault(channel, deque())
+        now = time.monotonic()
+        while sent and now - sent[0] >= 60:
+            sent.popleft()
+        if len(sent) < self._limits.get(channel, 20):
+            return 0.0
+        return 60 - (now - sent[0])
+    
+    async def _worker(self, channel: str, notifier: BaseNotifier):
+        while True:
+            jobs = self.jobs.get(channel)
+            if not jobs:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            job = jobs[0]
+            wait = max(job['next_attempt_at'] - time.time(), self._rate_delay(channel))
+            if wait > 0:
+                await asyncio.sleep(min(wait, 1.0))
+                continue
+            
+            self._sent[channel].append(time.monotonic())
+            retry_after = None
+            try:
+                with span(channel, 'notify') as timer:
+                    sent = await asyncio.wait_for(notifier.send(job['title'], job['message']), notifier.timeout)
+                    if not sent:
+                        timer.error = 'failed'
+            except DeliveryError as e:
+                sent, retry_after = False, e.retry_after
+            except asyncio.TimeoutError:
+                sent = False
+                if self.logger:
+                    self.logger.error(f"{channel} 通知发送超时（{notifier.timeout} 秒）")
+            except Exception as e:
+                sent = False
+                if self.logger:
+                    self.logger.error(f"{channel} 通知发送异常: {e}")
+            
+            if sent:
+                jobs.remove(job)
+                continue
+            
+            job['attempts'] += 1
+            if job['attempts'] >= self.max_attempts:
+                jobs.remove(job)
+                if self.logger:
+                    self.logger.error(f"{channel} 通知发送失败，已放弃: {job['title']}")
+                continue
+            
+            delay = min(self.base_delay * 2 ** (job['attempts'] - 1), self.max_delay) * random.uniform(0.8, 1.2)
+            delay = max(delay, retry_after or 0)
+            job['next_attempt_at'] = time.time() + delay
+            if self.logger:
+                self.logger.warning(f"{channel} 通知发送失败，{delay:.1f} 秒后重试（第 {job['attempts']} 次）")
+    
+    def _rate_limit(self, channel: str, notifier: BaseNotifier) -> int:
+        if channel in self.rate_per_minute:
+            return int(self.rate_per_minute[channel])
+        if getattr(notifier, 'rate_per_minute', None):
+            return int(notifier.rate_per_minute)
+        return DEFAULT_RATE_PER_MINUTE.get(getattr(notifier, 'channel_type', ''), 20)
+    
+    def start(self, notifiers: Dict[str, BaseNotifier]):
+        """为每个已启用的渠道启动发送任务；未启用渠道上次遗留的消息会保留到下次"""
+        for channel, notifier in notifiers.items():
+            if notifier.enabled:
+                self._limits[channel] = self._rate_limit(channel, notifier)
+                self._channels.append(channel)
+                self._workers.append(asyncio.create_task(self._worker(channel, notifier)))
+    
+    async def drain(self, timeout: float = 60.0) -> bool:
+        """等待已启动渠道中 timeout 秒内到期的消息发送完成，返回是否全部完成"""
+        deadline = time.time() + timeout
+        while True:
+            # 队首的消息到期前，同一渠道后面的消息都不会发送
+            due = [
+                channel for channel in self._channels
+                if self.jobs.get(channel) and self.jobs[channel][0]['next_attempt_at'] <= deadline
+            ]
+            if not due:
+                return True
+            if time.time() >= deadline:
+                return False
+            await asyncio.sleep(0.2)
+    
+    async def close(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self._channels.clear()
+        self._save()
@@ -1,13 +1,18 @@
-import aiohttp
-from typing import Optional
-from .base import BaseNotifier
+from .base import BaseNotifier, DeliveryError
 
 
 class TelegramNotifier(BaseNotifier):
+    channel_type = 'telegram'
+    
+    API_BASE = "https://api.telegram.org"
+    
     def __init__(self, config: dict, logger=None):
         super().__init__(config, logger)
         self.bot_token = config.get('bot_token', '')
         self.chat_id = config.get('chat_id', '')
+        # api_base 可指向自建的 Bot API 服务或反向代理
+        api_base = config.get('api_base', self.API_BASE).rstrip('/')
+        self.url = f"{api_base}/bot{self.bot_token}/sendMessage"
     
     async def send(self, title: str, message: str) -> bool:
         if not self.bot_token or not self.chat_id:
@@ -15,8 +20,6 @@ class TelegramNotifier(BaseNotifier):
                 self.logger.error("Telegram 配置不完整")
             return False
         
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        
         text = f"*{title}*\n\n{message}"
         
         payload = {
@@ -26,20 +29,21 @@ class TelegramNotifier(BaseNotifier):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    url,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return data.get('ok', False)
-                    else:
-                        if self.logger:
-                            self.logger.error(f"Telegram API 返回错误: {resp.status}")
-                        return False
+            async with self.session.post(self.url, json=payload) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    return data.get('ok', False)
+                elif resp.status == 429:
+                    data = await resp.json(content_type=None)
+                    retry_after = data.get('parameters', {}).get('retry_after')
+                    raise DeliveryError("Telegram 发送过于频繁", retry_after=retry_after)
+                else:
+                    if self.logger:
+                        self.logger.error(f"Telegram API 返回错误: {resp.status}")
+                    return False
         
+        except DeliveryError:
+            raise
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Telegram 发送失败: {e}")
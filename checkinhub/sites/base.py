@@ -1,7 +1,14 @@
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
+import aiohttp
 import asyncio
+import time
+from urllib.parse import urlparse
+from utils import TokenBucket, cookie_vault, circuit_breakers, CircuitOpenError, span
+from utils import timing
+from utils.cookie_jar import build_cookie_jar, dump_cookie_jar
 
 
 @dataclass
@@ -9,23 +16,43 @@ class CheckinResult:
     success: bool
     message: str
     data: Optional[Dict[str, Any]] = None
+    # 由 BaseSite.run 填写：账户名、账户在配置中的序号、开始时间与耗时
+    account: Optional[str] = None
+    index: Optional[int] = None
+    started_at: Optional[float] = None
+    duration_ms: Optional[float] = None
 
 
 class BaseSite(ABC):
     site_name: str = "base"
+    # 每秒允许开始的签到请求数与突发容量，可被站点配置 rate_limit / rate_burst 覆盖
+    rate_limit: float = 1.0
+    rate_burst: int = 1
+    # 同时签到的账户数，可被站点配置 concurrency 覆盖；令牌桶只控制账户开始的速率，
+    # 并发上限由它保证，避免慢响应时所有账户同时压在一个上游主机上
+    concurrency: int = 5
+    BASE_URL: Optional[str] = None
     
     def __init__(self, logger, config: Dict[str, Any]):
         self.logger = logger
         self.config = config
         self.site_config = config.get(self.site_name, {})
+        self.rate_limiter = TokenBucket(
+            self.site_config.get('rate_limit', self.rate_limit),
+            self.site_config.get('rate_burst', self.rate_burst)
+        )
+        self.semaphore = asyncio.Semaphore(max(1, int(self.site_config.get('concurrency', self.concurrency))))
+        # 多个站点并行时由调用方传入，限制所有站点合计同时签到的账户数
+        self.account_pool: Optional[asyncio.Semaphore] = None
     
     @abstractmethod
     async def checkin(self, account: Dict[str, Any]) -> CheckinResult:
         pass
     
     async def run(self, accounts: List[Dict[str, Any]]) -> List[CheckinResult]:
+        """并发签到所有启用的账户（同时进行的数量受 concurrency 限制），结果按账户在配置中的顺序返回"""
         results = []
-        enabled_accounts = [acc for acc in accounts if acc.get('enabled', True)]
+        enabled_accounts = [(index, acc) for index, acc in enumerate(accounts) if acc.get('enabled', True)]
         
         if not enabled_accounts:
             self.logger.info("没有启用的账户")
@@ -33,39 +60,124 @@ class BaseSite(ABC):
         
         self.logger.info(f"开始签到，共 {len(enabled_accounts)} 个账户")
         
-        for account in enabled_accounts:
-            username = account.get('username', 'unknown')
-            try:
-                self.logger.info(f"正在签到账户: {username}", extra={'account': username})
-                result = await self.checkin(account)
-                
-                if result.success:
-                    self.logger.info(f"签到成功: {result.message}", extra={'account': username})
-                else:
-                    self.logger.error(f"签到失败: {result.message}", extra={'account': username})
-                
-                results.append(result)
-                
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                error_msg = f"签到异常: {str(e)}"
-                self.logger.error(error_msg, extra={'account': username}, exc_info=True)
-                results.append(CheckinResult(success=False, message=error_msg))
+        results = list(await asyncio.gather(
+            *(self._run_account(account, index) for index, account in enabled_accounts)
+        ))
+        results.sort(key=lambda result: result.index)
         
         success_count = sum(1 for r in results if r.success)
         self.logger.info(f"签到完成: 成功 {success_count}/{len(results)}")
         
         return results
     
-    def format_results_message(self, results: List[CheckinResult], accounts: List[Dict[str, Any]]) -> str:
+    async def _run_account(self, account: Dict[str, Any], index: int = 0) -> CheckinResult:
+        async with self.semaphore:
+            if self.account_pool is None:
+                result = await self._timed_checkin(account)
+            else:
+                async with self.account_pool:
+                    result = await self._timed_checkin(account)
+        result.account = account.get('username', 'unknown')
+        result.index = index
+        return result
+    
+    async def _timed_checkin(self, account: Dict[str, Any]) -> CheckinResult:
+        with span(self.site_name, 'account') as timer:
+            result = await self._checkin_account(account)
+            if not result.success:
+                timer.error = 'failed'
+        return result
+    
+    async def _checkin_account(self, account: Dict[str, Any]) -> CheckinResult:
+        username = account.get('username', 'unknown')
+        started = started_at = None
+        host = urlparse(self.BASE_URL).hostname if self.BASE_URL else None
+        try:
+            await circuit_breakers.check(host, probe=False)
+            await self.rate_limiter.acquire()
+            self.logger.info(f"正在签到账户: {username}", extra={'account': username})
+            started_at = time.time()
+            started = time.perf_counter()
+            result = await self.checkin(account)
+            duration_ms = (time.perf_counter() - started) * 1000
+            result.started_at = started_at
+            result.duration_ms = round(duration_ms, 1)
+            
+            if result.success:
+                self.logger.info(
+                    f"签到成功: {result.message}",
+                    extra={'account': username, 'status': 'success', 'duration_ms': duration_ms}
+                )
+            else:
+                self.logger.error(
+                    f"签到失败: {result.message}",
+                    extra={'account': username, 'status': 'failed', 'duration_ms': duration_ms}
+                )
+            
+            return result
+        
+        except CircuitOpenError as e:
+            self.logger.warning(
+                f"账户 {username} 已跳过: {e}",
+                extra={'account': username, 'status': 'skipped', 'error': type(e).__name__}
+            )
+            return CheckinResult(success=False, message=f"已跳过: {e}")
+        
+        except Exception as e:
+            error_msg = f"签到异常: {str(e)}"
+            self.logger.error(
+                error_msg,
+                extra={
+                    'account': username,
+                    'status': 'error',
+                    'duration_ms': (time.perf_counter() - started) * 1000 if started else None,
+                    'error': type(e).__name__
+                },
+                exc_info=True
+            )
+            return CheckinResult(
+                success=False,
+                message=error_msg,
+                started_at=started_at,
+                duration_ms=round((time.perf_counter() - started) * 1000, 1) if started else None
+            )
+    
+    @asynccontextmanager
+    async def session(self, account: Dict[str, Any], **kwargs) -> AsyncIterator[aiohttp.ClientSession]:
+        """账户专用的会话：载入上次保存的 Cookie（没有时使用配置中的 cookie），结束时加密保存响应更新过的 Cookie"""
+        username = account.get('username', 'unknown')
+        seed = account.get('cookie')
+        try:
+            records = await asyncio.to_thread(cookie_vault.load_records, self.site_name, username, seed)
+        except Exception as e:
+            self.logger.warning(f"账户 {username} 的 Cookie 载入失败，本次只使用配置中的 cookie: {e}")
+            records = []
+        jar = build_cookie_jar(records, seed, self.BASE_URL)
+        
+        trace_configs = [circuit_breakers.trace_config(), timing.trace_config(self.site_name)] + kwargs.pop('trace_configs', [])
+        async with aiohttp.ClientSession(cookie_jar=jar, trace_configs=trace_configs, **kwargs) as session:
+            try:
+                yield session
+            finally:
+                try:
+                    await asyncio.to_thread(
+                        cookie_vault.save_records, self.site_name, username, dump_cookie_jar(jar), seed
+                    )
+                except Exception as e:
+                    self.logger.warning(f"账户 {username} 的 Cookie 保存失败: {e}")
+    
+    def observe_response(self, status: int, headers=None):
+        """把上游响应状态反馈给限速器，429/503 时自动退避"""
+        retry_after = headers.get('Retry-After') if headers else None
+        self.rate_limiter.observe(status, retry_after)
+    
+    def format_results_message(self, results: List[CheckinResult]) -> str:
         site_name = self.site_config.get('name', self.site_name)
         lines = [f"📊 {site_name} 签到报告\n"]
         
-        for i, result in enumerate(results):
-            username = accounts[i].get('username', 'unknown') if i < len(accounts) else 'unknown'
+        for result in sorted(results, key=lambda item: (item.index is None, item.index)):
             status = "✅" if result.success else "❌"
-            lines.append(f"{status} {username}: {result.message}")
+            lines.append(f"{status} {result.account or 'unknown'}: {result.message}")
         
         success_count = sum(1 for r in results if r.success)
         lines.append(f"\n总计: 成功 {success_count}/{len(results)}")
@@ -6,6 +6,8 @@ from .base import BaseSite, CheckinResult
 
 class ExampleSite(BaseSite):
     site_name = "example"
+    rate_limit = 10.0
+    rate_burst = 10
     
     async def checkin(self, account: Dict[str, Any]) -> CheckinResult:
         username = account.get('username', '')
@@ -1,11 +1,15 @@
 import aiohttp
+import asyncio
 import json
 from typing import Dict, Any
+from utils import CircuitOpenError
 from .base import BaseSite, CheckinResult
 
 
 class GladosSite(BaseSite):
     site_name = "glados"
+    rate_limit = 2.0
+    rate_burst = 2
     
     BASE_URL = "https://glados.rocks"
     CHECKIN_URL = f"{BASE_URL}/api/user/checkin"
@@ -21,19 +25,19 @@ class GladosSite(BaseSite):
             )
         
         headers = {
-            'Cookie': cookie,
             'Content-Type': 'application/json',
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with self.session(account) as session:
                 async with session.post(
                     self.CHECKIN_URL,
                     headers=headers,
                     json={"token": "glados.one"},
                     timeout=aiohttp.ClientTimeout(total=30)
                 ) as resp:
+                    self.observe_response(resp.status, resp.headers)
                     if resp.status == 200:
                         data = await resp.json()
                         
@@ -74,6 +78,8 @@ class GladosSite(BaseSite):
                 success=False,
                 message="请求超时"
             )
+        except CircuitOpenError:
+            raise
         except Exception as e:
             return CheckinResult(
                 success=False,
@@ -1,15 +1,114 @@
 import aiohttp
-import re
-from typing import Dict, Any
+import asyncio
+import random
+import time
+from typing import Dict, Any, List, Optional
+from utils import CircuitOpenError
 from .base import BaseSite, CheckinResult
 
 
 class HostLocSite(BaseSite):
     site_name = "hostloc"
+    # 每个账户要连续访问约 10 个空间，且 HostLoc 对短时间内的密集请求会触发 CC 防护，
+    # 所以账户开始的间隔（2 秒）比默认的每秒 1 个更慢；同时进行的访问另由 host_concurrency 限制
+    rate_limit = 0.5
+    rate_burst = 1
     
     BASE_URL = "https://hostloc.com"
     SPACE_URL = f"{BASE_URL}/space-uid-{{}}.html"
     
+    # 每天访问他人空间获得积分的次数上限
+    VISIT_TARGET = 10
+    # 单个账户同时进行的访问数，以及整个站点（同一主机）同时进行的访问数
+    VISIT_CONCURRENCY = 3
+    HOST_CONCURRENCY = 6
+    VISIT_TIMEOUT = 10
+    # 随机抽取访问对象的 UID 范围 [最小, 最大]；站点配置 uid_pool 给出 UID 列表时从列表中抽取
+    UID_RANGE = (10000, 60000)
+    
+    def __init__(self, logger, config: Dict[str, Any]):
+        super().__init__(logger, config)
+        self.visit_target = int(self.site_config.get('visit_target', self.VISIT_TARGET))
+        self.visit_concurrency = max(1, int(self.site_config.get('visit_concurrency', self.VISIT_CONCURRENCY)))
+        self.visit_timeout = aiohttp.ClientTimeout(total=self.site_config.get('visit_timeout', self.VISIT_TIMEOUT))
+        self.host_semaphore = asyncio.Semaphore(
+            max(1, int(self.site_config.get('host_concurrency', self.HOST_CONCURRENCY)))
+        )
+    
+    def draw_uids(self, own_uid: str) -> List[int]:
+        """随机抽取访问对象（排除自己），数量为目标次数的两倍，留出访问失败时的余量"""
+        count = self.visit_target * 2
+        pool = self.site_config.get('uid_pool')
+        if pool:
+            candidates = [int(uid) for uid in pool]
+        else:
+            low, high = self.site_config.get('uid_range', self.UID_RANGE)
+            candidates = range(int(low), int(high) + 1)
+        
+        uids = random.sample(candidates, min(count + 1, len(candidates)))
+        return [uid for uid in uids if str(uid) != str(own_uid)][:count]
+    
+    async def _visit(self, session: aiohttp.ClientSession, uid: int, headers: Dict[str, str]) -> Dict[str, Any]:
+        visit: Dict[str, Any] = {'uid': uid, 'status': None, 'latency_ms': None, 'error': None}
+        async with self.host_semaphore:
+            started = time.perf_counter()
+            try:
+                async with session.get(
+                    self.SPACE_URL.format(uid),
+                    headers=headers,
+                    timeout=self.visit_timeout,
+                    allow_redirects=False
+                ) as resp:
+                    self.observe_response(resp.status, resp.headers)
+                    visit['status'] = resp.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                visit['error'] = type(e).__name__
+            visit['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        self.logger.debug(
+            f"访问空间 {uid}: {visit['error'] or visit['status']}，耗时 {visit['latency_ms']} ms"
+        )
+        return visit
+    
+    async def visit_spaces(self, session: aiohttp.ClientSession, uids: List[int],
+                           headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        """并发访问空间，成功次数（含进行中的访问）达到目标后不再发起新的访问
+        
+        主机熔断（CircuitOpenError）时结束本账户的访问，保留已完成的访问；一次都没有成功时才抛出，
+        由调用方把账户记为跳过。其他异常同样让其余 worker 停止发起新的访问，等进行中的访问结束后再抛出。
+        """
+        visits: List[Dict[str, Any]] = []
+        pending = iter(uids)
+        state = {'succeeded': 0, 'in_flight': 0, 'stopped': False, 'circuit_error': None}
+        
+        async def worker():
+            while not state['stopped'] and state['succeeded'] + state['in_flight'] < self.visit_target:
+                uid: Optional[int] = next(pending, None)
+                if uid is None:
+                    return
+                state['in_flight'] += 1
+                try:
+                    visit = await self._visit(session, uid, headers)
+                except CircuitOpenError as e:
+                    state['stopped'] = True
+                    state['circuit_error'] = e
+                    return
+                except Exception:
+                    state['stopped'] = True
+                    raise
+                finally:
+                    state['in_flight'] -= 1
+                visits.append(visit)
+                if visit['status'] in (200, 301, 302):
+                    state['succeeded'] += 1
+        
+        outcomes = await asyncio.gather(*(worker() for _ in range(self.visit_concurrency)), return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                raise outcome
+        if state['circuit_error'] is not None and not state['succeeded']:
+            raise state['circuit_error']
+        return visits
+    
     async def checkin(self, account: Dict[str, Any]) -> CheckinResult:
         cookie = account.get('cookie', '')
         uid = account.get('uid', '')
@@ -27,44 +126,40 @@ class HostLocSite(BaseSite):
             )
         
         headers = {
-            'Cookie': cookie,
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Referer': self.BASE_URL
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                visit_count = 0
-                
-                for visit_uid in range(10000, 10010):
-                    url = self.SPACE_URL.format(visit_uid)
-                    
-                    try:
-                        async with session.get(
-                            url,
-                            headers=headers,
-                            timeout=aiohttp.ClientTimeout(total=10),
-                            allow_redirects=False
-                        ) as resp:
-                            if resp.status in [200, 301, 302]:
-                                visit_count += 1
-                    except:
-                        continue
-                
-                if visit_count > 0:
-                    return CheckinResult(
-                        success=True,
-                        message=f"访问成功，共访问 {visit_count} 个空间",
-                        data={'visit_count': visit_count}
-                    )
-                else:
-                    return CheckinResult(
-                        success=False,
-                        message="访问失败"
-                    )
-        
-        except Exception as e:
+            async with self.session(account) as session:
+                visits = await self.visit_spaces(session, self.draw_uids(uid), headers)
+        except CircuitOpenError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
             return CheckinResult(
                 success=False,
-                message=f"请求异常: {str(e)}"
+                message=f"请求异常: {type(e).__name__}: {e}"
+            )
+        
+        succeeded = [visit for visit in visits if visit['status'] in (200, 301, 302)]
+        latencies = [visit['latency_ms'] for visit in visits]
+        data = {
+            'visit_count': len(succeeded),
+            'visits': visits,
+            'avg_latency_ms': round(sum(latencies) / len(latencies), 1) if latencies else None,
+            'max_latency_ms': max(latencies) if latencies else None
+        }
+        
+        if succeeded:
+            return CheckinResult(
+                success=True,
+                message=f"访问成功，共访问 {len(succeeded)} 个空间（平均 {data['avg_latency_ms']:.0f} ms）",
+                data=data
             )
+        
+        errors = sorted({visit['error'] or f"HTTP {visit['status']}" for visit in visits})
+        return CheckinResult(
+            success=False,
+            message=f"访问失败: {', '.join(errors) or '没有可访问的 UID'}",
+            data=data
+        )
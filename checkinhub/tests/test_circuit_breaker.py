@@ -0,0 +1,141 @@
+import asyncio
+import logging
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from sites.hostloc_site import HostLocSite
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreakerRegistry, CircuitOpenError
+
+
+def half_open(host):
+    breakers = CircuitBreakerRegistry(failure_threshold=1)
+    breakers.record_failure(host)
+    breakers._circuit(host).state = HALF_OPEN
+    return breakers
+
+
+def test_half_open_requests_wait_for_the_probe():
+    async def main():
+        breakers = half_open("example.com")
+        assert await breakers.check("example.com") is True
+        waiter = asyncio.create_task(breakers.check("example.com"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        
+        breakers.record_success("example.com")
+        assert await waiter is False
+        return breakers
+    
+    assert asyncio.run(main()).stats()["example.com"]["state"] == CLOSED
+
+
+def test_concurrent_requests_follow_a_successful_probe():
+    async def main():
+        events = []
+        
+        async def page(request):
+            events.append("start")
+            await asyncio.sleep(0.05)
+            events.append("end")
+            return web.Response(text="ok")
+        
+        app = web.Application()
+        app.router.add_get("/", page)
+        async with TestServer(app, host="127.0.0.1") as server:
+            breakers = half_open("127.0.0.1")
+            async with aiohttp.ClientSession(trace_configs=[breakers.trace_config()]) as session:
+                async def get():
+                    async with session.get(server.make_url("/")) as response:
+                        return response.status
+                
+                outcomes = await asyncio.gather(get(), get(), get(), return_exceptions=True)
+        return events, outcomes, breakers
+    
+    events, outcomes, breakers = asyncio.run(main())
+    
+    assert outcomes == [200, 200, 200]
+    assert events[:2] == ["start", "end"]
+    assert breakers.stats()["127.0.0.1"]["state"] == CLOSED
+
+
+def test_failed_probe_reopens_and_rejects_waiting_requests():
+    async def main():
+        breakers = half_open("127.0.0.1")
+        async with aiohttp.ClientSession(trace_configs=[breakers.trace_config()]) as session:
+            async def get():
+                async with session.get("http://127.0.0.1:9/") as response:
+                    return response.status
+            
+            outcomes = await asyncio.gather(get(), get(), get(), return_exceptions=True)
+        return outcomes, breakers
+    
+    outcomes, breakers = asyncio.run(main())
+    
+    assert isinstance(outcomes[0], aiohttp.ClientConnectorError)
+    assert all(isinstance(outcome, CircuitOpenError) for outcome in outcomes[1:])
+    assert breakers.stats()["127.0.0.1"]["state"] == OPEN
+
+
+def visit_stub(site, fail_uids, started, finished):
+    async def visit(session, uid, headers):
+        started.append(uid)
+        await asyncio.sleep(0.01 if uid in fail_uids else 0.05)
+        if uid in fail_uids:
+            raise CircuitOpenError("hostloc.com", 3)
+        finished.append(uid)
+        return {"uid": uid, "status": 200, "latency_ms": 1.0, "error": None}
+    
+    site._visit = visit
+
+
+def test_circuit_error_ends_visits_but_keeps_completed_ones():
+    site = HostLocSite(logging.getLogger("test"), {"hostloc": {"visit_concurrency": 3, "visit_target": 10}})
+    started, finished = [], []
+    visit_stub(site, {2}, started, finished)
+    
+    visits = asyncio.run(site.visit_spaces(None, list(range(1, 21)), {}))
+    
+    assert started == [1, 2, 3]
+    assert [visit["uid"] for visit in visits] == [1, 3]
+
+
+def test_circuit_error_without_any_success_is_raised():
+    site = HostLocSite(logging.getLogger("test"), {"hostloc": {"visit_concurrency": 3, "visit_target": 10}})
+    started, finished = [], []
+    visit_stub(site, set(range(1, 21)), started, finished)
+    
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(site.visit_spaces(None, list(range(1, 21)), {}))
+    assert started == [1, 2, 3]
+
+
+def test_accounts_on_recovered_half_open_host_all_succeed(monkeypatch):
+    from utils import circuit_breakers, cookie_vault
+    
+    async def main():
+        async def space(request):
+            await asyncio.sleep(0.02)
+            return web.Response(text="space")
+        
+        app = web.Application()
+        app.router.add_get("/space-uid-{uid}.html", space)
+        async with TestServer(app, host="127.0.0.1") as server:
+            site = HostLocSite(logging.getLogger("test"), {"hostloc": {
+                "rate_limit": 1000, "rate_burst": 10, "visit_target": 3, "uid_pool": list(range(1, 31))
+            }})
+            site.BASE_URL = str(server.make_url("")).rstrip("/")
+            site.SPACE_URL = f"{site.BASE_URL}/space-uid-{{}}.html"
+            accounts = [{"username": f"user{i}", "cookie": "a=1", "uid": "100"} for i in range(3)]
+            return await site.run(accounts)
+    
+    breakers = half_open("127.0.0.1")
+    monkeypatch.setattr(circuit_breakers, "_circuits", breakers._circuits)
+    monkeypatch.setattr(cookie_vault, "enabled", False)
+    
+    results = asyncio.run(main())
+    
+    assert [result.success for result in results] == [True, True, True]
+    assert breakers.stats()["127.0.0.1"]["state"] == CLOSED
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from cryptography.fernet import Fernet
+
+from utils.cookie_jar import CookieVault, build_cookie_jar, dump_cookie_jar
+
+
+SEED = "koa:sess=eyJ1c2VySWQiOjE=; koa:sess.sig=abc"
+
+
+async def cookie_header(jar_for_base):
+    """向本地服务发一次请求，返回服务端收到的 Cookie 请求头"""
+    async def echo(request):
+        return web.Response(text=request.headers.get("Cookie", ""))
+    
+    app = web.Application()
+    app.router.add_get("/", echo)
+    async with TestServer(app, host="127.0.0.1") as server:
+        base = str(server.make_url("")).rstrip("/")
+        jar = jar_for_base(base)
+        async with aiohttp.ClientSession(cookie_jar=jar) as session:
+            async with session.get(f"{base}/") as response:
+                return await response.text(), jar
+
+
+def test_seed_cookies_are_sent_unquoted_to_ip_hosts():
+    header, _ = asyncio.run(cookie_header(lambda base: build_cookie_jar([], SEED, base)))
+    
+    assert header == "koa:sess=eyJ1c2VySWQiOjE=; koa:sess.sig=abc"
+
+
+def test_saved_records_round_trip_through_the_vault(tmp_path):
+    vault = CookieVault(str(tmp_path), key=Fernet.generate_key().decode())
+    _, jar = asyncio.run(cookie_header(lambda base: build_cookie_jar([], SEED, base)))
+    vault.save_records("glados", "alice", dump_cookie_jar(jar), SEED)
+    
+    records = vault.load_records("glados", "alice", SEED)
+    header, _ = asyncio.run(cookie_header(lambda base: build_cookie_jar(records, SEED, base)))
+    
+    assert {record["name"]: record["value"] for record in records} == {"koa:sess": "eyJ1c2VySWQiOjE=", "koa:sess.sig": "abc"}
+    assert header == "koa:sess=eyJ1c2VySWQiOjE=; koa:sess.sig=abc"
+    assert vault.load_records("glados", "alice", "koa:sess=changed") == []
+
+
+def test_expired_records_are_not_loaded(tmp_path):
+    vault = CookieVault(str(tmp_path), key=Fernet.generate_key().decode(), session_ttl=0)
+    vault.save_records("glados", "alice", [
+        {"name": "session", "value": "x", "domain": "example.com", "path": "/", "expires": None, "secure": False},
+        {"name": "old", "value": "y", "domain": "example.com", "path": "/", "expires": int(time.time()) - 1, "secure": False}
+    ])
+    
+    assert vault.load_records("glados", "alice") == []
+
+
+def test_key_file_outside_data_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("CHECKINHUB_COOKIE_KEY", raising=False)
+    key_file = tmp_path / "secrets" / "cookie.key"
+    vault = CookieVault(str(tmp_path / "cookies"))
+    vault.configure({"directory": str(tmp_path / "cookies"), "key_file": str(key_file)})
+    vault.save_records("glados", "alice", [
+        {"name": "a", "value": "1", "domain": "example.com", "path": "/", "expires": None, "secure": False}
+    ])
+    
+    assert key_file.exists()
+    assert not (tmp_path / "cookies" / ".key").exists()
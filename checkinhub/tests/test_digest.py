@@ -0,0 +1,63 @@
+import pytest
+
+from notifiers import DingtalkNotifier, TelegramNotifier
+from notifiers.digest import Digest, split_message, utf8_len
+
+
+def lines_of(chunks):
+    return [line for chunk in chunks for line in chunk.split("\n") if line]
+
+
+@pytest.mark.parametrize("measure", [len, utf8_len])
+def test_split_keeps_whole_lines(measure):
+    lines = [f"{i} 签到成功 " + "x" * (i % 7) for i in range(200)]
+    
+    chunks = split_message("\n".join(lines), 120, measure)
+    
+    assert len(chunks) > 1
+    assert all(measure(chunk) <= 120 for chunk in chunks)
+    assert lines_of(chunks) == lines
+
+
+@pytest.mark.parametrize("measure", [len, utf8_len])
+def test_split_hard_cuts_a_single_long_line(measure):
+    long_line = "签到" * 50 + "abc"
+    
+    chunks = split_message(f"first\n{long_line}\nlast", 16, measure)
+    
+    assert all(0 < measure(chunk) <= 16 for chunk in chunks)
+    assert chunks[0] == "first"
+    # 超长行按字符切开，切剩的部分与下一行合并，不丢字符
+    assert "".join(chunks[1:]) == f"{long_line}\nlast"
+
+
+def test_split_skips_chunks_of_blank_lines():
+    assert split_message("aaaa\n\n" + "b" * 12, 5) == ["aaaa", "bbbbb", "bbbbb", "bb"]
+
+
+def make_digest(sites, accounts):
+    digest = Digest()
+    for i in range(sites):
+        digest.add("\n".join([f"📋 站点{i}"] + [f"✅ 账户{j}: 签到成功，获得 1 天" for j in range(accounts)]))
+    return digest
+
+
+@pytest.mark.parametrize("notifier_class", [TelegramNotifier, DingtalkNotifier])
+def test_digest_chunks_fit_channel_limit(notifier_class):
+    notifier = notifier_class({})
+    digest = make_digest(sites=20, accounts=60)
+    
+    chunks = notifier.digest_chunks(digest)
+    
+    assert len(chunks) > 1
+    for i, (title, chunk) in enumerate(chunks, 1):
+        assert title == f"{digest.title} ({i}/{len(chunks)})"
+        # 发送时标题与正文拼成一条消息
+        assert notifier.measure(f"## {title}\n\n{chunk}") <= notifier.max_length
+    assert lines_of(chunk for _, chunk in chunks) == lines_of(digest.sections)
+
+
+def test_single_chunk_keeps_plain_title():
+    digest = make_digest(sites=1, accounts=2)
+    
+    assert TelegramNotifier({}).digest_chunks(digest) == [(digest.title, digest.sections[0])]
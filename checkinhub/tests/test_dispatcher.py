@@ -0,0 +1,76 @@
+import asyncio
+
+from notifiers.base import DeliveryError
+from notifiers import build_notifiers
+from notifiers.dispatcher import NotificationQueue
+
+
+class FakeNotifier:
+    enabled = True
+    timeout = 5.0
+    
+    def __init__(self, failures=None):
+        self.sent = []
+        # 消息 -> 还需失败的次数
+        self.failures = dict(failures or {})
+    
+    async def send(self, title, message):
+        if self.failures.get(message, 0) > 0:
+            self.failures[message] -= 1
+            raise DeliveryError("temporary")
+        self.sent.append(message)
+        return True
+
+
+def run_queue(tmp_path, notifier, messages, **kwargs):
+    async def main():
+        queue = NotificationQueue(str(tmp_path / "queue.json"), base_delay=0.05, max_delay=0.05, **kwargs)
+        for message in messages:
+            queue.submit("telegram", "title", message)
+        queue.start({"telegram": notifier})
+        drained = await queue.drain(timeout=5)
+        await queue.close()
+        return drained, queue
+    
+    return asyncio.run(main())
+
+
+def test_delivers_in_submission_order(tmp_path):
+    notifier = FakeNotifier()
+    
+    drained, queue = run_queue(tmp_path, notifier, ["1", "2", "3"])
+    
+    assert drained
+    assert notifier.sent == ["1", "2", "3"]
+    assert queue.pending() == 0
+
+
+def test_retried_chunk_is_not_overtaken(tmp_path):
+    notifier = FakeNotifier(failures={"1": 2})
+    
+    drained, _ = run_queue(tmp_path, notifier, ["1", "2", "3"])
+    
+    assert drained
+    assert notifier.sent == ["1", "2", "3"]
+
+
+def test_gives_up_after_max_attempts_and_moves_on(tmp_path):
+    notifier = FakeNotifier(failures={"1": 10})
+    
+    drained, _ = run_queue(tmp_path, notifier, ["1", "2"], max_attempts=2)
+    
+    assert drained
+    assert notifier.sent == ["2"]
+
+
+def test_rate_limit_follows_channel_type(tmp_path):
+    queue = NotificationQueue(str(tmp_path / "queue.json"), rate_per_minute={"tg-ops": 5})
+    notifiers = build_notifiers({"channels": [
+        {"type": "dingtalk", "name": "dt-ops"},
+        {"type": "telegram", "name": "tg-ops"},
+        {"type": "telegram", "name": "tg-admin", "rate_per_minute": 10},
+    ]})
+    
+    limits = {channel: queue._rate_limit(channel, notifier) for channel, notifier in notifiers.items()}
+    
+    assert limits == {"dt-ops": 20, "tg-ops": 5, "tg-admin": 10}
@@ -0,0 +1,99 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils import rate_limiter
+from utils.rate_limiter import TokenBucket, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+    
+    def monotonic(self):
+        return self.now
+    
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # 只替换限速器模块内的时钟，事件循环仍使用真实时间
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_limiter, "asyncio", SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    return clock
+
+
+def acquire(bucket, times=1):
+    async def main():
+        for _ in range(times):
+            await bucket.acquire()
+    
+    asyncio.run(main())
+
+
+def test_burst_is_available_immediately(clock):
+    bucket = TokenBucket(rate=1, burst=3)
+    
+    acquire(bucket, 3)
+    
+    assert clock.sleeps == []
+    assert bucket.tokens == 0
+
+
+def test_refill_waits_for_next_token(clock):
+    bucket = TokenBucket(rate=2, burst=1)
+    
+    acquire(bucket, 3)
+    
+    assert clock.sleeps == [0.5, 0.5]
+    assert clock.now == 1001.0
+
+
+def test_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(rate=4, burst=2)
+    acquire(bucket, 2)
+    
+    clock.now += 60
+    acquire(bucket, 3)
+    
+    # 空闲一分钟后也只攒下 burst 个令牌，第三次需要等待
+    assert clock.sleeps == [0.25]
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_backoff_halves_rate_and_honours_retry_after(clock, status):
+    bucket = TokenBucket(rate=4, burst=2)
+    
+    bucket.observe(status, "3")
+    acquire(bucket, 3)
+    
+    assert bucket.rate == 2
+    # 先等 Retry-After，期间补满 burst 个令牌；之后按减半后的速率等待
+    assert clock.sleeps == [3.0, 0.5]
+
+
+def test_backoff_is_bounded_and_recovers(clock):
+    bucket = TokenBucket(rate=16, burst=1)
+    
+    for _ in range(10):
+        bucket.observe(429)
+    assert bucket.rate == bucket.min_rate == 1
+    
+    bucket.observe(404)
+    assert bucket.rate == 1
+    for _ in range(20):
+        bucket.observe(200)
+    assert bucket.rate == 16
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+import main
+from notifiers import Digest
+from sites.base import BaseSite, CheckinResult
+
+
+class OkSite(BaseSite):
+    site_name = "ok"
+    
+    async def checkin(self, account):
+        return CheckinResult(success=True, message="签到成功")
+
+
+class HangingSite(BaseSite):
+    site_name = "hang"
+    
+    async def checkin(self, account):
+        await asyncio.sleep(3600)
+
+
+class BrokenSite(OkSite):
+    site_name = "boom"
+    
+    async def run(self, accounts):
+        raise RuntimeError("site crashed")
+
+
+SITES = {"hang": HangingSite, "boom": BrokenSite, "ok": OkSite}
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(main, "SITE_REGISTRY", SITES)
+    monkeypatch.setattr(main, "get_site_logger", lambda site_id, **kwargs: logging.getLogger(f"test.{site_id}"))
+    return {
+        site_id: {"name": site_id, "notify": True, "rate_limit": 1000.0, "accounts": [{"username": "u"}]}
+        for site_id in SITES
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_timeout_and_failure_do_not_affect_other_sites(registry, workers, capsys):
+    digest = Digest()
+    started = time.perf_counter()
+    
+    asyncio.run(main.run_sites(
+        list(registry), registry, {}, digest, logging.getLogger("test"),
+        workers=workers, site_timeout=0.2
+    ))
+    
+    # 卡住的站点在 site_timeout 后被取消，逐个运行时也不会拖住后面的站点
+    assert time.perf_counter() - started < 2
+    assert digest.sections[0] == "❌ hang: 超时（0.2 秒）"
+    assert digest.sections[1] == "❌ boom: 运行失败: site crashed"
+    assert "✅ u: 签到成功" in digest.sections[2]
+    
+    output = capsys.readouterr().out
+    assert "hang: 超时（0.2 秒）" in output
+    assert "ok: 成功 1/1" in output
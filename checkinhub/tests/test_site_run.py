@@ -0,0 +1,46 @@
+import asyncio
+import logging
+
+from sites.base import BaseSite, CheckinResult
+
+
+class FakeSite(BaseSite):
+    site_name = "fake"
+    rate_limit = 1000.0
+    rate_burst = 10
+    concurrency = 3
+    
+    def __init__(self, delays):
+        super().__init__(logging.getLogger("test.fake"), {})
+        self.delays = delays
+        self.finished = []
+        self.running = 0
+        self.max_running = 0
+    
+    async def checkin(self, account):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays[account["username"]])
+        finally:
+            self.running -= 1
+        self.finished.append(account["username"])
+        if account["username"] == "broken":
+            raise RuntimeError("boom")
+        return CheckinResult(success=True, message=f"ok {account['username']}")
+
+
+def test_results_follow_account_order():
+    # 排在前面的账户最慢，完成顺序与配置顺序相反
+    delays = {"a": 0.08, "b": 0.06, "off": 0, "broken": 0.04, "c": 0.02, "d": 0.0}
+    accounts = [{"username": name, "enabled": name != "off"} for name in delays]
+    site = FakeSite(delays)
+    
+    results = asyncio.run(site.run(accounts))
+    
+    assert site.finished[0] != "a"
+    assert [result.account for result in results] == ["a", "b", "broken", "c", "d"]
+    assert [result.index for result in results] == [0, 1, 3, 4, 5]
+    assert [result.success for result in results] == [True, True, False, True, True]
+    assert results[0].message == "ok a"
+    assert site.max_running == 3
@@ -1,4 +1,10 @@
 from .logger import setup_logger, get_site_logger
 from .config_loader import load_config, load_sites_config
+from .rate_limiter import TokenBucket
+from .log_retention import LogRetention
+from .log_pipeline import log_pipeline
+from .cookie_jar import cookie_vault
+from .circuit_breaker import circuit_breakers, CircuitOpenError
+from .timing import span, start_recording
 
-__all__ = ['setup_logger', 'get_site_logger', 'load_config', 'load_sites_config']
+__all__ = ['setup_logger', 'get_site_logger', 'load_config', 'load_sites_config', 'TokenBucket', 'LogRetention', 'log_pipeline', 'cookie_vault', 'circuit_breakers', 'CircuitOpenError', 'span', 'start_recording']
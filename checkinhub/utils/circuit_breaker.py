@@ -0,0 +1,166 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+import aiohttp
+
+
+# 计为主机故障的异常：连接失败与超时；HTTP 错误状态码说明主机仍可达，不计入
+FAILURE_EXCEPTIONS = (aiohttp.ClientConnectorError, asyncio.TimeoutError)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, host: str, failures: int):
+        super().__init__(f'{host} 连续 {failures} 次连接失败或超时，已暂停请求')
+        self.host = host
+        self.failures = failures
+
+
+class HostCircuit:
+    def __init__(self, host: str):
+        self.host = host
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        # 半开时只放行一个探测请求，其余请求等待它的结果；探测进行中时不为 None
+        self.probe_done: Optional[asyncio.Event] = None
+
+
+class CircuitBreakerRegistry:
+    """按上游主机的熔断器
+    
+    同一主机连续 failure_threshold 次连接失败或超时后熔断，本次运行中剩余的请求和账户直接跳过。
+    退出时用 save() 记录熔断中的主机，下次运行 load() 后以半开状态开始：只放行一个探测请求，其余请求等待它的结果，成功即恢复，失败则立即再次熔断。
+    trace_config() 返回的 aiohttp TraceConfig 会在请求前检查熔断状态并记录每次请求的结果。
+    """
+    
+    def __init__(self, failure_threshold: int = 3, enabled: bool = True):
+        self.failure_threshold = failure_threshold
+        self.enabled = enabled
+        self._circuits: Dict[str, HostCircuit] = {}
+    
+    def configure(self, config: Dict[str, Any]):
+        self.enabled = bool(config.get('enabled', True))
+        self.failure_threshold = max(1, int(config.get('failure_threshold', 3)))
+    
+    def _circuit(self, host: str) -> HostCircuit:
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = HostCircuit(host)
+        return circuit
+    
+    def is_open(self, host: Optional[str]) -> bool:
+        if not self.enabled or not host:
+            return False
+        circuit = self._circuits.get(host)
+        return circuit is not None and circuit.state == OPEN
+    
+    async def check(self, host: Optional[str], probe: bool = True) -> bool:
+        """熔断中时抛出 CircuitOpenError；半开时本次请求成为唯一的探测请求并返回 True
+        
+        探测进行中时等待它的结果：成功后照常放行，失败后抛出 CircuitOpenError。
+        调用方须以 record_success / record_failure / release 结束探测；probe=False 只检查状态，不占用探测名额。
+        """
+        while True:
+            if self.is_open(host):
+                raise CircuitOpenError(host, self._circuits[host].failures)
+            circuit = self._circuits.get(host) if self.enabled and host else None
+            if circuit is None or circuit.state != HALF_OPEN:
+                return False
+            if circuit.probe_done is not None:
+                await circuit.probe_done.wait()
+                continue
+            if not probe:
+                return False
+            circuit.probe_done = asyncio.Event()
+            return True
+    
+    @staticmethod
+    def _end_probe(circuit: HostCircuit):
+        if circuit.probe_done is not None:
+            circuit.probe_done.set()
+            circuit.probe_done = None
+    
+    def release(self, host: Optional[str]):
+        """探测请求没有得出结论（被取消或非连接类异常）时让出探测名额，等待中的请求之一接替探测"""
+        circuit = self._circuits.get(host) if host else None
+        if circuit is not None:
+            self._end_probe(circuit)
+    
+    def record_success(self, host: Optional[str]):
+        if not host or host not in self._circuits:
+            return
+        circuit = self._circuits[host]
+        circuit.state = CLOSED
+        circuit.failures = 0
+        circuit.opened_at = None
+        self._end_probe(circuit)
+    
+    def record_failure(self, host: Optional[str]):
+        if not self.enabled or not host:
+            return
+        circuit = self._circuit(host)
+        circuit.failures += 1
+        if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+            if circuit.state != OPEN:
+                circuit.opened_at = time.time()
+            circuit.state = OPEN
+        self._end_probe(circuit)
+    
+    def trace_config(self) -> aiohttp.TraceConfig:
+        async def on_request_start(session, context, params):
+            # check 抛出 CircuitOpenError 时同样会触发 on_request_exception，先占位
+            context.circuit_probe = False
+            context.circuit_probe = await self.check(params.url.host)
+        
+        async def on_request_end(session, context, params):
+            self.record_success(params.url.host)
+        
+        async def on_request_exception(session, context, params):
+            if isinstance(params.exception, FAILURE_EXCEPTIONS):
+                self.record_failure(params.url.host)
+            elif context.circuit_probe:
+                self.release(params.url.host)
+        
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
+    
+    def load(self, path):
+        """载入上次运行结束时熔断中的主机，以半开状态开始"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                opened = json.load(f)
+        except (OSError, ValueError):
+            return
+        for host, failures in opened.items():
+            circuit = self._circuit(host)
+            circuit.state = HALF_OPEN
+            circuit.failures = failures
+    
+    def save(self, path):
+        path = Path(path)
+        opened = {host: circuit.failures for host, circuit in self._circuits.items() if circuit.state == OPEN}
+        if not opened:
+            if path.exists():
+                path.unlink()
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(opened, f)
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            host: {'state': circuit.state, 'failures': circuit.failures, 'opened_at': circuit.opened_at}
+            for host, circuit in self._circuits.items()
+        }
+
+
+circuit_breakers = CircuitBreakerRegistry()
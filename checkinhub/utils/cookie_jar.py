@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.cookiejar import http2time
+from http.cookies import Morsel
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import aiohttp
+from cryptography.fernet import Fernet, InvalidToken
+from yarl import URL
+
+
+COOKIE_KEY_ENV = 'CHECKINHUB_COOKIE_KEY'
+COOKIE_KEY_FILE_ENV = 'CHECKINHUB_COOKIE_KEY_FILE'
+
+logger = logging.getLogger('checkinhub')
+
+
+def parse_cookie_header(header: Optional[str]) -> Dict[str, str]:
+    """把 "a=1; b=2" 形式的 Cookie 字符串解析为字典"""
+    cookies = {}
+    for part in (header or '').split(';'):
+        name, sep, value = part.strip().partition('=')
+        if sep and name:
+            cookies[name] = value
+    return cookies
+
+
+def raw_morsel(name: str, value: str) -> Morsel:
+    """编码值与原值相同的 Morsel，发送时按原样写入请求头，不加引号"""
+    morsel = Morsel()
+    morsel.set(name, value, value)
+    return morsel
+
+
+def build_cookie_jar(records: List[Dict[str, Any]], seed: Optional[str] = None,
+                     base_url: Optional[str] = None) -> aiohttp.CookieJar:
+    """用保存的会话构造 CookieJar；没有保存的会话时使用配置中的静态 cookie（需在事件循环中调用）
+    
+    unsafe=True 允许 IP 地址形式的主机保存 Cookie；值按原样发送，
+    避免 koa:sess=eyJ...= 这类带 = 的会话值被加上引号导致上游不认。
+    """
+    jar = aiohttp.CookieJar(unsafe=True, quote_cookie=False)
+    if not records:
+        if seed:
+            cookies = [(name, raw_morsel(name, value)) for name, value in parse_cookie_header(seed).items()]
+            jar.update_cookies(cookies, URL(base_url) if base_url else URL())
+        return jar
+    
+    for record in records:
+        morsel = raw_morsel(record['name'], record['value'])
+        morsel['domain'] = record['domain']
+        morsel['path'] = record['path']
+        if record.get('expires') is not None:
+            morsel['expires'] = formatdate(record['expires'], usegmt=True)
+        if record.get('secure'):
+            morsel['secure'] = True
+        jar.update_cookies([(record['name'], morsel)], URL.build(scheme='https', host=record['domain']))
+    return jar
+
+
+def dump_cookie_jar(jar: aiohttp.CookieJar) -> List[Dict[str, Any]]:
+    """把 CookieJar 中未过期的 Cookie 转为可保存的记录，max-age 换算为绝对过期时间"""
+    now = time.time()
+    records = []
+    for morsel in jar:
+        expires = None
+        if morsel['max-age']:
+            expires = int(now + int(morsel['max-age']))
+        elif morsel['expires']:
+            expires = http2time(morsel['expires'])
+        records.append({
+            'name': morsel.key,
+            'value': morsel.value,
+            'domain': morsel['domain'],
+            'path': morsel['path'] or '/',
+            'expires': expires,
+            'secure': bool(morsel['secure'])
+        })
+    return records
+
+
+class CookieVault:
+    """按站点 + 账户保存的加密 Cookie（data/cookies/*.bin，Fernet 加密）
+    
+    每个账户一个文件，记录 Cookie 的域、路径与过期时间；没有过期时间的会话 Cookie
+    保存 session_ttl_hours 小时。配置中的 cookie 被修改后旧的会话自动作废。
+    密钥依次取环境变量 CHECKINHUB_COOKIE_KEY、[cookies] key、密钥文件（环境变量 CHECKINHUB_COOKIE_KEY_FILE
+    或 [cookies] key_file，应放在数据目录之外）；都没有时自动生成到 data/cookies/.key 并记录警告。
+    """
+    
+    def __init__(self, directory: str = 'data/cookies', key: Optional[str] = None,
+                 session_ttl: float = 86400, enabled: bool = True, key_file: Optional[str] = None):
+        self.directory = Path(directory)
+        self.key = key
+        self.key_file = key_file
+        self.session_ttl = session_ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._fernet: Optional[Fernet] = None
+    
+    def configure(self, config: dict):
+        self.enabled = bool(config.get('enabled', True))
+        self.directory = Path(config.get('directory', 'data/cookies'))
+        self.session_ttl = float(config.get('session_ttl_hours', 24)) * 3600
+        self.key = os.environ.get(COOKIE_KEY_ENV) or config.get('key')
+        self.key_file = os.environ.get(COOKIE_KEY_FILE_ENV) or config.get('key_file')
+        self._fernet = None
+    
+    def _cipher(self) -> Fernet:
+        with self._lock:
+            if self._fernet is not None:
+                return self._fernet
+            
+            key = self.key or os.environ.get(COOKIE_KEY_ENV)
+            if not key:
+                key_file = self.key_file or os.environ.get(COOKIE_KEY_FILE_ENV)
+                if key_file:
+                    key = self._read_key(Path(key_file))
+                else:
+                    key_path = self.directory / '.key'
+                    key = self._read_key(key_path)
+                    logger.warning(
+                        f"未配置 Cookie 加密密钥，使用与 Cookie 同目录的 {key_path}；"
+                        f"建议通过环境变量 {COOKIE_KEY_ENV} 或 [cookies] key_file 提供数据目录之外的密钥"
+                    )
+            self._fernet = Fernet(key)
+            return self._fernet
+    
+    @staticmethod
+    def _read_key(key_path: Path) -> str:
+        """读取密钥文件，不存在时生成；多个进程同时生成时以先写入的为准"""
+        try:
+            return key_path.read_text().strip()
+        except FileNotFoundError:
+            pass
+        
+        key_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = key_path.with_name(f'{key_path.name}.{os.getpid()}.tmp')
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(Fernet.generate_key().decode())
+        try:
+            # link 在目标已存在时失败，不会覆盖其他进程刚写好的密钥，也不会读到写了一半的文件
+            os.link(tmp, key_path)
+            logger.warning(f"Cookie 加密密钥不存在，已生成新的密钥: {key_path}")
+        except FileExistsError:
+            pass
+        finally:
+            tmp.unlink()
+        return key_path.read_text().strip()
+    
+    def _path(self, site_id: str, account: str) -> Path:
+        name = hashlib.sha256(f'{site_id}\0{account}'.encode('utf-8')).hexdigest()[:32]
+        return self.directory / f'{name}.bin'
+    
+    @staticmethod
+    def _fingerprint(seed: Optional[str]) -> str:
+        return hashlib.sha256((seed or '').encode('utf-8')).hexdigest()
+    
+    def load_records(self, site_id: str, account: str, seed: Optional[str] = None) -> List[Dict[str, Any]]:
+        """返回仍然有效的 Cookie 记录；文件不存在、无法解密或配置 cookie 已变化时返回空列表"""
+        if not self.enabled:
+            return []
+        
+        try:
+            token = self._path(site_id, account).read_bytes()
+        except FileNotFoundError:
+            return []
+        
+        try:
+            data = json.loads(self._cipher().decrypt(token))
+        except (InvalidToken, ValueError):
+            return []
+        
+        if data.get('seed') != self._fingerprint(seed):
+            return []
+        
+        now = time.time()
+        session_valid = now - data.get('saved_at', 0) < self.session_ttl
+        return [
+            record for record in data.get('cookies', [])
+            if (record.get('expires') is None and session_valid)
+            or (record.get('expires') is not None and record['expires'] > now)
+        ]
+    
+    def save_records(self, site_id: str, account: str, records: List[Dict[str, Any]], seed: Optional[str] = None):
+        if not self.enabled:
+            return
+        
+        path = self._path(site_id, account)
+        if not records:
+            self.clear(site_id, account)
+            return
+        
+        data = {'seed': self._fingerprint(seed), 'saved_at': time.time(), 'cookies': records}
+        token = self._cipher().encrypt(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(token)
+            os.replace(tmp, path)
+    
+    def clear(self, site_id: str, account: str):
+        try:
+            self._path(site_id, account).unlink()
+        except FileNotFoundError:
+            pass
+
+
+cookie_vault = CookieVault()
@@ -1,8 +1,11 @@
+import json
 import logging
 import os
 from datetime import datetime
 from pathlib import Path
 
+from .log_pipeline import log_pipeline
+
 
 class SiteLoggerAdapter(logging.LoggerAdapter):
     def process(self, msg, kwargs):
@@ -12,6 +15,28 @@ class SiteLoggerAdapter(logging.LoggerAdapter):
         return msg, kwargs
 
 
+class JsonFormatter(logging.Formatter):
+    """JSON Lines 格式：每行一个对象，附带 extra 中的结构化字段"""
+    
+    FIELDS = ('site_id', 'account', 'status', 'duration_ms', 'error')
+    
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'site_id': record.name.split('.', 1)[1] if record.name.startswith('checkinhub.') else None
+        }
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = round(value, 1) if field == 'duration_ms' else value
+        payload['message'] = record.getMessage()
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
 def setup_logger(name: str = "checkinhub", level: str = "INFO", log_format: str = None) -> logging.Logger:
     if log_format is None:
         log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -24,12 +49,12 @@ def setup_logger(name: str = "checkinhub", level: str = "INFO", log_format: str
         console_handler.setLevel(getattr(logging, level.upper()))
         formatter = logging.Formatter(log_format)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        logger.addHandler(log_pipeline.wrap(console_handler))
     
     return logger
 
 
-def get_site_logger(site_name: str, log_dir: str = "logs", level: str = "INFO") -> logging.Logger:
+def get_site_logger(site_name: str, log_dir: str = "logs", level: str = "INFO", json_format: bool = False) -> logging.Logger:
     Path(log_dir).mkdir(parents=True, exist_ok=True)
     
     logger_name = f"checkinhub.{site_name}"
@@ -45,16 +70,19 @@ def get_site_logger(site_name: str, log_dir: str = "logs", level: str = "INFO")
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    logger.addHandler(log_pipeline.wrap(console_handler))
     
     today = datetime.now().strftime("%Y-%m-%d")
     log_file = os.path.join(log_dir, f"{site_name}_{today}.log")
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler = logging.FileHandler(log_file, encoding='utf-8', delay=True)
     file_handler.setLevel(getattr(logging, level.upper()))
-    file_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
+    if json_format:
+        file_formatter = JsonFormatter()
+    else:
+        file_formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
+    logger.addHandler(log_pipeline.wrap(file_handler))
     
     return SiteLoggerAdapter(logger, {})
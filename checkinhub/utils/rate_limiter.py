@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Optional
+
+
+BACKOFF_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """令牌桶限速器
+    
+    rate 为每秒补充的令牌数，burst 为桶容量。遇到 429/503 时速率减半，
+    之后每次成功响应逐步恢复到初始速率；Retry-After 期间暂停发放令牌。
+    """
+    
+    def __init__(self, rate: float, burst: int = 1, min_rate: Optional[float] = None):
+        self.base_rate = max(float(rate), 0.001)
+        self.rate = self.base_rate
+        self.burst = max(int(burst), 1)
+        self.min_rate = min_rate if min_rate is not None else self.base_rate / 16
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+    
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+    
+    def backoff(self, retry_after: Optional[float] = None):
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+    
+    def recover(self):
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+    
+    def observe(self, status: int, retry_after: Optional[str] = None):
+        if status in BACKOFF_STATUSES:
+            self.backoff(parse_retry_after(retry_after))
+        elif status < 400:
+            self.recover()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
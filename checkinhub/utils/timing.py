@@ -0,0 +1,154 @@
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+import aiohttp
+
+
+SPAN_KINDS = ('site', 'account', 'request', 'notify')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩百分位数，values 需已排序"""
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+class RunRecorder:
+    """一次运行的耗时记录
+    
+    按 (分组, 类型) 收集耗时：分组为站点 ID（通知为渠道名），类型为 site / account / request / notify。
+    结束时 summary() 给出每组的次数、p50、p95、最大值与总耗时。
+    """
+    
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.spans: Dict[str, Dict[str, List[float]]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+    
+    def record(self, group: str, kind: str, duration_ms: float, error: Optional[str] = None):
+        self.spans.setdefault(group, {}).setdefault(kind, []).append(duration_ms)
+        if error:
+            counts = self.errors.setdefault(group, {})
+            counts[kind] = counts.get(kind, 0) + 1
+    
+    def finish(self):
+        self.finished_at = time.time()
+    
+    def summary(self) -> Dict[str, Any]:
+        groups = {}
+        for group, kinds in self.spans.items():
+            groups[group] = {}
+            for kind in SPAN_KINDS:
+                if kind not in kinds:
+                    continue
+                values = sorted(kinds[kind])
+                groups[group][kind] = {
+                    'count': len(values),
+                    'errors': self.errors.get(group, {}).get(kind, 0),
+                    'p50_ms': round(percentile(values, 50), 1),
+                    'p95_ms': round(percentile(values, 95), 1),
+                    'max_ms': round(values[-1], 1),
+                    'total_ms': round(sum(values), 1)
+                }
+        finished_at = self.finished_at or time.time()
+        return {
+            'started_at': self.started_at,
+            'duration_ms': round((finished_at - self.started_at) * 1000, 1),
+            'groups': groups
+        }
+    
+    def render(self) -> str:
+        summary = self.summary()
+        lines = [
+            f"⏱️  运行耗时 {summary['duration_ms'] / 1000:.1f} 秒",
+            f"{'group':<20}{'span':<10}{'count':>6}{'errors':>7}{'p50(ms)':>10}{'p95(ms)':>10}{'max(ms)':>10}"
+        ]
+        # 按站点总耗时从高到低排列，耗时最多的站点在最前
+        ordered = sorted(
+            summary['groups'].items(),
+            key=lambda item: max(stats['total_ms'] for stats in item[1].values()),
+            reverse=True
+        )
+        for group, kinds in ordered:
+            for kind, stats in kinds.items():
+                lines.append(
+                    f"{group:<20}{kind:<10}{stats['count']:>6}{stats['errors']:>7}"
+                    f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['max_ms']:>10.1f}"
+                )
+        return '\n'.join(lines)
+    
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+
+_recorder: ContextVar[Optional[RunRecorder]] = ContextVar('run_recorder', default=None)
+
+
+def start_recording() -> RunRecorder:
+    """为当前上下文（及之后创建的任务）开始记录；未开始记录时 span() 不做任何事"""
+    recorder = RunRecorder()
+    _recorder.set(recorder)
+    return recorder
+
+
+def current_recorder() -> Optional[RunRecorder]:
+    return _recorder.get()
+
+
+class Span:
+    """span() 的句柄；把 error 设为非空表示本次操作失败（未抛出异常时也可以标记）"""
+    
+    __slots__ = ('error',)
+    
+    def __init__(self):
+        self.error: Optional[str] = None
+
+
+@contextmanager
+def span(group: Optional[str], kind: str) -> Iterator[Span]:
+    handle = Span()
+    recorder = _recorder.get()
+    if recorder is None or not group:
+        yield handle
+        return
+    
+    started = time.perf_counter()
+    try:
+        yield handle
+    except BaseException as e:
+        handle.error = type(e).__name__
+        raise
+    finally:
+        recorder.record(group, kind, (time.perf_counter() - started) * 1000, handle.error)
+
+
+def trace_config(group: str) -> aiohttp.TraceConfig:
+    """记录 aiohttp 会话中每个请求耗时的 TraceConfig；未开始记录时不做任何事"""
+    
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+    
+    async def on_request_end(session, context, params):
+        recorder = _recorder.get()
+        if recorder is not None:
+            status = params.response.status
+            error = f'HTTP {status}' if status >= 400 else None
+            recorder.record(group, 'request', (time.perf_counter() - context.started) * 1000, error)
+    
+    async def on_request_exception(session, context, params):
+        recorder = _recorder.get()
+        if recorder is not None and hasattr(context, 'started'):
+            error = type(params.exception).__name__
+            recorder.record(group, 'request', (time.perf_counter() - context.started) * 1000, error)
+    
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_exception)
+    return config